@@ -0,0 +1,3 @@
+from perovskite_prediction_api.api.app import create_app
+
+app = create_app()
@@ -0,0 +1,10 @@
+from fastapi import FastAPI
+
+from perovskite_prediction_api.api.v1.router import router as v1_router
+
+
+def create_app() -> FastAPI:
+    """The API application; served as `perovskite_prediction_api.api.app:create_app()` or through src/app.py."""
+    app = FastAPI(title="Perovskite prediction API")
+    app.include_router(v1_router)
+    return app
@@ -0,0 +1,128 @@
+import os
+from functools import lru_cache
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from perovskite_prediction_api.api.data.data_service import DataService, STREAM_FORMATS
+from perovskite_prediction_api.common.settings import data_directory, similarity_index_path
+from perovskite_prediction_api.features.similarity_index import SimilarityIndex
+from perovskite_prediction_api.repository.data_repository import LocalDataRepository
+
+router = APIRouter(prefix="/data", tags=["data"])
+
+
+class SimilarityRequest(BaseModel):
+    composition: Dict[str, Dict[str, float]] = Field(
+        examples=[{"A": {"MA": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 2.7, "Br": 0.3}}])
+    k: int = Field(default=10, ge=1, le=1000)
+
+
+class Neighbour(BaseModel):
+    id: int
+    distance: float
+    r_A: float
+    r_B: float
+    r_C: float
+    tolerance_factor: float
+    polarizability_A: float
+    polarizability_B: float
+    polarizability_C: float
+    entropy_A: float
+    entropy_C: float
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header (a list of tags or "*") with the current ETag."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if len(tag) >= 2 and tag[0] == tag[-1] == '"':
+            tag = tag[1:-1]
+        if tag == etag:
+            return True
+    return False
+
+
+@lru_cache
+def get_data_service() -> DataService:
+    index_path = similarity_index_path()
+    similarity_index = SimilarityIndex.load(index_path) if os.path.isdir(index_path) else None
+    return DataService(LocalDataRepository(data_directory()), similarity_index)
+
+
+@router.get("/datasets", response_model=List[str])
+def list_datasets(service: DataService = Depends(get_data_service)):
+    return service.list_datasets()
+
+
+@router.get("/datasets/{name}")
+def export_dataset(
+        name: str,
+        request: Request,
+        format: str = Query(default="arrow", enum=list(STREAM_FORMATS)),
+        columns: str | None = Query(default=None, description="Comma separated column names"),
+        dimension: str | None = Query(default=None, examples=["3D"]),
+        space_group: str | None = Query(default=None, examples=["Pm3m"]),
+        ion: str | None = Query(default=None, examples=["Cs"]),
+        cursor: str | None = None,
+        limit: int | None = Query(default=None, ge=1),
+        service: DataService = Depends(get_data_service),
+):
+    query = dict(format=format, columns=columns, dimension=dimension, space_group=space_group, ion=ion,
+                 cursor=cursor, limit=limit)
+    try:
+        etag = service.get_etag(name, **query)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    headers = {"ETag": f'"{etag}"'}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        page = service.scan(
+            name,
+            columns=columns.split(",") if columns else None,
+            filters={"dimension": dimension, "space_group": space_group, "ion": ion},
+            cursor=cursor,
+            limit=limit,
+            etag=etag,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    return StreamingResponse(page.encode(format), media_type=STREAM_FORMATS[format], headers=headers)
+
+
+@router.get("/datasets/{name}/profile")
+def get_dataset_profile(name: str, request: Request, service: DataService = Depends(get_data_service)):
+    try:
+        etag = service.get_etag(name, view="profile")
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+        profile = service.get_profile(name)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return JSONResponse(profile, headers={"ETag": f'"{etag}"'})
+
+
+@router.post("/similar", response_model=List[Neighbour])
+def find_similar(request: SimilarityRequest, service: DataService = Depends(get_data_service)):
+    try:
+        return service.find_similar(request.composition, request.k)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    except (KeyError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
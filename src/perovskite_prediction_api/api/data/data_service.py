@@ -0,0 +1,236 @@
+import base64
+import hashlib
+import re
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from perovskite_prediction_api.features.similarity_index import SimilarityIndex, compute_similarity_vector, \
+    compute_similarity_vectors
+from perovskite_prediction_api.repository.data_repository import AbstractDataRepository
+
+STREAM_FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "ndjson": "application/x-ndjson",
+}
+
+_SLOT_COLUMN = re.compile(r"^[ABC]_\d+$")
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the caller chunk by chunk."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class DatasetPage:
+    """One page of a filtered, projected dataset scan. Iterating it yields encoded body chunks."""
+
+    def __init__(self, table: pa.Table, rows: np.ndarray, columns: List[str], batch_size: int,
+                 next_cursor: str | None, etag: str):
+        self._table = table
+        self._rows = rows
+        self._columns = columns
+        self._batch_size = batch_size
+        self.next_cursor = next_cursor
+        self.etag = etag
+
+    @property
+    def schema(self) -> pa.Schema:
+        return self._table.select(self._columns).schema
+
+    def batches(self) -> Iterator[pa.RecordBatch]:
+        projected = self._table.select(self._columns)
+        for start in range(0, len(self._rows), self._batch_size):
+            indices = self._rows[start:start + self._batch_size]
+            yield from projected.take(pa.array(indices)).to_batches()
+
+    def encode(self, stream_format: str) -> Iterator[bytes]:
+        if stream_format == "ndjson":
+            for batch in self.batches():
+                yield batch.to_pandas().to_json(orient="records", lines=True).encode()
+            return
+
+        sink = _ChunkSink()
+        if stream_format == "arrow":
+            writer = pa.ipc.new_stream(sink, self.schema)
+        elif stream_format == "parquet":
+            writer = pq.ParquetWriter(sink, self.schema)
+        else:
+            raise ValueError(f"Unsupported format '{stream_format}'. Use one of {sorted(STREAM_FORMATS)}.")
+        for batch in self.batches():
+            writer.write_batch(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        writer.close()
+        yield sink.drain()
+
+
+class DataService:
+    def __init__(self, data_repository: AbstractDataRepository, similarity_index: SimilarityIndex | None = None):
+        self._data_repository = data_repository
+        self._similarity_index = similarity_index
+
+    def list_datasets(self) -> List[str]:
+        return self._data_repository.list_datasets()
+
+    def append_rows(self, name: str, dataframe: pd.DataFrame):
+        """
+        Append rows to a dataset and, when the similarity index covers that dataset, index them under
+        their dataset row numbers.
+        """
+        first_row = self._data_repository.get_dataset(name).num_rows
+        self._data_repository.append_rows(name, dataframe)
+        if self._similarity_index is not None and self._similarity_index.dataset == name:
+            ids, vectors = compute_similarity_vectors(dataframe, first_row)
+            self._similarity_index.add(ids, vectors)
+
+    def get_etag(self, name: str, **query) -> str:
+        """
+        ETag of a dataset response: changes when either the dataset file or the query changes.
+        """
+        dataset_etag = self._data_repository.get_etag(name)
+        query_key = repr(sorted((key, value) for key, value in query.items() if value is not None))
+        return hashlib.sha1(f"{dataset_etag}:{query_key}".encode()).hexdigest()
+
+    def scan(self,
+             name: str,
+             columns: List[str] | None = None,
+             filters: Dict[str, str] | None = None,
+             cursor: str | None = None,
+             limit: int | None = None,
+             batch_size: int = 8192,
+             etag: str | None = None) -> DatasetPage:
+        """
+        Select one page of a dataset without materializing it.
+        Args:
+            name (str): Dataset name.
+            columns (List[str] | None): Columns to return, all if None.
+            filters (Dict[str, str] | None): `dimension`, `space_group` and/or `ion` filters.
+            cursor (str | None): Cursor returned by the previous page.
+            limit (int | None): Maximum number of rows in the page.
+            batch_size (int): Rows per streamed batch.
+            etag (str | None): ETag reported with the page.
+        Returns:
+            DatasetPage: Rows of the page and the cursor of the next one.
+        """
+        table = self._data_repository.get_dataset(name)
+        dataset_etag = self._data_repository.get_etag(name)
+        columns = columns or table.column_names
+        missing = [column for column in columns if column not in table.column_names]
+        if missing:
+            raise ValueError(f"Unknown columns: {missing}")
+
+        mask = self._build_mask(table, filters or {})
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(table.num_rows)
+        offset = self._decode_cursor(cursor, dataset_etag) if cursor else 0
+        rows = rows[np.searchsorted(rows, offset):]
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            next_cursor = self._encode_cursor(int(rows[limit]), dataset_etag)
+            rows = rows[:limit]
+        return DatasetPage(table, rows, columns, batch_size, next_cursor, etag or dataset_etag)
+
+    def get_profile(self, name: str) -> Dict:
+        """
+        Precomputed aggregates of a dataset (NaN counts, ion counts, stack sequence counts, NaN heatmap).
+        """
+        return self._data_repository.get_profile(name).to_dict()
+
+    def find_similar(self, composition: Dict[str, Dict[str, float]], k: int) -> List[Dict]:
+        """
+        Find the measured rows closest to a composition.
+        Args:
+            composition (Dict[str, Dict[str, float]]): Perovskite composition.
+            k (int): Number of neighbours.
+        Returns:
+            List[Dict]: Neighbours nearest first, with row id, distance and descriptors.
+        """
+        if self._similarity_index is None:
+            raise FileNotFoundError("Similarity index is not built.")
+        vector = compute_similarity_vector(composition)
+        ids, distances = self._similarity_index.query(vector, k)
+        descriptors = self._similarity_index.descriptors(ids[0])
+        return [
+            {"id": int(row_id), "distance": float(distance), **row_descriptors}
+            for row_id, distance, row_descriptors in zip(ids[0], distances[0], descriptors)
+        ]
+
+    @staticmethod
+    def _build_mask(table: pa.Table, filters: Dict[str, str]) -> np.ndarray | None:
+        mask = None
+        for key, value in filters.items():
+            if value is None:
+                continue
+            if key == "dimension":
+                condition = DataService._dimension_condition(table, value)
+            elif key == "space_group":
+                column = next((c for c in ("space_group", "spacegroup") if c in table.column_names), None)
+                if column is None:
+                    raise ValueError("Dataset has no space group column")
+                condition = pc.equal(pc.cast(table[column], pa.string()), value)
+            elif key == "ion":
+                slot_columns = [c for c in table.column_names if _SLOT_COLUMN.match(c)]
+                if not slot_columns:
+                    raise ValueError("Dataset has no ion slot columns")
+                condition = pc.equal(pc.cast(table[slot_columns[0]], pa.string()), value)
+                for column in slot_columns[1:]:
+                    condition = pc.or_(condition, pc.equal(pc.cast(table[column], pa.string()), value))
+            else:
+                raise ValueError(f"Unsupported filter '{key}'")
+            condition = pc.fill_null(condition, False).to_numpy(zero_copy_only=False)
+            mask = condition if mask is None else mask & condition
+        return mask
+
+    @staticmethod
+    def _dimension_condition(table: pa.Table, value: str):
+        if "dimension" in table.column_names:
+            return pc.equal(pc.cast(table["dimension"], pa.string()), value)
+        column = f"Perovskite_dimension_{value}"
+        if column not in table.column_names:
+            raise ValueError(f"Unknown dimension '{value}'")
+        return pc.equal(pc.cast(table[column], pa.bool_()), True)
+
+    @staticmethod
+    def _encode_cursor(offset: int, dataset_etag: str) -> str:
+        return base64.urlsafe_b64encode(f"{dataset_etag[:12]}:{offset}".encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, dataset_etag: str) -> int:
+        try:
+            version, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+            offset = int(offset)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Malformed cursor")
+        if version != dataset_etag[:12]:
+            raise ValueError("Cursor belongs to a previous version of the dataset")
+        return offset
@@ -0,0 +1,121 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field, model_validator
+
+from perovskite_prediction_api.api.prediction.prediction_service import PredictionService
+from perovskite_prediction_api.common.settings import feature_matrix_directory, models_directory
+from perovskite_prediction_api.entities.dictioanary import Dimensions
+from perovskite_prediction_api.repository.model_repository import LocalModelRepository
+
+router = APIRouter(prefix="/prediction", tags=["prediction"])
+
+MAX_SWEEP_POINTS = 200_000
+DimensionName = Literal[tuple(dimension.dimension for dimension in Dimensions)]
+
+
+class PerovskiteInput(BaseModel):
+    composition: Dict[str, Dict[str, float]] = Field(
+        examples=[{"A": {"MA": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 2.7, "Br": 0.3}}])
+    dimension: DimensionName = Field(default="3D", examples=["3D"])
+    band_gap: float | None = Field(default=None, description="Measured band gap; predicted when missing")
+    properties: Dict[str, Any] = Field(default_factory=dict,
+                                       description="Device and process columns used by the stability model")
+
+
+class PredictionRequest(BaseModel):
+    perovskites: List[PerovskiteInput] = Field(min_length=1, max_length=10000)
+
+
+class Prediction(BaseModel):
+    valid: bool
+    band_gap: float | None
+    band_gap_imputed: bool
+    stability: float | None
+    r_A: float | None
+    r_B: float | None
+    r_C: float | None
+    tolerance_factor: float | None
+    octahedral_factor: float | None
+    space_group: str | None
+
+
+class DatasetPrediction(BaseModel):
+    row: int
+    valid: bool
+    band_gap: float | None
+    band_gap_imputed: bool
+    stability: float | None
+
+
+class SweepAxisInput(BaseModel):
+    site: str = Field(examples=["C"])
+    ion: str = Field(examples=["Br"])
+    start: float = Field(ge=0, examples=[0.0])
+    stop: float = Field(ge=0, examples=[3.0])
+    num: int = Field(ge=1, le=1001, examples=[31])
+
+
+class SweepRequest(BaseModel):
+    base: Dict[str, Dict[str, float]] = Field(examples=[{"A": {"MA": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 3.0}}])
+    axes: List[SweepAxisInput] = Field(min_length=1, max_length=4)
+    predict_band_gap: bool = True
+
+    @model_validator(mode="after")
+    def check_size(self):
+        points = 1
+        for axis in self.axes:
+            points *= axis.num
+        if points > MAX_SWEEP_POINTS:
+            raise ValueError(f"Sweep grid has {points} points, at most {MAX_SWEEP_POINTS} are allowed")
+        return self
+
+
+class SweepAxisValues(BaseModel):
+    site: str
+    ion: str
+    values: List[float]
+
+
+class SweepResponse(BaseModel):
+    axes: List[SweepAxisValues]
+    shape: List[int]
+    valid: List[bool]
+    fields: Dict[str, List[float | None]] = Field(
+        description="Flattened in row-major grid order: r_A, r_B, r_C, tolerance_factor, octahedral_factor, "
+                    "band_gap and the d_<factor>/d[<site>:<ion>] derivatives")
+
+
+@lru_cache
+def get_prediction_service() -> PredictionService:
+    return PredictionService(LocalModelRepository(models_directory()), feature_matrix_directory())
+
+
+@router.post("/predict", response_model=List[Prediction])
+def predict(request: PredictionRequest, service: PredictionService = Depends(get_prediction_service)):
+    try:
+        return service.predict([perovskite.model_dump() for perovskite in request.perovskites])
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.get("/datasets/{name}", response_model=List[DatasetPrediction])
+def predict_dataset(name: str,
+                    offset: int = Query(default=0, ge=0),
+                    limit: int = Query(default=1000, ge=1, le=10000),
+                    service: PredictionService = Depends(get_prediction_service)):
+    try:
+        return service.predict_dataset(name, offset, limit)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.post("/sweep", response_model=SweepResponse)
+def sweep(request: SweepRequest, service: PredictionService = Depends(get_prediction_service)):
+    try:
+        return service.sweep(request.base, [axis.model_dump() for axis in request.axes], request.predict_band_gap)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
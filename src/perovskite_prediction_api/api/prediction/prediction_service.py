@@ -0,0 +1,145 @@
+import os
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.entities.dictioanary import Dimensions, Site, SpaceGroup
+from perovskite_prediction_api.features.feature_matrix import FeatureMatrix
+from perovskite_prediction_api.features.sweeps import SweepAxis, compute_sweep
+from perovskite_prediction_api.inference.pipeline import BAND_GAP_COLUMN, STABILITY_COLUMN, STABILITY_FEATURES, \
+    InferencePipeline, ModelStage
+from perovskite_prediction_api.repository.model_repository import AbstractModelRepository
+
+_SPACE_GROUPS = {group.code: group.spacegroup for group in SpaceGroup}
+_DESCRIPTORS = ["r_A", "r_B", "r_C", "tolerance_factor", "octahedral_factor"]
+FEATURE_MATRIX_EXTENSION = ".fmx"
+
+
+def perovskites_to_frame(perovskites: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Turn API inputs ({"composition": {"A": {"MA": 1.0}, ...}, "dimension": "3D", "band_gap": None,
+    "properties": {...}}) into rows in the prepared dataset layout (A_1, A_1_coef, ...).
+    """
+    rows = []
+    for perovskite in perovskites:
+        composition = perovskite["composition"]
+        unknown_sites = set(composition) - {site.value for site in Site}
+        if unknown_sites:
+            raise ValueError(f"Unknown sites {sorted(unknown_sites)}")
+        row = dict(perovskite.get("properties") or {})
+        for site, ions in composition.items():
+            for i, (ion, coef) in enumerate(ions.items()):
+                row[f"{site}_{i + 1}"] = ion
+                row[f"{site}_{i + 1}_coef"] = coef
+        row["dimension"] = perovskite.get("dimension", "3D")
+        row[BAND_GAP_COLUMN] = perovskite.get("band_gap")
+        rows.append(row)
+    df = pd.DataFrame(rows)
+    slot_columns = [column for column in df.columns if column[:2] in ("A_", "B_", "C_")]
+    df[slot_columns] = df[slot_columns].fillna("0")
+    return df
+
+
+class PredictionService:
+    """
+    Band gap (imputed where not given, 3D rows only since the model was trained on 3D perovskites) and,
+    when a stability model is available, stability predictions.
+    """
+
+    def __init__(self, model_repository: AbstractModelRepository, feature_dir: str | None = None):
+        """
+        Args:
+            model_repository (AbstractModelRepository): Band gap and (optional) stability models.
+            feature_dir (str | None): Directory of `<dataset>.fmx` feature matrices for dataset predictions.
+        """
+        stages = [ModelStage("band_gap", model_repository.get_band_gap_model_for_3d_perovskites(),
+                             output=BAND_GAP_COLUMN, impute=True, dimensions=[Dimensions.THREE_DIM.code])]
+        try:
+            stability_model = model_repository.get_stability_model()
+        except FileNotFoundError:
+            stability_model = None
+        if stability_model is not None:
+            stored = stability_model.get_booster().feature_names
+            stages.append(ModelStage("stability", stability_model, output=STABILITY_COLUMN,
+                                     features=None if stored else STABILITY_FEATURES))
+        self._pipeline = InferencePipeline(stages, model_repository.get_encoders())
+        self.has_stability_model = stability_model is not None
+        self._feature_dir = feature_dir
+        self._matrices: Dict[str, FeatureMatrix] = {}
+
+    @property
+    def pipeline(self) -> InferencePipeline:
+        return self._pipeline
+
+    def predict(self, perovskites: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        result = self._pipeline.run(perovskites_to_frame(perovskites))
+        band_gap = result.column(BAND_GAP_COLUMN)
+        stability = result.column(STABILITY_COLUMN) if self.has_stability_model else np.full(len(result), np.nan)
+        descriptors = {name: getattr(result.composition, name) for name in _DESCRIPTORS}
+        space_groups = result.composition.space_group
+        predictions = []
+        for i in range(len(result)):
+            predictions.append({
+                "valid": bool(result.valid[i]),
+                "band_gap": _optional(band_gap[i]),
+                "band_gap_imputed": bool(result.predicted["band_gap"][i]),
+                "stability": _optional(stability[i]),
+                **{name: _optional(values[i]) for name, values in descriptors.items()},
+                "space_group": None if np.isnan(space_groups[i]) else _SPACE_GROUPS[int(space_groups[i])],
+            })
+        return predictions
+
+    def write_feature_matrix(self, name: str, chunks: Iterable[pd.DataFrame]) -> FeatureMatrix:
+        """Build the feature matrix of a prepared dataset (chunks of its rows) for `predict_dataset`."""
+        path = self._matrix_path(name)
+        os.makedirs(self._feature_dir, exist_ok=True)
+        matrix = self._pipeline.write_feature_matrix(chunks, path)
+        self._matrices[name] = matrix
+        return matrix
+
+    def predict_dataset(self, name: str, offset: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Predictions for rows [offset, offset + limit) of a dataset, read from its memory-mapped feature
+        matrix so workers share the pages and only the requested rows are copied.
+        """
+        matrix = self._open_matrix(name)
+        rows = slice(offset, min(offset + limit, len(matrix)))
+        result = self._pipeline.run_matrix(matrix, rows)
+        band_gap = result.column(BAND_GAP_COLUMN)
+        stability = result.column(STABILITY_COLUMN) if self.has_stability_model else np.full(len(result), np.nan)
+        return [{
+            "row": offset + i,
+            "valid": bool(result.valid[i]),
+            "band_gap": _optional(band_gap[i]),
+            "band_gap_imputed": bool(result.predicted["band_gap"][i]),
+            "stability": _optional(stability[i]),
+        } for i in range(len(result))]
+
+    def _open_matrix(self, name: str) -> FeatureMatrix:
+        matrix = self._matrices.get(name)
+        if matrix is None:
+            path = self._matrix_path(name)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"No feature matrix for dataset '{name}'")
+            matrix = self._matrices[name] = FeatureMatrix.open(path)
+        else:
+            matrix.refresh()
+        return matrix
+
+    def _matrix_path(self, name: str) -> str:
+        if self._feature_dir is None:
+            raise FileNotFoundError("No feature matrix directory configured")
+        if os.path.basename(name) != name:
+            raise ValueError(f"Invalid dataset name '{name}'")
+        return os.path.join(self._feature_dir, name + FEATURE_MATRIX_EXTENSION)
+
+    def sweep(self, base: Dict[str, Dict[str, float]], axes: List[Dict[str, Any]],
+              predict_band_gap: bool = True) -> Dict[str, Any]:
+        """What-if grid around `base` (see `compute_sweep`), in the compact `SweepResult.to_dict` form."""
+        model = self._pipeline.stages[0].model if predict_band_gap else None
+        return compute_sweep(base, [SweepAxis(**axis) for axis in axes], model).to_dict()
+
+
+def _optional(value) -> float | None:
+    return None if not np.isfinite(value) else float(value)
@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+
+from perovskite_prediction_api.api.data.data_router import router as data_router
+from perovskite_prediction_api.api.prediction.prediction_router import router as prediction_router
+
+router = APIRouter(prefix="/api/v1")
+router.include_router(data_router)
+router.include_router(prediction_router)
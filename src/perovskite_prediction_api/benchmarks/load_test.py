@@ -0,0 +1,351 @@
+"""
+Offline load test of the FastAPI app.
+
+    python -m perovskite_prediction_api.benchmarks.load_test --mode inprocess --concurrency 32 --duration 20 \
+        --mix predict_single=6,predict_batch=2,predict_dataset=2,export=2 --report load_test.json [--compare baseline.json]
+
+The app (`create_app`) runs either in this process (httpx ASGI transport, no sockets) or as gunicorn
+uvicorn workers. Instead of Google Drive it serves a synthetic prepared dataset from a LocalDataRepository, its feature
+matrix (memory-mapped by every worker for dataset predictions) and the band gap model from a
+LocalModelRepository over `--models-dir` (PEROVSKITE_MODELS_DIR by default).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+import httpx
+import numpy as np
+import pandas as pd
+
+import perovskite_prediction_api
+from perovskite_prediction_api.api.app import create_app
+from perovskite_prediction_api.api.data.data_router import get_data_service
+from perovskite_prediction_api.api.data.data_service import DataService
+from perovskite_prediction_api.api.prediction.prediction_router import get_prediction_service
+from perovskite_prediction_api.api.prediction.prediction_service import PredictionService
+from perovskite_prediction_api.common.settings import models_directory
+from perovskite_prediction_api.repository.data_repository import LocalDataRepository
+from perovskite_prediction_api.repository.model_repository import LocalModelRepository
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(perovskite_prediction_api.__file__))
+DATASET_NAME = "load_test"
+
+_A_IONS = ["MA", "FA", "Cs"]
+_B_IONS = ["Pb", "Sn"]
+_C_IONS = ["I", "Br", "Cl"]
+
+Request = Tuple[str, str, Dict[str, Any] | None]
+
+
+@dataclass
+class LoadTestConfig:
+    mode: str = "inprocess"
+    workers: int = 2
+    concurrency: int = 16
+    duration: float = 10.0
+    max_requests: int | None = None
+    warmup_requests: int = 20
+    mix: Dict[str, float] = field(
+        default_factory=lambda: {"predict_single": 6, "predict_batch": 2, "predict_dataset": 2, "export": 2})
+    batch_size: int = 64
+    export_limit: int = 1000
+    dataset_rows: int = 20000
+    seed: int = 0
+    port: int = 8765
+    models_dir: str = field(default_factory=models_directory)
+
+
+def make_dataset(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Synthetic prepared dataset in the layout of data_preparation.ipynb (two A, one B, two C slots)."""
+    rng = np.random.default_rng(seed)
+    a_mix = rng.integers(0, 2, rows).astype(bool)
+    c_mix = rng.integers(0, 2, rows).astype(bool)
+    a_coef = np.round(rng.uniform(0.05, 0.95, rows), 2)
+    c_coef = np.round(rng.uniform(0.3, 2.7, rows), 2)
+    band_gap = np.round(rng.normal(1.6, 0.15, rows), 3)
+    band_gap[rng.random(rows) < 0.2] = np.nan
+    return pd.DataFrame({
+        "A_1": rng.choice(_A_IONS, rows),
+        "A_2": np.where(a_mix, rng.choice(_A_IONS, rows), "0"),
+        "A_1_coef": np.where(a_mix, a_coef.astype(str), "1"),
+        "A_2_coef": np.where(a_mix, np.round(1 - a_coef, 2).astype(str), "0"),
+        "B_1": rng.choice(_B_IONS, rows),
+        "B_1_coef": "1",
+        "C_1": rng.choice(_C_IONS, rows),
+        "C_2": np.where(c_mix, rng.choice(_C_IONS, rows), "0"),
+        "C_1_coef": np.where(c_mix, c_coef.astype(str), "3"),
+        "C_2_coef": np.where(c_mix, np.round(3 - c_coef, 2).astype(str), "0"),
+        "Perovskite_dimension_3D": True,
+        "Perovskite_band_gap": band_gap,
+    })
+
+
+def _random_perovskite(rng: np.random.Generator) -> Dict[str, Any]:
+    a_ions = rng.choice(_A_IONS, 2, replace=False)
+    a_coef = float(np.round(rng.uniform(0.05, 0.95), 2))
+    c_ions = rng.choice(_C_IONS, 2, replace=False)
+    c_coef = float(np.round(rng.uniform(0.3, 2.7), 2))
+    return {"composition": {"A": {a_ions[0]: a_coef, a_ions[1]: 1 - a_coef},
+                            "B": {str(rng.choice(_B_IONS)): 1.0},
+                            "C": {c_ions[0]: c_coef, c_ions[1]: 3 - c_coef}}}
+
+
+def _predict_single(rng: np.random.Generator, config: LoadTestConfig) -> Request:
+    return "POST", "/api/v1/prediction/predict", {"perovskites": [_random_perovskite(rng)]}
+
+
+def _predict_batch(rng: np.random.Generator, config: LoadTestConfig) -> Request:
+    return "POST", "/api/v1/prediction/predict", {
+        "perovskites": [_random_perovskite(rng) for _ in range(config.batch_size)]}
+
+
+def _predict_dataset(rng: np.random.Generator, config: LoadTestConfig) -> Request:
+    offset = int(rng.integers(0, max(config.dataset_rows - config.export_limit, 1)))
+    return "GET", f"/api/v1/prediction/datasets/{DATASET_NAME}?offset={offset}&limit={config.export_limit}", None
+
+
+def _export(rng: np.random.Generator, config: LoadTestConfig) -> Request:
+    stream_format = str(rng.choice(["arrow", "parquet", "ndjson"]))
+    ion = str(rng.choice(_A_IONS + _B_IONS))
+    return "GET", f"/api/v1/data/datasets/{DATASET_NAME}?format={stream_format}&ion={ion}" \
+                  f"&limit={config.export_limit}", None
+
+
+SCENARIOS: Dict[str, Callable[[np.random.Generator, LoadTestConfig], Request]] = {
+    "predict_single": _predict_single,
+    "predict_batch": _predict_batch,
+    "predict_dataset": _predict_dataset,
+    "export": _export,
+}
+
+
+def _memory(pid: int) -> Dict[str, float]:
+    """Current and peak RSS of a process in MiB, from /proc (Linux)."""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values[key] = int(value.split()[0]) / 1024
+    return {"pid": pid, "rss_mb": round(values.get("VmRSS", 0.0), 1), "peak_rss_mb": round(values.get("VmHWM", 0.0), 1)}
+
+
+def _children(pid: int) -> List[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def _summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    count = len(latencies)
+    values = np.asarray(latencies) * 1000 if count else np.zeros(1)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+    }
+
+
+async def _drive(client: httpx.AsyncClient, config: LoadTestConfig) -> Dict[str, Any]:
+    names = list(config.mix)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios {sorted(unknown)}, available: {sorted(SCENARIOS)}")
+    weights = np.array([config.mix[name] for name in names], dtype=np.float64)
+    weights /= weights.sum()
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    budget = {"left": config.max_requests}
+
+    async def send(rng: np.random.Generator) -> Tuple[str, float, bool]:
+        name = names[rng.choice(len(names), p=weights)]
+        method, path, body = SCENARIOS[name](rng, config)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        return name, time.perf_counter() - started, ok
+
+    warmup_rng = np.random.default_rng(config.seed + 10_000)
+    for _ in range(config.warmup_requests):
+        await send(warmup_rng)
+
+    deadline = time.perf_counter() + config.duration
+
+    async def user(user_id: int):
+        rng = np.random.default_rng([config.seed, user_id])
+        while time.perf_counter() < deadline:
+            if budget["left"] is not None:
+                if budget["left"] <= 0:
+                    return
+                budget["left"] -= 1
+            name, latency, ok = await send(rng)
+            samples[name].append(latency)
+            errors[name] += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*[user(i) for i in range(config.concurrency)])
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total": _summarize([latency for values in samples.values() for latency in values],
+                            sum(errors.values()), elapsed),
+        "scenarios": {name: _summarize(samples[name], errors[name], elapsed) for name in names},
+    }
+
+
+async def _run_inprocess(config: LoadTestConfig, data_dir: str, feature_dir: str) -> Dict[str, Any]:
+    app = create_app()
+    data_service = DataService(LocalDataRepository(data_dir))
+    prediction_service = PredictionService(LocalModelRepository(config.models_dir), feature_dir)
+    app.dependency_overrides[get_data_service] = lambda: data_service
+    app.dependency_overrides[get_prediction_service] = lambda: prediction_service
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+        result = await _drive(client, config)
+    result["workers"] = [_memory(os.getpid())]
+    return result
+
+
+async def _wait_until_ready(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {process.returncode}")
+        try:
+            if (await client.get("/api/v1/data/datasets")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError("gunicorn did not become ready")
+
+
+async def _run_gunicorn(config: LoadTestConfig, data_dir: str, feature_dir: str) -> Dict[str, Any]:
+    # Workers import the package from wherever this process imported it.
+    python_path = os.pathsep.join(filter(None, [os.path.dirname(PACKAGE_DIR), os.environ.get("PYTHONPATH")]))
+    env = dict(os.environ, PYTHONPATH=python_path, PEROVSKITE_DATA_DIR=data_dir,
+               PEROVSKITE_FEATURE_DIR=feature_dir, PEROVSKITE_MODELS_DIR=os.path.abspath(config.models_dir))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "perovskite_prediction_api.api.app:create_app()", "--worker-class",
+         "uvicorn.workers.UvicornWorker", "--workers", str(config.workers), "--bind", f"127.0.0.1:{config.port}"],
+        env=env,
+    )
+    try:
+        limits = httpx.Limits(max_connections=config.concurrency, max_keepalive_connections=config.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{config.port}", limits=limits,
+                                     timeout=60) as client:
+            await _wait_until_ready(client, process)
+            result = await _drive(client, config)
+        result["workers"] = [_memory(pid) for pid in _children(process.pid)]
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return result
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PACKAGE_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(config: LoadTestConfig, work_dir: str | None = None) -> Dict[str, Any]:
+    """
+    Start the app, drive the configured request mix and return the report.
+    Args:
+        config (LoadTestConfig): Mode, concurrency, duration and request mix.
+        work_dir (str | None): Where the synthetic dataset is written; a temporary directory by default.
+    Returns:
+        Dict[str, Any]: JSON-serializable report.
+    """
+    if config.mode not in ("inprocess", "gunicorn"):
+        raise ValueError(f"Unknown mode '{config.mode}'")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = os.path.join(work_dir or tmp_dir, "data")
+        feature_dir = os.path.join(data_dir, "features")
+        dataset = make_dataset(config.dataset_rows, config.seed)
+        LocalDataRepository(data_dir).save_dataset(DATASET_NAME, dataset)
+        PredictionService(LocalModelRepository(config.models_dir), feature_dir).write_feature_matrix(
+            DATASET_NAME, [dataset])
+        runner = _run_inprocess if config.mode == "inprocess" else _run_gunicorn
+        result = asyncio.run(runner(config, data_dir, feature_dir))
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "config": asdict(config),
+        **result,
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """Relative change (current / baseline - 1) of throughput and latency per scenario and in total."""
+    metrics = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate"]
+    sections = {"total": (baseline["total"], current["total"])}
+    sections.update({name: (baseline["scenarios"][name], stats) for name, stats in current["scenarios"].items()
+                     if name in baseline["scenarios"]})
+    changes = {}
+    for name, (before, after) in sections.items():
+        changes[name] = {metric: round(after[metric] / before[metric] - 1, 4) if before[metric] else None
+                         for metric in metrics}
+    return changes
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv: List[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = LoadTestConfig()
+    parser.add_argument("--mode", choices=["inprocess", "gunicorn"], default=defaults.mode)
+    parser.add_argument("--workers", type=int, default=defaults.workers)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency)
+    parser.add_argument("--duration", type=float, default=defaults.duration)
+    parser.add_argument("--max-requests", type=int, default=None)
+    parser.add_argument("--warmup-requests", type=int, default=defaults.warmup_requests)
+    parser.add_argument("--mix", type=_parse_mix, default=defaults.mix)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--export-limit", type=int, default=defaults.export_limit)
+    parser.add_argument("--dataset-rows", type=int, default=defaults.dataset_rows)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--port", type=int, default=defaults.port)
+    parser.add_argument("--models-dir", default=defaults.models_dir)
+    parser.add_argument("--report", default="load_test.json")
+    parser.add_argument("--compare", default=None, help="Baseline report to compare against")
+    args = vars(parser.parse_args(argv))
+    report_path, baseline_path = args.pop("report"), args.pop("compare")
+
+    report = run_load_test(LoadTestConfig(**args))
+    if baseline_path:
+        with open(baseline_path) as f:
+            report["comparison"] = {"baseline": baseline_path, "changes": compare_reports(json.load(f), report)}
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    json.dump({key: report[key] for key in ("total", "scenarios", "workers")}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Hashable
+
+import pandas as pd
+
+from perovskite_prediction_api.common.storage import FileStorage
+
+
+class _Flight:
+    """One in-flight fetch and the number of callers currently waiting on it."""
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+
+class AsyncFileStorage:
+    """
+    Async facade over a blocking FileStorage.
+
+    Blocking calls run on a bounded thread pool, so the event loop never stalls on Drive I/O.
+    Concurrent reads of the same path are coalesced into one in-flight call whose result (or error)
+    is shared by every waiter. A waiter that times out or is cancelled only stops waiting; the shared
+    call is cancelled once nobody waits for it anymore (effective if it has not started yet).
+    """
+
+    def __init__(self, storage: FileStorage, max_workers: int = 8, timeout: float | None = None):
+        """
+        Args:
+            storage (FileStorage): Blocking storage to wrap.
+            max_workers (int): Upper bound on concurrent blocking calls.
+            timeout (float | None): Default per-call timeout in seconds.
+        """
+        self._storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+        self._timeout = timeout
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    @property
+    def storage(self) -> FileStorage:
+        return self._storage
+
+    async def download_file(self, filepath: str, timeout: float | None = None) -> bytes:
+        return await self._single_flight(("download_file", filepath), self._storage.download_file, filepath,
+                                         timeout=timeout)
+
+    async def download_dataframe(self, filepath: str, timeout: float | None = None) -> pd.DataFrame:
+        """Coalesced like `download_file`, but every waiter gets its own copy of the frame."""
+        dataframe = await self._single_flight(("download_dataframe", filepath), self._storage.download_dataframe,
+                                              filepath, timeout=timeout)
+        return dataframe.copy()
+
+    async def verify_existence(self, filepath: str, timeout: float | None = None) -> bool:
+        return await self._single_flight(("verify_existence", filepath), self._storage.verify_existence, filepath,
+                                         timeout=timeout)
+
+    async def upload_file(self, filepath: str, timeout: float | None = None) -> bytes:
+        return await self._run(self._storage.upload_file, filepath, timeout=timeout)
+
+    async def upload_dataframe(self, dataframe: pd.DataFrame, filepath: str, file_format: str,
+                               timeout: float | None = None):
+        return await self._run(self._storage.upload_dataframe, dataframe, filepath, file_format, timeout=timeout)
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self) -> "AsyncFileStorage":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    async def _run(self, function: Callable, *args, timeout: float | None = None) -> Any:
+        future = asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+        return await asyncio.wait_for(future, self._effective_timeout(timeout))
+
+    async def _single_flight(self, key: Hashable, function: Callable, *args, timeout: float | None = None) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+            flight = _Flight(future)
+            self._flights[key] = flight
+            future.add_done_callback(partial(self._land, key, flight))
+        flight.waiters += 1
+        try:
+            # shield: a waiter giving up must not cancel the fetch the other waiters share.
+            return await asyncio.wait_for(asyncio.shield(flight.future), self._effective_timeout(timeout))
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.future.done():
+                flight.future.cancel()
+
+    def _land(self, key: Hashable, flight: _Flight, future: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not future.cancelled():
+            # Mark the exception as retrieved when every waiter already left.
+            future.exception()
+
+    def _effective_timeout(self, timeout: float | None) -> float | None:
+        return timeout if timeout is not None else self._timeout
@@ -0,0 +1,67 @@
+import threading
+from functools import lru_cache
+
+import httplib2
+import httpx
+
+
+class PooledHttp:
+    """
+    httplib2.Http compatible transport on top of a pooled httpx.Client.
+
+    googleapiclient and google-auth-httplib2 only call `request` and read a few attributes, so this can
+    be passed as `http=` anywhere an httplib2.Http is expected. Unlike httplib2.Http it keeps connections
+    alive per host and is safe to share between threads.
+    """
+
+    def __init__(self, max_connections: int = 32, retries: int = 3, timeout: float | None = 60):
+        self.timeout = timeout
+        self.follow_redirects = True
+        self.redirect_codes = frozenset((300, 301, 302, 303, 307, 308))
+        self.connections = {}
+        self._max_connections = max_connections
+        self._retries = retries
+        self._lock = threading.Lock()
+        self._client = self._new_client()
+
+    def _new_client(self, cert=None) -> httpx.Client:
+        return httpx.Client(
+            limits=httpx.Limits(max_connections=self._max_connections,
+                                max_keepalive_connections=self._max_connections),
+            transport=httpx.HTTPTransport(retries=self._retries, cert=cert),
+        )
+
+    def request(self, uri, method="GET", body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None, **kwargs):
+        """Implementation of httplib2's Http.request: returns (httplib2.Response, bytes)."""
+        response = self._client.request(
+            method,
+            uri,
+            content=body,
+            headers=headers,
+            timeout=self.timeout,
+            follow_redirects=self.follow_redirects and redirections > 0,
+        )
+        info = {key.lower(): value for key, value in response.headers.items()}
+        # httpx already decoded the body, mirror httplib2 which renames the header once it decodes.
+        if "content-encoding" in info:
+            info["-content-encoding"] = info.pop("content-encoding")
+            info.pop("content-length", None)
+        info["status"] = str(response.status_code)
+        result = httplib2.Response(info)
+        result.reason = response.reason_phrase
+        return result, response.content
+
+    def add_certificate(self, key, cert, domain, password=None):
+        with self._lock:
+            previous, self._client = self._client, self._new_client(cert=(cert, key, password))
+        previous.close()
+
+    def close(self):
+        self._client.close()
+
+
+@lru_cache
+def shared_http() -> PooledHttp:
+    """Process wide transport, so every storage client reuses the same connection pool."""
+    return PooledHttp()
@@ -0,0 +1,23 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def data_directory() -> str:
+    """Local directory holding prepared datasets and the artifacts derived from them."""
+    return os.environ.get("PEROVSKITE_DATA_DIR", "data")
+
+
+def similarity_index_path() -> str:
+    return os.environ.get("SIMILARITY_INDEX_PATH", os.path.join(data_directory(), "similarity_index"))
+
+
+def models_directory() -> str:
+    return os.environ.get("PEROVSKITE_MODELS_DIR", "saved_models")
+
+
+def feature_matrix_directory() -> str:
+    """Where `<dataset>.fmx` feature matrices for the prediction service are kept."""
+    return os.environ.get("PEROVSKITE_FEATURE_DIR", os.path.join(data_directory(), "features"))
@@ -2,9 +2,31 @@ import io
 import os
 import pandas as pd
 from abc import abstractmethod, ABC
-from google.oauth2.service_account import Credentials
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, List, Sequence
+from google.auth.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload, MediaIoBaseUpload
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest, HttpRequest, MediaIoBaseDownload, MediaFileUpload, \
+    MediaIoBaseUpload
+
+from perovskite_prediction_api.common.http import PooledHttp, shared_http
+
+DRIVE_ROOT_URL = "https://www.googleapis.com/"
+# Drive rejects batches with more than 100 calls.
+DRIVE_BATCH_LIMIT = 100
+_STAT_FIELDS = "files(id, name, size, mimeType, modifiedTime, md5Checksum)"
+
+
+@dataclass(frozen=True)
+class FileStat:
+    file_id: str
+    name: str
+    size: int | None
+    mime_type: str | None
+    modified_time: str | None
+    md5_checksum: str | None
 
 
 class FileStorage(ABC):
@@ -12,6 +34,10 @@ class FileStorage(ABC):
     def download_file(self, filepath: str) -> bytes:
         pass
 
+    def download_to(self, filepath: str, fh: BinaryIO):
+        """Write the file into an open binary file object; storages that can stream override this."""
+        fh.write(self.download_file(filepath))
+
     @abstractmethod
     def upload_file(self, filepath: str) -> bytes:
         pass
@@ -20,6 +46,9 @@ class FileStorage(ABC):
     def verify_existence(self, filepath: str) -> bool:
         pass
 
+    def verify_existence_many(self, filepaths: Sequence[str]) -> Dict[str, bool]:
+        return {filepath: self.verify_existence(filepath) for filepath in filepaths}
+
     @abstractmethod
     def download_dataframe(self, filepath: str) -> pd.DataFrame:
         pass
@@ -31,23 +60,42 @@ class FileStorage(ABC):
 
 class GoogleDriveStorage(FileStorage):
     def __init__(self,
-                 credentials: Credentials, ):
+                 credentials: Credentials,
+                 http: PooledHttp | None = None,
+                 root_url: str = DRIVE_ROOT_URL):
+        """
+        Args:
+            credentials (Credentials): Drive credentials.
+            http (PooledHttp | None): Transport; defaults to the process wide pool so connections are reused
+                across storages and threads.
+            root_url (str): API root, overridable to point the client at a local fake server.
+        """
         self._credentials = credentials
-        self._service = build('drive', 'v3', credentials=self._credentials)
+        root_url = root_url.rstrip('/') + '/'
+        self._batch_uri = root_url + 'batch/drive/v3'
+        self._service = build(
+            'drive', 'v3',
+            http=AuthorizedHttp(credentials, http=http or shared_http()),
+            client_options={'api_endpoint': root_url + 'drive/v3/'} if root_url != DRIVE_ROOT_URL else None,
+            cache_discovery=False,
+        )
 
     def download_file(self, filepath: str) -> bytes:
+        fh = io.BytesIO()
+        self.download_to(filepath, fh)
+        return fh.getvalue()
+
+    def download_to(self, filepath: str, fh: BinaryIO):
+        """Stream the file into `fh` chunk by chunk (MediaIoBaseDownload default chunk size)."""
         file_id = self._get_file_id_by_path(filepath)
         if not file_id:
             raise FileNotFoundError(f"File '{filepath}' not found on Google Drive.")
 
         request = self._service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
         downloader = MediaIoBaseDownload(fh, request)
         done = False
         while not done:
             status, done = downloader.next_chunk()
-        fh.seek(0)
-        return fh.read()
 
     def upload_file(self, filepath: str) -> bytes:
         filename = os.path.basename(filepath)
@@ -65,6 +113,29 @@ class GoogleDriveStorage(FileStorage):
         file_id = self._get_file_id_by_path(filepath)
         return file_id is not None
 
+    def verify_existence_many(self, filepaths: Sequence[str]) -> Dict[str, bool]:
+        """Existence of every path, resolved with batched Drive calls (100 lookups per round trip)."""
+        return {filepath: file_id is not None for filepath, file_id in self._get_file_ids_by_path(filepaths).items()}
+
+    def stat_many(self, filepaths: Sequence[str]) -> Dict[str, FileStat | None]:
+        """Metadata of every path (None if missing), resolved with batched Drive calls."""
+        return {filepath: self._to_stat(files[0]) if files else None
+                for filepath, files in self._list_by_path(filepaths, _STAT_FIELDS).items()}
+
+    def delete_many(self, filepaths: Sequence[str]) -> Dict[str, bool]:
+        """
+        Delete every path with batched Drive calls.
+        Returns:
+            Dict[str, bool]: False for paths that did not exist.
+        """
+        file_ids = self._get_file_ids_by_path(filepaths)
+        existing = [filepath for filepath in filepaths if file_ids[filepath] is not None]
+        responses = self._execute_batch(
+            [(filepath, self._service.files().delete(fileId=file_ids[filepath])) for filepath in existing],
+            ignore=lambda error: error.resp.status == 404,
+        )
+        return {filepath: filepath in responses for filepath in filepaths}
+
     def download_dataframe(self, filepath: str) -> pd.DataFrame:
         file_bytes = self.download_file(filepath)
         ext = os.path.splitext(filepath)[1].lstrip('.').lower()
@@ -124,3 +195,54 @@ class GoogleDriveStorage(FileStorage):
         if len(files) == 0:
             return None
         return files[0].get('id')
+
+    def _get_file_ids_by_path(self, filepaths: Sequence[str]) -> Dict[str, str | None]:
+        return {filepath: files[0].get('id') if files else None
+                for filepath, files in self._list_by_path(filepaths, 'files(id, name)').items()}
+
+    def _list_by_path(self, filepaths: Sequence[str], fields: str) -> Dict[str, List[dict]]:
+        requests = []
+        for filepath in dict.fromkeys(filepaths):
+            filename = os.path.basename(filepath)
+            requests.append((filepath, self._service.files().list(q=f'name="{filename}"', spaces='drive',
+                                                                  fields=fields)))
+        responses = self._execute_batch(requests)
+        return {filepath: responses[filepath].get('files', []) for filepath in filepaths}
+
+    def _execute_batch(self, requests: List[tuple[str, HttpRequest]],
+                       ignore: Callable[[HttpError], bool] = lambda error: False) -> Dict[str, dict]:
+        """
+        Send (key, request) pairs through the Drive batch endpoint.
+        Returns:
+            Dict[str, dict]: Response per key; keys whose error matched `ignore` are left out.
+        """
+        responses = {}
+        errors = []
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                responses[keys[int(request_id)]] = response or {}
+            elif not ignore(exception):
+                errors.append(exception)
+
+        for start in range(0, len(requests), DRIVE_BATCH_LIMIT):
+            chunk = requests[start:start + DRIVE_BATCH_LIMIT]
+            keys = [key for key, _ in chunk]
+            batch = BatchHttpRequest(callback=callback, batch_uri=self._batch_uri)
+            for i, (_, request) in enumerate(chunk):
+                batch.add(request, request_id=str(i))
+            batch.execute()
+            if errors:
+                raise errors[0]
+        return responses
+
+    @staticmethod
+    def _to_stat(file: dict) -> FileStat:
+        return FileStat(
+            file_id=file['id'],
+            name=file.get('name'),
+            size=int(file['size']) if 'size' in file else None,
+            mime_type=file.get('mimeType'),
+            modified_time=file.get('modifiedTime'),
+            md5_checksum=file.get('md5Checksum'),
+        )
@@ -1,7 +1,15 @@
 import enum
+import functools
 
 
-@enum.unique
+@functools.cache
+def _members_by_key(enum_cls) -> dict:
+    """Name (value[0]) to member lookup of an enum, built once per class."""
+    return {member.value[0]: member for member in enum_cls}
+
+
+# Not decorated with @enum.unique: `name` is overridden to the ion symbol, which would make
+# every member whose symbol differs from its attribute name look like an alias.
 class Elements(enum.Enum):
     def __new__(cls, *value: tuple):
         obj = object.__new__(cls)
@@ -63,10 +71,10 @@ class Elements(enum.Enum):
         Raises:
             ValueError: If no element with the given name is found.
         """
-        for element in cls:
-            if element.name == name:
-                return element
-        raise ValueError(f"No element found with name '{name}'")
+        element = _members_by_key(cls).get(name)
+        if element is None:
+            raise ValueError(f"No element found with name '{name}'")
+        return element
 
     # A-Site Ions
     MA = ("MA", 2.17, 2.5, 1, 32.06, False, 1)
@@ -139,10 +147,10 @@ class Layers(enum.Enum):
 
     @classmethod
     def get_code_by_name(cls, name):
-        for member in cls:
-            if member.value[0] == name:
-                return member.value[1]
-        raise KeyError(f"Layer name '{name}' not found")
+        member = _members_by_key(cls).get(name)
+        if member is None:
+            raise KeyError(f"Layer name '{name}' not found")
+        return member.value[1]
 
     SLG = "SLG", 1
     FTO = "FTO", 2
@@ -168,10 +176,10 @@ class BaseStructureDictionary(enum.Enum):
         Get the code (value[1]) by spacegroup name (value[0]).
         Raises KeyError if name not found.
         """
-        for member in cls:
-            if member.value[0] == name:
-                return member.value[1]
-        raise KeyError(f"Name '{name}' not found")
+        member = _members_by_key(cls).get(name)
+        if member is None:
+            raise KeyError(f"Name '{name}' not found")
+        return member.value[1]
 
 
 @enum.unique
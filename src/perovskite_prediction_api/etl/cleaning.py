@@ -0,0 +1,232 @@
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from perovskite_prediction_api.common.storage import FileStorage
+from perovskite_prediction_api.entities.dictioanary import Site
+from perovskite_prediction_api.etl.dataset_profile import DatasetProfile
+from perovskite_prediction_api.etl.fingerprint import FINGERPRINT_COLUMN, FingerprintSet, compute_fingerprints, \
+    deduplicate
+
+EMPTY_SLOT = "0"
+_BOOL_VALUES = {"True": True, "False": False, "TRUE": True, "FALSE": False, "true": True, "false": False}
+
+
+@dataclass(frozen=True)
+class CleaningConfig:
+    """Rules of data_preparation.ipynb, applied per chunk."""
+    nan_threshold: int = 49000
+    multi_nan_threshold: int = 49000
+    drop_prefixes: Sequence[str] = ("Ref",)
+    drop_columns: Sequence[str] = ("Unnamed: 0", "Outdoor_time_start", "Outdoor_time_end")
+    chunk_size: int = 5000
+    fingerprint_measurements: Sequence[str] = ("Perovskite_band_gap",)
+
+
+@dataclass
+class ColumnPlan:
+    """Outcome of the first pass: which columns survive, their types and the ion slot widths."""
+    profile: DatasetProfile
+    keep_columns: List[str]
+    dropped_columns: List[str]
+    numeric_columns: List[str]
+    bool_columns: List[str]
+    slot_counts: Dict[str, int]
+    fingerprint_measurements: List[str] = field(default_factory=list)
+
+    def output_schema(self) -> pa.Schema:
+        fields = []
+        for column in self.keep_columns:
+            if column in self.numeric_columns:
+                fields.append(pa.field(column, pa.float64()))
+            elif column in self.bool_columns:
+                fields.append(pa.field(column, pa.bool_()))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        for site in (Site.A.value, Site.B.value, Site.C.value):
+            fields += [pa.field(f"{site}_{i + 1}", pa.string()) for i in range(self.slot_counts.get(site, 0))]
+            fields += [pa.field(f"{site}_{i + 1}_coef", pa.string()) for i in range(self.slot_counts.get(site, 0))]
+        fields.append(pa.field(FINGERPRINT_COLUMN, pa.uint64()))
+        return pa.schema(fields)
+
+
+def _composition_column(site: str, coefficient: bool = False) -> str:
+    column = f"Perovskite_composition_{site.lower()}_ions"
+    return column + "_coefficients" if coefficient else column
+
+
+def _read_chunks(paths: Sequence[str], columns: List[str], chunk_size: int,
+                 usecols: List[str] | None = None) -> Iterator[pd.DataFrame]:
+    """Read every file in string chunks, aligned to `columns` (absent columns are all-NaN)."""
+    for path in paths:
+        header = pd.read_csv(path, nrows=0).columns
+        file_columns = [column for column in (usecols or columns) if column in header]
+        for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str, usecols=file_columns):
+            yield chunk.reindex(columns=columns).astype("string")
+
+
+def plan_columns(paths: Sequence[str], config: CleaningConfig = CleaningConfig()) -> ColumnPlan:
+    """
+    First pass: per-column NaN / "nan; nan" counts, value types and ion slot widths, chunk by chunk.
+    Args:
+        paths (Sequence[str]): Raw CSV files, treated as one concatenated dataset.
+        config (CleaningConfig): Drop rules.
+    Returns:
+        ColumnPlan: Columns to keep and how to type them.
+    """
+    columns: List[str] = []
+    for path in paths:
+        columns += [column for column in pd.read_csv(path, nrows=0).columns if column not in columns]
+
+    profile = DatasetProfile(value_count_columns=[])
+    non_numeric = set()
+    non_bool = set()
+    slot_counts = {site.value: 0 for site in Site}
+    for chunk in _read_chunks(paths, columns, config.chunk_size):
+        profile.update(chunk)
+        for column in columns:
+            values = chunk[column].dropna()
+            if values.empty:
+                continue
+            if column not in non_numeric and pd.to_numeric(values, errors="coerce").isna().any():
+                non_numeric.add(column)
+            if column not in non_bool and not values.isin(_BOOL_VALUES.keys()).all():
+                non_bool.add(column)
+        for site in slot_counts:
+            for coefficient in (False, True):
+                column = _composition_column(site, coefficient)
+                if column in chunk:
+                    items = _split_items(chunk[column])
+                    slot_counts[site] = max(slot_counts[site], int((items != "").sum(axis=1).max(initial=0)))
+
+    dropped = set(config.drop_columns)
+    dropped |= {column for column in columns if column.startswith(tuple(config.drop_prefixes))}
+    dropped |= set(profile.columns_over_null_threshold(config.nan_threshold))
+    dropped |= set(profile.columns_over_multi_nan_threshold(config.multi_nan_threshold))
+    keep = [column for column in columns if column not in dropped]
+    all_null = {column for column in columns if profile.null_counts.get(column, 0) == profile.row_count}
+    return ColumnPlan(
+        profile=profile,
+        keep_columns=keep,
+        dropped_columns=[column for column in columns if column in dropped],
+        numeric_columns=[column for column in keep if column not in non_numeric and column not in all_null],
+        bool_columns=[column for column in keep if column not in non_bool and column in non_numeric],
+        slot_counts=slot_counts,
+        fingerprint_measurements=[column for column in config.fingerprint_measurements if column in keep],
+    )
+
+
+def decompose_ions(chunk: pd.DataFrame, site: str, slots: int, coefficient: bool = False) -> Dict[str, pd.Series]:
+    """
+    Vectorized version of the notebook's `decompose_ions`: split a "; " separated composition column
+    into `<site>_<n>` (or `<site>_<n>_coef`) slot columns, EMPTY_SLOT where a row has fewer ions.
+    Empty items ("MA; ; FA") are dropped before slots are assigned, as in the notebook.
+    """
+    source = _composition_column(site, coefficient)
+    suffix = "_coef" if coefficient else ""
+    names = [f"{site}_{i + 1}{suffix}" for i in range(slots)]
+    if source not in chunk or slots == 0:
+        return {name: pd.Series(EMPTY_SLOT, index=chunk.index, dtype=object) for name in names}
+    items = _split_items(chunk[source])
+    items = np.take_along_axis(items, np.argsort(items == "", axis=1, kind="stable"), axis=1)
+    return {name: pd.Series(np.where(items[:, i] != "", items[:, i], EMPTY_SLOT) if i < items.shape[1]
+                            else EMPTY_SLOT, index=chunk.index, dtype=object)
+            for i, name in enumerate(names)}
+
+
+def _split_items(values: pd.Series) -> np.ndarray:
+    """(rows, items) array of stripped "; " separated items, "" for empty items and padding."""
+    parts = values.astype("string").str.split(";", expand=True)
+    if isinstance(parts, pd.Series) or parts.shape[1] == 0:
+        return np.full((len(values), 0), "", dtype=object)
+    stripped = parts.apply(lambda column: column.str.strip())
+    return stripped.fillna("").to_numpy(dtype=object)
+
+
+def clean_chunk(chunk: pd.DataFrame, plan: ColumnPlan) -> pa.Table:
+    """Apply decomposition and typing to one raw chunk, producing a table in `plan.output_schema()`."""
+    columns: Dict[str, pd.Series] = {}
+    for column in plan.keep_columns:
+        values = chunk[column]
+        if column in plan.numeric_columns:
+            values = pd.to_numeric(values, errors="coerce")
+        elif column in plan.bool_columns:
+            values = values.map(_BOOL_VALUES).astype("boolean")
+        columns[column] = values
+    for site in (Site.A.value, Site.B.value, Site.C.value):
+        columns.update(decompose_ions(chunk, site, plan.slot_counts.get(site, 0)))
+        columns.update(decompose_ions(chunk, site, plan.slot_counts.get(site, 0), coefficient=True))
+    frame = pd.DataFrame(columns)
+    frame[FINGERPRINT_COLUMN] = compute_fingerprints(frame, plan.fingerprint_measurements)
+    return pa.Table.from_pandas(frame, schema=plan.output_schema(), preserve_index=False)
+
+
+def _deduplicate_table(table: pa.Table, fingerprint_set: FingerprintSet) -> pa.Table:
+    fingerprints = pd.DataFrame({FINGERPRINT_COLUMN: table[FINGERPRINT_COLUMN].to_numpy()})
+    return table.take(pa.array(deduplicate(fingerprints, seen=fingerprint_set).index.to_numpy()))
+
+
+def clean_csv_to_parquet(paths: Sequence[str],
+                         output_path: str,
+                         config: CleaningConfig = CleaningConfig(),
+                         fingerprint_set: FingerprintSet | None = None) -> ColumnPlan:
+    """
+    Two-pass out-of-core cleaning of the raw Perovskite database CSVs into one Parquet file.
+    Peak memory is bounded by `config.chunk_size`, not by the size or width of the inputs.
+    Args:
+        paths (Sequence[str]): Raw CSV files (data1.csv, data2.csv, ...).
+        output_path (str): Parquet file to write.
+        config (CleaningConfig): Drop rules and chunk size.
+        fingerprint_set (FingerprintSet | None): When given, rows already in the set (or repeated within
+            the inputs) are dropped and the new fingerprints are added to it.
+    Returns:
+        ColumnPlan: The plan used, including the raw data profile from the first pass.
+    """
+    plan = plan_columns(paths, config)
+    composition_columns = [_composition_column(site.value, coefficient)
+                           for site in Site for coefficient in (False, True)]
+    needed = plan.keep_columns + [column for column in composition_columns if column not in plan.keep_columns]
+    writer = pq.ParquetWriter(output_path, plan.output_schema())
+    try:
+        for chunk in _read_chunks(paths, needed, config.chunk_size):
+            table = clean_chunk(chunk, plan)
+            if fingerprint_set is not None:
+                table = _deduplicate_table(table, fingerprint_set)
+            writer.write_table(table)
+    finally:
+        writer.close()
+    return plan
+
+
+def clean_storage_csv_to_parquet(storage: FileStorage,
+                                 filepaths: Sequence[str],
+                                 output_path: str,
+                                 config: CleaningConfig = CleaningConfig(),
+                                 fingerprint_set: FingerprintSet | None = None) -> ColumnPlan:
+    """
+    Same as `clean_csv_to_parquet` for files on a FileStorage (e.g. perovskite/raw/data1.csv).
+    Files are streamed to a temporary directory (`FileStorage.download_to`), so neither the download
+    nor the cleaning holds a whole file in memory.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        local_paths = []
+        for filepath in filepaths:
+            local_path = os.path.join(tmp_dir, os.path.basename(filepath))
+            with open(local_path, "wb") as f:
+                storage.download_to(filepath, f)
+            local_paths.append(local_path)
+        return clean_csv_to_parquet(local_paths, output_path, config, fingerprint_set)
+
+
+def read_in_chunks(parquet_path: str, columns: List[str] | None = None,
+                   batch_size: int = 65536) -> Iterator[pd.DataFrame]:
+    """Iterate a cleaned Parquet file as DataFrame chunks."""
+    for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
@@ -0,0 +1,155 @@
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from perovskite_prediction_api.entities.dictioanary import Site
+from perovskite_prediction_api.features.composition_features import EMPTY_SLOT_VALUES
+
+STACK_SEQUENCE_COLUMNS = ["ETL_stack_sequence", "HTL_stack_sequence", "Backcontact_stack_sequence"]
+MULTI_NAN_VALUE = "nan; nan"
+
+_SLOT_COLUMN = re.compile(r"^([ABC])_\d+$")
+
+
+class DatasetProfile:
+    """
+    Column aggregates the notebooks used to recompute with full scans: NaN counts per column,
+    "nan; nan" counts, ion counts per site, stack sequence value counts and a block-wise NaN heatmap.
+
+    All aggregates are additive, so `update` can be fed the dataset batch by batch (or only the
+    rows appended since the last update) and the result equals a profile of the full dataset.
+    """
+
+    def __init__(self, heatmap_block_size: int = 1024, value_count_columns: List[str] | None = None):
+        self.heatmap_block_size = heatmap_block_size
+        self.value_count_columns = value_count_columns or list(STACK_SEQUENCE_COLUMNS)
+        self.row_count = 0
+        self.dtypes: Dict[str, str] = {}
+        self.null_counts: Dict[str, int] = {}
+        self.multi_nan_counts: Dict[str, int] = {}
+        self.ion_counts: Dict[str, Counter] = {site.value: Counter() for site in Site}
+        self.value_counts: Dict[str, Counter] = {column: Counter() for column in self.value_count_columns}
+        self.null_heatmap: Dict[str, List[int]] = {}
+
+    def update(self, data: pa.Table | pa.RecordBatch | pd.DataFrame) -> "DatasetProfile":
+        """
+        Add rows to the profile in one columnar pass.
+        Args:
+            data (pa.Table | pa.RecordBatch | pd.DataFrame): New rows.
+        Returns:
+            DatasetProfile: self.
+        """
+        if isinstance(data, pd.DataFrame):
+            data = pa.Table.from_pandas(data, preserve_index=False)
+        num_rows = data.num_rows
+        if num_rows == 0:
+            return self
+        block_index = (self.row_count + np.arange(num_rows)) // self.heatmap_block_size
+        num_blocks = int(block_index[-1]) + 1
+
+        site_values: Dict[str, List[pa.Array]] = {site.value: [] for site in Site}
+        for name in data.column_names:
+            column = data[name] if isinstance(data, pa.Table) else data.column(name)
+            self.dtypes.setdefault(name, str(column.type))
+
+            is_null = pc.is_null(column, nan_is_null=True)
+            null_mask = np.asarray(is_null.to_numpy(zero_copy_only=False), dtype=bool)
+            self.null_counts[name] = self.null_counts.get(name, 0) + int(null_mask.sum())
+            heatmap = self.null_heatmap.setdefault(name, [])
+            blocks = np.bincount(block_index, weights=null_mask, minlength=num_blocks).astype(int)
+            heatmap.extend([0] * (num_blocks - len(heatmap)))
+            for block in np.flatnonzero(blocks):
+                heatmap[block] += int(blocks[block])
+
+            if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+                multi_nan = pc.sum(pc.equal(column, MULTI_NAN_VALUE)).as_py() or 0
+                self.multi_nan_counts[name] = self.multi_nan_counts.get(name, 0) + multi_nan
+
+            slot = _SLOT_COLUMN.match(name)
+            if slot:
+                site_values[slot.group(1)].append(pc.cast(_combine(column), pa.string()))
+            if name in self.value_counts:
+                self._count_values(self.value_counts[name], _combine(column))
+
+        for site, arrays in site_values.items():
+            if arrays:
+                values = pa.concat_arrays(arrays)
+                self._count_values(self.ion_counts[site], values, skip=EMPTY_SLOT_VALUES)
+        self.row_count += num_rows
+        return self
+
+    def update_batches(self, batches: Iterable[pa.RecordBatch | pd.DataFrame]) -> "DatasetProfile":
+        for batch in batches:
+            self.update(batch)
+        return self
+
+    def columns_over_null_threshold(self, threshold: int) -> List[str]:
+        """Columns with more than `threshold` NaN values, like the notebook drop rules (49000, 6000)."""
+        return [name for name, count in self.null_counts.items() if count > threshold]
+
+    def columns_over_multi_nan_threshold(self, threshold: int) -> List[str]:
+        return [name for name, count in self.multi_nan_counts.items() if count > threshold]
+
+    def null_heatmap_frame(self) -> pd.DataFrame:
+        """NaN fraction per row block (index) and column, ready for a heatmap plot."""
+        counts = pd.DataFrame({name: pd.Series(blocks, dtype=float) for name, blocks in self.null_heatmap.items()})
+        counts = counts.fillna(0.0)
+        block_rows = np.full(len(counts), self.heatmap_block_size, dtype=float)
+        if len(block_rows):
+            block_rows[-1] = self.row_count - self.heatmap_block_size * (len(block_rows) - 1)
+        return counts.div(block_rows, axis=0)
+
+    def to_dict(self) -> Dict:
+        return {
+            "heatmap_block_size": self.heatmap_block_size,
+            "value_count_columns": self.value_count_columns,
+            "row_count": self.row_count,
+            "dtypes": self.dtypes,
+            "null_counts": self.null_counts,
+            "multi_nan_counts": self.multi_nan_counts,
+            "ion_counts": {site: dict(counts.most_common()) for site, counts in self.ion_counts.items()},
+            "value_counts": {column: dict(counts.most_common()) for column, counts in self.value_counts.items()},
+            "null_heatmap": self.null_heatmap,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DatasetProfile":
+        profile = cls(data["heatmap_block_size"], data["value_count_columns"])
+        profile.row_count = data["row_count"]
+        profile.dtypes = data["dtypes"]
+        profile.null_counts = data["null_counts"]
+        profile.multi_nan_counts = data["multi_nan_counts"]
+        profile.ion_counts = {site: Counter(counts) for site, counts in data["ion_counts"].items()}
+        profile.value_counts = {column: Counter(counts) for column, counts in data["value_counts"].items()}
+        profile.null_heatmap = data["null_heatmap"]
+        return profile
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DatasetProfile":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    @staticmethod
+    def _count_values(counter: Counter, values: pa.Array, skip: set | None = None):
+        for item in pc.value_counts(values).to_pylist():
+            value = item["values"]
+            if value is None or (skip and str(value).strip() in skip):
+                continue
+            counter[str(value).strip()] += item["counts"]
+
+
+def _combine(column: pa.Array | pa.ChunkedArray) -> pa.Array:
+    return column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
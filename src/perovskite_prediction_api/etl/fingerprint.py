@@ -0,0 +1,166 @@
+import os
+import re
+from typing import Iterable, Iterator, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.entities.dictioanary import Site
+from perovskite_prediction_api.features.composition_features import EMPTY_SLOT_VALUES, SITE_TOTALS, \
+    normalize_slot_names
+
+FINGERPRINT_COLUMN = "composition_fingerprint"
+
+# Quantization of normalized coefficients and measurements before hashing.
+COEFFICIENT_DECIMALS = 4
+MEASUREMENT_DECIMALS = 4
+
+_SITE_SALTS = {Site.A.value: np.uint64(0x9E3779B97F4A7C15), Site.B.value: np.uint64(0xC2B2AE3D27D4EB4F),
+               Site.C.value: np.uint64(0x165667B19E3779F9)}
+_MEASUREMENT_SALT = np.uint64(0x27D4EB2F165667C5)
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer over a uint64 array."""
+    with np.errstate(over="ignore"):
+        values = values.astype(np.uint64, copy=True)
+        values ^= values >> np.uint64(30)
+        values *= np.uint64(0xBF58476D1CE4E5B9)
+        values ^= values >> np.uint64(27)
+        values *= np.uint64(0x94D049BB133111EB)
+        values ^= values >> np.uint64(31)
+    return values
+
+
+def _quantize(values: np.ndarray, decimals: int) -> np.ndarray:
+    quantized = np.round(np.nan_to_num(values, nan=-1.0) * 10 ** decimals).astype(np.int64)
+    return quantized.view(np.uint64)
+
+
+def _slot_columns(df: pd.DataFrame, site: str) -> list:
+    pattern = re.compile(rf"^{site}_(\d+)$")
+    return sorted((column for column in df.columns if pattern.match(column)), key=lambda c: int(c.split("_")[1]))
+
+
+def compute_fingerprints(df: pd.DataFrame, measurement_columns: Sequence[str] = ()) -> np.ndarray:
+    """
+    64-bit fingerprint of every row from its normalized composition and selected measurements.
+
+    Ions are compared after stripping parentheses/whitespace (null and "0" slots are both empty), coefficients after scaling each site to
+    its total (A=1, B=1, C=3, equal split when a coefficient is missing), and slot order does not
+    matter, so "MA 0.5; FA 0.5" and "FA 1; MA 1" fingerprint the same.
+    Args:
+        df (pd.DataFrame): Rows with A_n/B_n/C_n and A_n_coef/... slot columns.
+        measurement_columns (Sequence[str]): Extra columns (e.g. band_gap) that must also match.
+    Returns:
+        np.ndarray: uint64 fingerprints.
+    """
+    n = len(df)
+    fingerprint = np.zeros(n, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for site in (Site.A.value, Site.B.value, Site.C.value):
+            slot_columns = _slot_columns(df, site)
+            if not slot_columns:
+                continue
+            ions = np.empty((n, len(slot_columns)), dtype=object)
+            coefs = np.empty((n, len(slot_columns)), dtype=np.float64)
+            for i, column in enumerate(slot_columns):
+                ions[:, i] = normalize_slot_names(df[column]).to_numpy(dtype=object)
+                coef_column = f"{column}_coef"
+                coefs[:, i] = (pd.to_numeric(df[coef_column], errors="coerce").to_numpy(dtype=np.float64)
+                               if coef_column in df else np.nan)
+            present = ~np.isin(ions, list(EMPTY_SLOT_VALUES))
+            present_count = present.sum(axis=1)
+            coefs = np.where(present, coefs, 0.0)
+            unknown = (present & (np.isnan(coefs) | (coefs == -1))).any(axis=1)
+            totals = coefs.sum(axis=1)
+            scale = np.divide(SITE_TOTALS[site], totals, out=np.zeros(n), where=totals > 0)
+            normalized = coefs * scale[:, None]
+            equal_split = np.divide(SITE_TOTALS[site], present_count, out=np.zeros(n), where=present_count > 0)
+            normalized = np.where(unknown[:, None], equal_split[:, None], normalized)
+
+            ion_hashes = pd.util.hash_array(ions.ravel(), categorize=True).reshape(ions.shape)
+            slot_hashes = _mix(ion_hashes ^ _mix(_quantize(normalized, COEFFICIENT_DECIMALS) + _SITE_SALTS[site]))
+            # Summing is order independent, so the slot an ion was recorded in does not matter.
+            fingerprint += np.where(present, slot_hashes, np.uint64(0)).sum(axis=1, dtype=np.uint64)
+
+        for position, column in enumerate(measurement_columns):
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+            salt = _MEASUREMENT_SALT + np.uint64(position)
+            fingerprint = _mix(fingerprint ^ _mix(_quantize(values, MEASUREMENT_DECIMALS) + salt))
+    return _mix(fingerprint)
+
+
+def add_fingerprint_column(df: pd.DataFrame, measurement_columns: Sequence[str] = ()) -> pd.DataFrame:
+    df[FINGERPRINT_COLUMN] = compute_fingerprints(df, measurement_columns)
+    return df
+
+
+class FingerprintSet:
+    """
+    Persistent set of fingerprints, kept as a sorted uint64 file that is memory-mapped on load.
+    Membership checks are a binary search, so history never has to be reloaded into a DataFrame.
+    Fingerprints added since loading live in a hash set and are merged into the sorted array once,
+    on `save`, instead of re-sorting the whole history for every chunk.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._path = path
+        self._values = np.empty(0, dtype=np.uint64)
+        self._added: Set[int] = set()
+        if path and os.path.exists(path):
+            self._values = np.memmap(path, dtype=np.uint64, mode="r") if os.path.getsize(path) else self._values
+
+    def __len__(self):
+        return len(self._values) + len(self._added)
+
+    def contains(self, fingerprints: np.ndarray) -> np.ndarray:
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        found = np.zeros(len(fingerprints), dtype=bool)
+        if len(self._values):
+            positions = np.minimum(np.searchsorted(self._values, fingerprints), len(self._values) - 1)
+            found = self._values[positions] == fingerprints
+        if self._added:
+            found |= np.fromiter((value in self._added for value in fingerprints.tolist()), dtype=bool,
+                                 count=len(fingerprints))
+        return found
+
+    def add(self, fingerprints: Iterable[int]):
+        fingerprints = np.unique(np.asarray(fingerprints, dtype=np.uint64))
+        self._added.update(fingerprints[~self.contains(fingerprints)].tolist())
+
+    def save(self, path: str | None = None):
+        path = path or self._path
+        if self._added:
+            added = np.fromiter(self._added, dtype=np.uint64, count=len(self._added))
+            self._values = np.union1d(self._values, added)
+            self._added = set()
+        tmp_path = path + ".tmp"
+        np.asarray(self._values, dtype=np.uint64).tofile(tmp_path)
+        os.replace(tmp_path, path)
+        self._path = path
+
+
+def deduplicate(df: pd.DataFrame,
+                measurement_columns: Sequence[str] = (),
+                seen: FingerprintSet | None = None) -> pd.DataFrame:
+    """
+    Drop rows whose fingerprint already occurred earlier in `df` or in `seen`; `seen` is updated.
+    Replaces `df.duplicated(subset=[A_/B_/C_ columns] + ["band_gap"])` in band_gap_prediction.ipynb.
+    """
+    fingerprints = df[FINGERPRINT_COLUMN].to_numpy(dtype=np.uint64) if FINGERPRINT_COLUMN in df \
+        else compute_fingerprints(df, measurement_columns)
+    keep = ~pd.Series(fingerprints).duplicated().to_numpy()
+    if seen is not None:
+        keep &= ~seen.contains(fingerprints)
+        seen.add(fingerprints[keep])
+    return df[keep]
+
+
+def deduplicate_chunks(chunks: Iterable[pd.DataFrame],
+                       measurement_columns: Sequence[str] = (),
+                       seen: FingerprintSet | None = None) -> Iterator[pd.DataFrame]:
+    """Streaming deduplication across chunks; only the fingerprint set is kept in memory."""
+    seen = seen if seen is not None else FingerprintSet()
+    for chunk in chunks:
+        yield deduplicate(chunk, measurement_columns, seen)
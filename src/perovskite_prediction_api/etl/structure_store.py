@@ -0,0 +1,453 @@
+import json
+import mmap
+import os
+import re
+import shlex
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from perovskite_prediction_api.common.storage import FileStorage
+
+# Periodic table symbols; a species code is the atomic number (index + 1), 0 is unknown.
+ELEMENT_SYMBOLS = (
+    "H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn Ga Ge As Se Br Kr "
+    "Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb "
+    "Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr Rf "
+    "Db Sg Bh Hs Mt Ds Rg Cn Nh Fl Mc Lv Ts Og"
+).split()
+SPECIES_CODES = {symbol: code for code, symbol in enumerate(ELEMENT_SYMBOLS, start=1)}
+
+_MAGIC = b"PVSKSTR1"
+_ALIGNMENT = 64
+_SYMBOL = re.compile(r"([A-Z][a-z]?)")
+_UNCERTAINTY = re.compile(r"\(\d+\)$")
+
+
+@dataclass
+class Structure:
+    """
+    Crystal structure: lattice vectors as rows (Å), species codes, fractional site coordinates and
+    site occupancies (1 everywhere for an ordered structure; disordered sites list each species at the
+    same position with its partial occupancy).
+    """
+    structure_id: str
+    lattice: np.ndarray
+    species: np.ndarray
+    frac_coords: np.ndarray
+    occupancies: np.ndarray | None = None
+
+    def __post_init__(self):
+        if self.occupancies is None:
+            self.occupancies = np.ones(len(self.species), dtype=np.float64)
+
+    @property
+    def is_ordered(self) -> bool:
+        return bool(np.all(self.occupancies == 1.0))
+
+    @property
+    def symbols(self) -> List[str]:
+        return [ELEMENT_SYMBOLS[code - 1] if code else "X" for code in self.species]
+
+    @property
+    def cart_coords(self) -> np.ndarray:
+        return self.frac_coords @ self.lattice
+
+    @property
+    def volume(self) -> float:
+        return float(abs(np.linalg.det(self.lattice)))
+
+
+def species_code(symbol: str) -> int:
+    """Atomic number of a species label such as 'Pb', 'Pb2+' or 'I1'; 0 if unrecognised."""
+    match = _SYMBOL.match(symbol.strip())
+    return SPECIES_CODES.get(match.group(1), 0) if match else 0
+
+
+def lattice_from_parameters(a: float, b: float, c: float, alpha: float, beta: float, gamma: float) -> np.ndarray:
+    """
+    Lattice vectors (rows) from cell lengths (Å) and angles (degrees), a along x and b in the xy plane.
+    """
+    alpha, beta, gamma = np.radians([alpha, beta, gamma])
+    c_x = c * np.cos(beta)
+    c_y = c * (np.cos(alpha) - np.cos(beta) * np.cos(gamma)) / np.sin(gamma)
+    c_z = np.sqrt(max(c ** 2 - c_x ** 2 - c_y ** 2, 0.0))
+    return np.array([
+        [a, 0.0, 0.0],
+        [b * np.cos(gamma), b * np.sin(gamma), 0.0],
+        [c_x, c_y, c_z],
+    ])
+
+
+def _cif_number(value: str) -> float:
+    return float(_UNCERTAINTY.sub("", value))
+
+
+def _tokenize_cif(text: str) -> Iterable[str]:
+    in_text_field = False
+    for line in text.splitlines():
+        if line.startswith(";"):
+            in_text_field = not in_text_field
+            if not in_text_field:
+                yield "?"
+            continue
+        if in_text_field:
+            continue
+        stripped = line.split("#", 1)[0].strip() if not ("'" in line or '"' in line) else line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        try:
+            yield from shlex.split(stripped, posix=True)
+        except ValueError:
+            yield from stripped.split()
+
+
+def _parse_cif_blocks(text: str) -> Tuple[Dict[str, str], List[Dict[str, List[str]]]]:
+    """Return single-valued tags and loops (tag -> column values) of the first data block."""
+    tags: Dict[str, str] = {}
+    loops: List[Dict[str, List[str]]] = []
+    tokens = list(_tokenize_cif(text))
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.lower().startswith("data_"):
+            if tags or loops:
+                break
+            i += 1
+        elif token.lower() == "loop_":
+            i += 1
+            headers = []
+            while i < len(tokens) and tokens[i].startswith("_"):
+                headers.append(tokens[i].lower())
+                i += 1
+            values = []
+            while i < len(tokens) and not tokens[i].startswith("_") and tokens[i].lower() != "loop_" \
+                    and not tokens[i].lower().startswith("data_"):
+                values.append(tokens[i])
+                i += 1
+            if headers:
+                rows = len(values) // len(headers)
+                loops.append({header: values[column::len(headers)][:rows] for column, header in enumerate(headers)})
+        elif token.startswith("_") and i + 1 < len(tokens):
+            tags[token.lower()] = tokens[i + 1]
+            i += 2
+        else:
+            i += 1
+    return tags, loops
+
+
+def _parse_symmetry_operation(operation: str) -> Tuple[np.ndarray, np.ndarray]:
+    rotation = np.zeros((3, 3))
+    translation = np.zeros(3)
+    for row, expression in enumerate(operation.lower().replace(" ", "").split(",")):
+        for sign, term in re.findall(r"([+-]?)([^+-]+)", expression):
+            factor = -1.0 if sign == "-" else 1.0
+            if term in "xyz":
+                rotation[row, "xyz".index(term)] += factor
+            elif "/" in term:
+                numerator, denominator = term.split("/")
+                translation[row] += factor * float(numerator) / float(denominator)
+            else:
+                translation[row] += factor * float(term)
+    return rotation, translation
+
+
+def parse_cif(text: str, structure_id: str, symprec: float = 1e-3) -> Structure:
+    """
+    Parse a CIF file into a Structure, expanding the asymmetric unit with the listed symmetry operations.
+    Args:
+        text (str): CIF content.
+        structure_id (str): Id to store the structure under.
+        symprec (float): Fractional distance under which generated sites are merged.
+    Returns:
+        Structure: Parsed structure.
+    """
+    tags, loops = _parse_cif_blocks(text)
+    try:
+        lattice = lattice_from_parameters(*(_cif_number(tags[f"_cell_{name}"]) for name in
+                                            ("length_a", "length_b", "length_c",
+                                             "angle_alpha", "angle_beta", "angle_gamma")))
+    except KeyError as exc:
+        raise ValueError(f"CIF '{structure_id}' has no cell parameter {exc}")
+
+    site_loop = next((loop for loop in loops if "_atom_site_fract_x" in loop), None)
+    if site_loop is None:
+        raise ValueError(f"CIF '{structure_id}' has no fractional atom sites")
+    labels = site_loop.get("_atom_site_type_symbol", site_loop.get("_atom_site_label"))
+    species = np.array([species_code(label) for label in labels], dtype=np.int16)
+    coords = np.array([[_cif_number(value) for value in site_loop[f"_atom_site_fract_{axis}"]]
+                       for axis in "xyz"]).T
+    occupancies = np.array([_cif_number(value) if value not in ("?", ".") else 1.0
+                            for value in site_loop.get("_atom_site_occupancy", ["1"] * len(labels))])
+    if np.any((occupancies <= 0) | (occupancies > 1)):
+        raise ValueError(f"CIF '{structure_id}' has site occupancies outside (0, 1]")
+
+    symmetry_loop = next((loop for loop in loops if "_symmetry_equiv_pos_as_xyz" in loop
+                          or "_space_group_symop_operation_xyz" in loop), None)
+    if symmetry_loop is not None:
+        operations = symmetry_loop.get("_symmetry_equiv_pos_as_xyz",
+                                       symmetry_loop.get("_space_group_symop_operation_xyz"))
+        species, coords, occupancies = _expand_sites(
+            species, coords, occupancies, [_parse_symmetry_operation(op) for op in operations], symprec)
+    return Structure(structure_id, lattice, species, np.mod(coords, 1.0), occupancies)
+
+
+def _expand_sites(species: np.ndarray, coords: np.ndarray, occupancies: np.ndarray, operations, symprec: float):
+    all_species, all_coords, all_occupancies = [], [], []
+    for code, site, occupancy in zip(species, coords, occupancies):
+        images = np.mod(np.array([rotation @ site + translation for rotation, translation in operations]), 1.0)
+        unique = []
+        for image in images:
+            if not any(np.all(np.abs((image - kept + 0.5) % 1.0 - 0.5) < symprec) for kept in unique):
+                unique.append(image)
+        all_species.extend([code] * len(unique))
+        all_coords.extend(unique)
+        all_occupancies.extend([occupancy] * len(unique))
+    return (np.array(all_species, dtype=np.int16), np.array(all_coords).reshape(-1, 3),
+            np.array(all_occupancies, dtype=np.float64))
+
+
+def parse_cif_file(path: str) -> Structure:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return parse_cif(f.read(), os.path.splitext(os.path.basename(path))[0])
+
+
+def parse_oqmd_structure(record: Dict, structure_id: str | None = None) -> Structure:
+    """
+    Build a Structure from an OQMD record: either an OPTIMADE structure (`lattice_vectors`,
+    `species_at_sites`, `cartesian_site_positions`) or a phase with `unit_cell` and `sites`
+    ("Cs @ 0.5 0.5 0.5").
+    """
+    attributes = record.get("attributes", record)
+    structure_id = str(structure_id if structure_id is not None else _oqmd_structure_id(record))
+    if "lattice_vectors" in attributes:
+        lattice = np.array(attributes["lattice_vectors"], dtype=np.float64)
+        cartesian = np.array(attributes["cartesian_site_positions"], dtype=np.float64).reshape(-1, 3)
+        frac_coords = cartesian @ np.linalg.inv(lattice)
+        species = np.array([species_code(symbol) for symbol in attributes["species_at_sites"]], dtype=np.int16)
+    elif "unit_cell" in attributes:
+        lattice = np.array(attributes["unit_cell"], dtype=np.float64)
+        symbols, positions = [], []
+        for site in attributes["sites"]:
+            symbol, position = site.split("@")
+            symbols.append(symbol)
+            positions.append([float(value) for value in position.split()])
+        frac_coords = np.array(positions, dtype=np.float64).reshape(-1, 3)
+        species = np.array([species_code(symbol) for symbol in symbols], dtype=np.int16)
+    else:
+        raise ValueError(f"OQMD record '{structure_id}' has no lattice")
+    return Structure(structure_id, lattice, species, frac_coords)
+
+
+def _oqmd_structure_id(record: Dict) -> str:
+    return str(record.get("id", record.get("name")))
+
+
+class StructureStore:
+    """
+    Read-only, memory-mapped collection of structures in one file.
+
+    Layout: magic, uint64 header length, JSON header with section offsets, then 64-byte aligned
+    sections - lattices (n, 3, 3) float64, site offsets (n + 1) int64, fractional coordinates
+    (sites, 3) float64, species (sites) int16, occupancies (sites) float64 and the NUL-separated ids.
+    Every section is a zero-copy view into the mapped file. Use as a context manager or call `close`;
+    structures returned by `get` are views too and keep the mapping alive until they are released.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"'{path}' is not a structure store")
+        header_length = int.from_bytes(self._mmap[len(_MAGIC):len(_MAGIC) + 8], "little")
+        start = len(_MAGIC) + 8
+        header = json.loads(self._mmap[start:start + header_length])
+        sections = header["sections"]
+        count, sites = header["count"], header["sites"]
+
+        self.lattices = self._view(sections["lattices"], np.float64, (count, 3, 3))
+        self.site_offsets = self._view(sections["site_offsets"], np.int64, (count + 1,))
+        self.frac_coords = self._view(sections["frac_coords"], np.float64, (sites, 3))
+        self.species = self._view(sections["species"], np.int16, (sites,))
+        # Stores written before occupancies were kept hold ordered structures only.
+        self.occupancies = self._view(sections["occupancies"], np.float64, (sites,)) if "occupancies" in sections \
+            else np.ones(sites, dtype=np.float64)
+        offset, length = sections["ids"]
+        self.ids = self._mmap[offset:offset + length].decode().split("\0") if count else []
+        self._positions = {structure_id: position for position, structure_id in enumerate(self.ids)}
+
+    def _view(self, section: List[int], dtype, shape) -> np.ndarray:
+        offset, _ = section
+        return np.frombuffer(self._mmap, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Drop the section views and unmap the file (deferred while structures from `get` are alive)."""
+        if self._mmap is None:
+            return
+        self.lattices = self.site_offsets = self.frac_coords = self.species = self.occupancies = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+
+    def __contains__(self, structure_id: str):
+        return structure_id in self._positions
+
+    def get(self, structure_id: str) -> Structure:
+        position = self._positions[structure_id]
+        start, stop = self.site_offsets[position], self.site_offsets[position + 1]
+        return Structure(structure_id, self.lattices[position], self.species[start:stop],
+                         self.frac_coords[start:stop], self.occupancies[start:stop])
+
+    @staticmethod
+    def write(path: str, structures: Iterable[Structure]):
+        """
+        Write structures into a new store file (atomically replacing `path`).
+        """
+        structures = list(structures)
+        ids = [structure.structure_id for structure in structures]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Structure ids must be unique")
+        if any("\0" in structure_id for structure_id in ids):
+            raise ValueError("Structure ids must not contain NUL")
+        counts = np.array([len(structure.species) for structure in structures], dtype=np.int64)
+        payloads = {
+            "lattices": np.array([s.lattice for s in structures], dtype=np.float64).reshape(-1, 3, 3),
+            "site_offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            "frac_coords": (np.concatenate([s.frac_coords for s in structures]) if structures
+                            else np.empty((0, 3))).astype(np.float64),
+            "species": (np.concatenate([s.species for s in structures]) if structures
+                        else np.empty(0)).astype(np.int16),
+            "occupancies": (np.concatenate([s.occupancies for s in structures]) if structures
+                            else np.empty(0)).astype(np.float64),
+            "ids": "\0".join(ids).encode(),
+        }
+        # Header size depends on the offsets it stores; reserve a fixed-size slot for it.
+        header_slot = 4096
+        offset = _align(len(_MAGIC) + 8 + header_slot)
+        sections = {}
+        for name, payload in payloads.items():
+            data = payload if isinstance(payload, bytes) else payload.tobytes()
+            sections[name] = [offset, len(data)]
+            offset = _align(offset + len(data))
+        header = json.dumps({"count": len(structures), "sites": int(counts.sum()), "sections": sections}).encode()
+        if len(header) > header_slot:
+            raise ValueError("Structure store header is too large")
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC + len(header).to_bytes(8, "little") + header)
+            for name, payload in payloads.items():
+                f.seek(sections[name][0])
+                f.write(payload if isinstance(payload, bytes) else payload.tobytes())
+            f.truncate(offset)
+        os.replace(tmp_path, path)
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+@dataclass
+class IngestResult:
+    """Store written by an ingest run and the files that could not be read or parsed (id -> error)."""
+    store: StructureStore
+    failures: Dict[str, str] = field(default_factory=dict)
+
+
+def _parse_cif_or_error(text: str, structure_id: str) -> Structure | str:
+    try:
+        return parse_cif(text, structure_id)
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+
+
+def _parse_cif_file_or_error(path: str) -> Structure | str:
+    try:
+        return parse_cif_file(path)
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+
+
+def _parse_oqmd_structure_or_error(record: Dict) -> Structure | str:
+    try:
+        return parse_oqmd_structure(record)
+    except Exception as exc:
+        return f"{type(exc).__name__}: {exc}"
+
+
+def _write_parsed(store_path: str, ids: List[str], parsed: List[Structure | str],
+                  failures: Dict[str, str]) -> IngestResult:
+    """Write the parsed structures; parse errors and repeated ids (the first one is kept) go to `failures`."""
+    structures, written = [], set()
+    for structure_id, result in zip(ids, parsed):
+        if not isinstance(result, Structure):
+            failures.setdefault(structure_id, result)
+        elif result.structure_id in written:
+            failures.setdefault(structure_id, f"ValueError: Duplicate structure id '{result.structure_id}'")
+        else:
+            written.add(result.structure_id)
+            structures.append(result)
+    StructureStore.write(store_path, structures)
+    return IngestResult(StructureStore(store_path), failures)
+
+
+def ingest_cif_files(paths: List[str], store_path: str, max_workers: int | None = None) -> IngestResult:
+    """
+    Parse local CIF files in parallel and write the readable ones into one structure store;
+    a malformed file is reported in `IngestResult.failures` instead of aborting the run.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        parsed = list(executor.map(_parse_cif_file_or_error, paths, chunksize=max(1, len(paths) // 64)))
+    ids = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    return _write_parsed(store_path, ids, parsed, {})
+
+
+def ingest_cif_from_storage(storage: FileStorage,
+                            filepaths: List[str],
+                            store_path: str,
+                            max_workers: int | None = None) -> IngestResult:
+    """
+    Download CIF files (e.g. perovskite/Dataset/Structures/*.cif) from a FileStorage on a thread pool,
+    parse them on a process pool and write them into one structure store. Files that fail to download
+    or parse are reported in `IngestResult.failures`.
+    """
+    def download(filepath: str) -> str | None:
+        try:
+            return storage.download_file(filepath).decode("utf-8", "replace")
+        except Exception as exc:
+            failures[os.path.splitext(os.path.basename(filepath))[0]] = f"{type(exc).__name__}: {exc}"
+            return None
+
+    failures: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=8) as downloads:
+        contents = list(downloads.map(download, filepaths))
+    ids = [os.path.splitext(os.path.basename(filepath))[0] for filepath in filepaths]
+    downloaded = [(structure_id, text) for structure_id, text in zip(ids, contents) if text is not None]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        parsed = list(executor.map(_parse_cif_or_error, [text for _, text in downloaded],
+                                   [structure_id for structure_id, _ in downloaded],
+                                   chunksize=max(1, len(downloaded) // 64)))
+    return _write_parsed(store_path, [structure_id for structure_id, _ in downloaded], parsed, failures)
+
+
+def ingest_oqmd_structures(records: List[Dict], store_path: str, max_workers: int | None = None) -> IngestResult:
+    """
+    Parse OQMD structure records (see `parse_oqmd_structure`) in parallel and write them into one structure
+    store; records that cannot be parsed are reported in `IngestResult.failures`.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        parsed = list(executor.map(_parse_oqmd_structure_or_error, records, chunksize=max(1, len(records) // 64)))
+    return _write_parsed(store_path, [_oqmd_structure_id(record) for record in records], parsed, {})
@@ -0,0 +1,92 @@
+from typing import Dict
+
+import numpy as np
+
+from perovskite_prediction_api.entities.dictioanary import Elements, SpaceGroup, Site
+
+# Column order of the 3D band gap model (saved_models/xgboost_band_gap_3D.json).
+BAND_GAP_3D_FEATURES = [
+    "inorganic_composition",
+    "A_1", "A_2", "A_3", "A_1_coef", "A_2_coef", "A_3_coef",
+    "B_1", "B_2", "B_1_coef", "B_2_coef",
+    "C_1", "C_2", "C_3", "C_1_coef", "C_2_coef", "C_3_coef",
+    "r_A", "r_B", "r_C", "octahedral_factor", "tolerance_factor", "space_group",
+]
+
+# Number of ion slots per site the 3D band gap model was trained with.
+BAND_GAP_3D_SLOTS = {Site.A.value: 3, Site.B.value: 2, Site.C.value: 3}
+
+# A-site ions which make a composition inorganic.
+INORGANIC_A_SITE_IONS = frozenset({Elements.CS.name, Elements.RB.name, Elements.NA.name})
+
+
+def compute_space_group_codes_3d(tolerance_factor: np.ndarray, is_inorganic: np.ndarray) -> np.ndarray:
+    """
+    Vectorized space group codes for 3D perovskites, same rules as `compute_space_group`.
+    Args:
+        tolerance_factor (np.ndarray): Tolerance factors.
+        is_inorganic (np.ndarray): Whether each composition is inorganic.
+    Returns:
+        np.ndarray: SpaceGroup codes.
+    """
+    t = np.asarray(tolerance_factor, dtype=np.float64)
+    inorganic = np.asarray(is_inorganic, dtype=bool)
+    codes = np.full(t.shape, SpaceGroup.HEXAGONAL.code, dtype=np.int64)
+    codes[t <= 1.0] = SpaceGroup.CUBIC.code
+    distorted = (t >= 0.8) & (t < 0.9)
+    codes[distorted & inorganic] = SpaceGroup.ORTHOROMBIC.code
+    codes[distorted & ~inorganic] = SpaceGroup.TETRAGONAL.code
+    codes[t < 0.8] = SpaceGroup.ORTHOROMBIC.code
+    return codes
+
+
+def build_band_gap_feature_matrix(is_inorganic: np.ndarray,
+                                  slot_codes: Dict[str, np.ndarray],
+                                  slot_coefs: Dict[str, np.ndarray],
+                                  r_A: np.ndarray,
+                                  r_B: np.ndarray,
+                                  r_C: np.ndarray,
+                                  octahedral_factor: np.ndarray,
+                                  tolerance_factor: np.ndarray,
+                                  out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Assemble the 3D band gap model input from per-site slot arrays.
+    Args:
+        is_inorganic (np.ndarray): Whether each composition is inorganic.
+        slot_codes (Dict[str, np.ndarray]): Element codes per site, shape (n, slots), 0 for empty slots.
+        slot_coefs (Dict[str, np.ndarray]): Coefficients per site, shape (n, slots).
+        r_A (np.ndarray): Effective A-site radii.
+        r_B (np.ndarray): B-site radii.
+        r_C (np.ndarray): Effective C-site radii.
+        octahedral_factor (np.ndarray): Octahedral factors.
+        tolerance_factor (np.ndarray): Tolerance factors.
+        out (np.ndarray | None): Optional (n, 23) float32 buffer to fill instead of allocating.
+    Returns:
+        np.ndarray: Feature matrix in BAND_GAP_3D_FEATURES order.
+    """
+    n = len(r_A)
+    if out is None:
+        out = np.empty((n, len(BAND_GAP_3D_FEATURES)), dtype=np.float32)
+    out[:, 0] = is_inorganic
+    col = 1
+    for site in (Site.A.value, Site.B.value, Site.C.value):
+        slots = BAND_GAP_3D_SLOTS[site]
+        out[:, col:col + slots] = _fit_slots(slot_codes[site], slots)
+        out[:, col + slots:col + 2 * slots] = _fit_slots(slot_coefs[site], slots)
+        col += 2 * slots
+    out[:, col] = r_A
+    out[:, col + 1] = r_B
+    out[:, col + 2] = r_C
+    out[:, col + 3] = octahedral_factor
+    out[:, col + 4] = tolerance_factor
+    out[:, col + 5] = compute_space_group_codes_3d(tolerance_factor, is_inorganic)
+    return out
+
+
+def _fit_slots(values: np.ndarray, slots: int) -> np.ndarray:
+    values = np.asarray(values)
+    if values.shape[1] >= slots:
+        return values[:, :slots]
+    padded = np.zeros((values.shape[0], slots), dtype=values.dtype)
+    padded[:, :values.shape[1]] = values
+    return padded
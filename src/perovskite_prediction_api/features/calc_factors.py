@@ -24,3 +24,65 @@ def compute_octahedral_factor(r_B: float, r_C_eff: float) -> float:
     if r_C_eff == 0:
         return float('inf')
     return r_B / r_C_eff
+
+
+def compute_tolerance_factors(r_A_eff: np.ndarray, r_B: np.ndarray, r_C_eff: np.ndarray) -> np.ndarray:
+    """
+    Vectorized tolerance factor over arrays of radii.
+    Args:
+        r_A_eff (np.ndarray): Effective A-site radii.
+        r_B (np.ndarray): B-site radii.
+        r_C_eff (np.ndarray): Effective C-site radii.
+    Returns:
+        np.ndarray: Tolerance factors, inf where r_B + r_C_eff is 0.
+    """
+    denominator = np.sqrt(2) * (np.asarray(r_B, dtype=np.float64) + r_C_eff)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factors = (np.asarray(r_A_eff, dtype=np.float64) + r_C_eff) / denominator
+    return np.where(denominator == 0, np.inf, factors)
+
+
+def compute_octahedral_factors(r_B: np.ndarray, r_C_eff: np.ndarray) -> np.ndarray:
+    """
+    Vectorized octahedral factor over arrays of radii.
+    Args:
+        r_B (np.ndarray): B-site radii.
+        r_C_eff (np.ndarray): Effective C-site radii.
+    Returns:
+        np.ndarray: Octahedral factors, inf where r_C_eff is 0.
+    """
+    r_C_eff = np.asarray(r_C_eff, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factors = np.asarray(r_B, dtype=np.float64) / r_C_eff
+    return np.where(r_C_eff == 0, np.inf, factors)
+
+
+def compute_tolerance_factor_gradients(r_A_eff: np.ndarray, r_B: np.ndarray,
+                                       r_C_eff: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Partial derivatives of the tolerance factor with respect to each site radius.
+    Args:
+        r_A_eff (np.ndarray): Effective A-site radii.
+        r_B (np.ndarray): B-site radii.
+        r_C_eff (np.ndarray): Effective C-site radii.
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (dt/dr_A, dt/dr_B, dt/dr_C).
+    """
+    r_A_eff, r_B, r_C_eff = (np.asarray(r, dtype=np.float64) for r in (r_A_eff, r_B, r_C_eff))
+    denominator = np.sqrt(2) * (r_B + r_C_eff)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d_r_A = 1.0 / denominator
+        d_r_B = -(r_A_eff + r_C_eff) / (denominator * (r_B + r_C_eff))
+        d_r_C = (r_B - r_A_eff) / (denominator * (r_B + r_C_eff))
+    return d_r_A, d_r_B, d_r_C
+
+
+def compute_octahedral_factor_gradients(r_B: np.ndarray, r_C_eff: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Partial derivatives of the octahedral factor with respect to the B and C site radii.
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (do/dr_B, do/dr_C).
+    """
+    r_B, r_C_eff = np.asarray(r_B, dtype=np.float64), np.asarray(r_C_eff, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 1.0 / r_C_eff, -r_B / r_C_eff ** 2
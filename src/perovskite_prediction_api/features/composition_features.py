@@ -0,0 +1,194 @@
+import re
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.entities.dictioanary import Elements, Dimensions, Site, SpaceGroup
+from perovskite_prediction_api.features.band_gap_features import INORGANIC_A_SITE_IONS, compute_space_group_codes_3d
+from perovskite_prediction_api.features.calc_factors import compute_octahedral_factors, compute_tolerance_factors
+
+# Bump when the definition of any composition feature changes; stored in feature matrix headers.
+FEATURE_VERSION = "1"
+SITE_TOTALS = {Site.A.value: 1.0, Site.B.value: 1.0, Site.C.value: 3.0}
+# Slot values that mean "no ion"; nulls are normalized to "" by `normalize_slot_names` first.
+EMPTY_SLOT_VALUES = frozenset({"", "0", "-1", "0.0", "-1.0", "nan", "NaN", "<NA>", "None"})
+INORGANIC_COLUMNS = ("inorganic_composition", "Perovskite_composition_inorganic")
+# Same precedence as get_dimension in stability_prediction.ipynb.
+DIMENSION_COLUMNS = (
+    ("Perovskite_dimension_3D", Dimensions.THREE_DIM),
+    ("Perovskite_dimension_2D3D_mixture", Dimensions.TWO_THREE_DIM_MIXTURE),
+    ("Perovskite_dimension_2D", Dimensions.TWO_DIM),
+)
+
+_ELEMENTS = list(Elements)
+_ELEMENT_INDEX = pd.Index([element.name for element in _ELEMENTS], dtype=object)
+_ELEMENT_CODES = np.array([element.code for element in _ELEMENTS], dtype=np.int64)
+_ELEMENT_RADII = np.array([element.ionic_radii for element in _ELEMENTS], dtype=np.float64)
+
+
+@dataclass
+class CompositionArrays:
+    """
+    Column-wise composition features of many rows, the vectorized counterpart of
+    `create_composition_dict` + `compute_effective_radii` + the factor and space group helpers.
+    Rows that `create_composition_dict` would reject (unknown ion, empty site, bad coefficient) have
+    `valid` False and NaN radii.
+    """
+    valid: np.ndarray
+    slot_codes: Dict[str, np.ndarray]
+    slot_coefs: Dict[str, np.ndarray]
+    is_inorganic: np.ndarray
+    dimension: np.ndarray
+    r_A: np.ndarray
+    r_B: np.ndarray
+    r_C: np.ndarray
+    octahedral_factor: np.ndarray
+    tolerance_factor: np.ndarray
+    space_group: np.ndarray
+
+    def __len__(self):
+        return len(self.valid)
+
+    def column(self, name: str) -> np.ndarray:
+        """Feature by model column name: inorganic_composition, A_1, A_1_coef, r_A, space_group..."""
+        if name == "inorganic_composition":
+            return self.is_inorganic.astype(np.float64)
+        if name in ("r_A", "r_B", "r_C", "octahedral_factor", "tolerance_factor", "space_group", "dimension"):
+            return getattr(self, name)
+        match = re.fullmatch(r"([ABC])_(\d+)(_coef)?", name)
+        if match is None:
+            raise KeyError(f"'{name}' is not a composition feature")
+        site, slot = match.group(1), int(match.group(2)) - 1
+        values = self.slot_coefs[site] if match.group(3) else self.slot_codes[site]
+        if slot >= values.shape[1]:
+            return np.zeros(len(self), dtype=np.float64)
+        return values[:, slot].astype(np.float64)
+
+
+def normalize_slot_names(values: pd.Series) -> pd.Series:
+    """Ion names of one slot column with parentheses and surrounding whitespace removed, nulls as ""."""
+    return values.astype("string").fillna("").str.replace(r"[()]", "", regex=True).str.strip().astype(object)
+
+
+def _slot_count(df: pd.DataFrame, site: str) -> int:
+    pattern = re.compile(rf"^{site}_(\d+)$")
+    return max((int(pattern.match(column).group(1)) for column in df.columns if pattern.match(column)), default=0)
+
+
+def compute_composition_arrays(df: pd.DataFrame) -> CompositionArrays:
+    """
+    Parse A_n/B_n/C_n (+ _coef) slot columns of every row at once.
+    Args:
+        df (pd.DataFrame): Prepared dataset rows.
+    Returns:
+        CompositionArrays: Slot codes (0 for empty slots), normalized coefficients and derived features.
+    """
+    n = len(df)
+    valid = np.ones(n, dtype=bool)
+    slot_codes, slot_coefs, radii = {}, {}, {}
+    present_inorganic = np.ones(n, dtype=bool)
+    for site in (Site.A.value, Site.B.value, Site.C.value):
+        slots = _slot_count(df, site)
+        codes = np.zeros((n, slots), dtype=np.int64)
+        coefs = np.zeros((n, slots), dtype=np.float64)
+        site_radii = np.zeros((n, slots), dtype=np.float64)
+        present = np.zeros((n, slots), dtype=bool)
+        for i in range(slots):
+            names = normalize_slot_names(df[f"{site}_{i + 1}"])
+            coef_column = f"{site}_{i + 1}_coef"
+            raw = df[coef_column] if coef_column in df else pd.Series(0, index=df.index)
+            values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64)
+            filled = ~names.isin(list(EMPTY_SLOT_VALUES)).to_numpy() & ~names.str.contains("|", regex=False).to_numpy()
+            # Zero coefficients drop the ion, like create_composition_dict.
+            filled &= values != 0
+            positions = _ELEMENT_INDEX.get_indexer(names.to_numpy(dtype=object))
+            valid &= ~(filled & ((positions < 0) | np.isnan(values)))
+            known = filled & (positions >= 0)
+            codes[:, i] = np.where(known, _ELEMENT_CODES[positions], 0)
+            site_radii[:, i] = np.where(known, _ELEMENT_RADII[positions], 0.0)
+            coefs[:, i] = np.where(known, values, 0.0)
+            present[:, i] = known
+            if site == Site.A.value:
+                present_inorganic &= ~known | names.isin(list(INORGANIC_A_SITE_IONS)).to_numpy()
+
+        counts = present.sum(axis=1)
+        valid &= counts > 0
+        total = SITE_TOTALS[site]
+        inferred = (present & (coefs == -1)).any(axis=1)
+        sums = coefs.sum(axis=1)
+        scale = np.divide(total, sums, out=np.ones(n), where=sums > 0)
+        equal = np.divide(total, counts, out=np.zeros(n), where=counts > 0)
+        coefs = np.where(inferred[:, None], equal[:, None] * present, coefs * scale[:, None])
+        slot_codes[site], slot_coefs[site] = codes, coefs
+        radii[site] = (coefs * site_radii).sum(axis=1) / (3.0 if site == Site.C.value else 1.0)
+
+    dimension = _dimension_codes(df)
+    if "dimension" in df:
+        # An unrecognized dimension name is an input error, unlike a row without any dimension flag.
+        valid &= dimension >= 0
+    r_A = np.where(valid, radii[Site.A.value], np.nan)
+    r_B = np.where(valid, radii[Site.B.value], np.nan)
+    r_C = np.where(valid, radii[Site.C.value], np.nan)
+    tolerance = compute_tolerance_factors(r_A, r_B, r_C)
+    is_inorganic = _inorganic(df, present_inorganic)
+    return CompositionArrays(
+        valid=valid,
+        slot_codes=slot_codes,
+        slot_coefs=slot_coefs,
+        is_inorganic=is_inorganic,
+        dimension=dimension,
+        r_A=r_A,
+        r_B=r_B,
+        r_C=r_C,
+        octahedral_factor=compute_octahedral_factors(r_B, r_C),
+        tolerance_factor=tolerance,
+        space_group=compute_space_group_codes(tolerance, is_inorganic, dimension),
+    )
+
+
+def compute_space_group_codes(tolerance_factor: np.ndarray, is_inorganic: np.ndarray,
+                              dimension: np.ndarray) -> np.ndarray:
+    """
+    Vectorized `compute_space_group` over dimension codes; NaN where it has no answer (0D, unknown, NaN t).
+    """
+    t = np.asarray(tolerance_factor, dtype=np.float64)
+    codes = np.full(t.shape, np.nan)
+    three_dim = dimension == Dimensions.THREE_DIM.code
+    codes[three_dim] = compute_space_group_codes_3d(t[three_dim], is_inorganic[three_dim])
+    codes[dimension == Dimensions.TWO_DIM.code] = SpaceGroup.RUDDLESDEN_POPEN.code
+    mixture = dimension == Dimensions.TWO_THREE_DIM_MIXTURE.code
+    codes[mixture] = np.where(t[mixture] < 0.9, SpaceGroup.RUDDLESDEN_POPEN.code, SpaceGroup.ORTHOROMBIC.code)
+    codes[np.isnan(t)] = np.nan
+    return codes
+
+
+def _inorganic(df: pd.DataFrame, derived: np.ndarray) -> np.ndarray:
+    for column in INORGANIC_COLUMNS:
+        if column in df:
+            values = df[column].map({True: 1, False: 0, "True": 1, "False": 0}).to_numpy(dtype=np.float64,
+                                                                                         na_value=np.nan)
+            return np.where(np.isnan(values), derived, values == 1)
+    return derived
+
+
+def _dimension_codes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Dimension code per row; rows without dimension information are taken as 3D, and a `dimension` name that
+    is not a `Dimensions` value gives -1 (unknown) so it is never treated as 3D.
+    """
+    n = len(df)
+    if "dimension" in df:
+        names = {dimension.dimension: dimension.code for dimension in Dimensions}
+        codes = np.array(df["dimension"].map(names), dtype=np.float64)
+        codes[np.isnan(codes) & df["dimension"].isna().to_numpy()] = Dimensions.THREE_DIM.code
+        return np.nan_to_num(codes, nan=-1).astype(np.int64)
+    if not any(column in df for column, _ in DIMENSION_COLUMNS):
+        return np.full(n, Dimensions.THREE_DIM.code, dtype=np.int64)
+    codes = np.full(n, -1, dtype=np.int64)
+    for column, dimension in reversed(DIMENSION_COLUMNS):
+        if column in df:
+            flags = df[column].isin([True, "True"]).to_numpy()
+            codes[flags] = dimension.code
+    return codes
@@ -0,0 +1,204 @@
+import struct
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from perovskite_prediction_api.entities.dictioanary import Layers
+
+STACK_SEPARATOR = "|"
+UNKNOWN_CODE = 0
+
+_MAGIC = b"PVSKENC1"
+_HEADER = struct.Struct("<8sI")
+_ENTRY = struct.Struct("<BIII")
+_TOKEN_SEPARATOR = "\0"
+
+_CATEGORICAL = 0
+_LAYERS = 1
+
+
+class Vocabulary:
+    """
+    Frozen token -> code mapping. Code 0 is the unknown bucket, known tokens are numbered from 1.
+    Lookups go through a hash index, so a whole column is encoded in one call.
+    """
+
+    def __init__(self, tokens: Iterable[str]):
+        self._tokens = np.array([None] + list(tokens), dtype=object)
+        self._index: pd.Index | None = None
+        if len(set(self._tokens[1:])) != len(self._tokens) - 1:
+            raise ValueError("Vocabulary tokens must be unique")
+
+    @classmethod
+    def fit(cls, values: Iterable[str], min_frequency: int = 1, seed: Iterable[str] = ()) -> "Vocabulary":
+        """
+        Build a vocabulary from observed values.
+        Args:
+            values (Iterable[str]): Observed tokens; nulls are ignored.
+            min_frequency (int): Tokens seen fewer times go to the unknown bucket.
+            seed (Iterable[str]): Tokens that always get a code, first and in the given order.
+        Returns:
+            Vocabulary: Tokens ordered by the seed, then by descending frequency.
+        """
+        counts = pd.Series(list(values) if not isinstance(values, pd.Series) else values).dropna().value_counts()
+        seed = list(seed)
+        seeded = set(seed)
+        frequent = [token for token in counts[counts >= min_frequency].index if token not in seeded]
+        return cls(seed + frequent)
+
+    def __len__(self):
+        return len(self._tokens) - 1
+
+    @property
+    def tokens(self) -> List[str]:
+        return list(self._tokens[1:])
+
+    def encode(self, values) -> np.ndarray:
+        """Codes of `values` (array-like of strings), UNKNOWN_CODE for unseen tokens and nulls."""
+        if self._index is None:
+            self._index = pd.Index(self._tokens[1:], dtype=object)
+        return (self._index.get_indexer(pd.Index(values, dtype=object)) + 1).astype(np.int32)
+
+    def decode(self, codes) -> np.ndarray:
+        """Tokens of `codes`; the unknown bucket decodes to None."""
+        return self._tokens[np.asarray(codes, dtype=np.int64)]
+
+
+def tokenize_stack_sequences(values) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split stack sequence strings ("TiO2-c | TiO2-mp") into layer tokens.
+    Args:
+        values: Array-like of stack sequence strings, nulls allowed.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (offsets of length n + 1, flat array of stripped layer tokens).
+    """
+    array = pa.array(values, type=pa.string(), from_pandas=True)
+    layers = pc.split_pattern(pc.fill_null(array, ""), STACK_SEPARATOR)
+    flat = pc.utf8_trim_whitespace(layers.flatten()).to_numpy(zero_copy_only=False)
+    offsets = layers.offsets.to_numpy().astype(np.int64)
+    # Empty strings split into one empty token; drop those.
+    keep = flat != ""
+    if not keep.all():
+        counts = np.add.reduceat(keep.astype(np.int64), offsets[:-1]) if len(flat) else np.zeros(len(array), int)
+        counts[offsets[:-1] == offsets[1:]] = 0
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        flat = flat[keep]
+    return offsets, flat.astype(object)
+
+
+class CategoricalEncoder:
+    """Label encoder for a categorical column (ETL/HTL/backcontact stack sequence, cell architecture...)."""
+
+    def __init__(self, vocabulary: Vocabulary):
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def fit(cls, values, min_frequency: int = 1) -> "CategoricalEncoder":
+        return cls(Vocabulary.fit(pd.Series(values, dtype=object).str.strip(), min_frequency))
+
+    def encode(self, values) -> np.ndarray:
+        return self.vocabulary.encode(pd.Series(values, dtype=object).str.strip())
+
+    def decode(self, codes) -> np.ndarray:
+        return self.vocabulary.decode(codes)
+
+
+class LayerSequenceEncoder:
+    """
+    Encodes stack sequences into layer code arrays (offsets + codes). Known `Layers` keep their
+    dictionary codes; other frequent layers are numbered after them.
+    """
+
+    def __init__(self, vocabulary: Vocabulary):
+        self.vocabulary = vocabulary
+
+    @classmethod
+    def fit(cls, values, min_frequency: int = 1) -> "LayerSequenceEncoder":
+        _, tokens = tokenize_stack_sequences(values)
+        return cls(Vocabulary.fit(tokens, min_frequency, seed=_layer_seed()))
+
+    def encode(self, values) -> Tuple[np.ndarray, np.ndarray]:
+        offsets, tokens = tokenize_stack_sequences(values)
+        return offsets, self.vocabulary.encode(tokens)
+
+    def decode(self, offsets: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        tokens = self.vocabulary.decode(codes)
+        tokens = np.where(pd.isna(tokens), "?", tokens)
+        layers = pa.ListArray.from_arrays(pa.array(np.asarray(offsets, dtype=np.int32)),
+                                          pa.array(tokens, type=pa.string()))
+        return pc.binary_join(layers, f" {STACK_SEPARATOR} ").to_numpy(zero_copy_only=False)
+
+
+def _layer_seed() -> List[str]:
+    """Vocabulary seed that puts every `Layers` member at its own code; unused codes get placeholders."""
+    names = {}
+    for layer in Layers:
+        if layer.code <= UNKNOWN_CODE or layer.code in names:
+            raise ValueError(f"Layer code {layer.code} of '{layer.layer_name}' is reserved or duplicated")
+        names[layer.code] = layer.layer_name
+    return [names.get(code, f"<unused layer code {code}>") for code in range(1, max(names, default=0) + 1)]
+
+
+class EncoderSet:
+    """
+    Named encoders serialized together into one compact binary artifact.
+
+    Layout: magic, entry count, then per encoder a (kind, name length, token count, blob length)
+    header, the name and the NUL-separated UTF-8 tokens. Loading is one decode and split per
+    encoder; the hash index is only built on first use.
+    """
+
+    def __init__(self, encoders: Dict[str, CategoricalEncoder | LayerSequenceEncoder] | None = None):
+        self.encoders = dict(encoders or {})
+
+    def __getitem__(self, name: str):
+        return self.encoders[name]
+
+    def __setitem__(self, name: str, encoder: CategoricalEncoder | LayerSequenceEncoder):
+        self.encoders[name] = encoder
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(_MAGIC, len(self.encoders))]
+        for name, encoder in self.encoders.items():
+            kind = _LAYERS if isinstance(encoder, LayerSequenceEncoder) else _CATEGORICAL
+            encoded_name = name.encode()
+            tokens = encoder.vocabulary.tokens
+            if any(_TOKEN_SEPARATOR in token for token in tokens):
+                raise ValueError(f"Encoder '{name}' has tokens containing NUL")
+            blob = _TOKEN_SEPARATOR.join(tokens).encode()
+            parts += [_ENTRY.pack(kind, len(encoded_name), len(tokens), len(blob)), encoded_name, blob]
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EncoderSet":
+        buffer = memoryview(data)
+        magic, count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not an encoder artifact")
+        position = _HEADER.size
+        encoders = {}
+        for _ in range(count):
+            kind, name_length, token_count, blob_length = _ENTRY.unpack_from(buffer, position)
+            position += _ENTRY.size
+            name = bytes(buffer[position:position + name_length]).decode()
+            position += name_length
+            blob = bytes(buffer[position:position + blob_length]).decode()
+            position += blob_length
+            tokens = blob.split(_TOKEN_SEPARATOR) if token_count else []
+            if len(tokens) != token_count:
+                raise ValueError(f"Corrupted encoder artifact entry '{name}'")
+            encoder_cls = LayerSequenceEncoder if kind == _LAYERS else CategoricalEncoder
+            encoders[name] = encoder_cls(Vocabulary(tokens))
+        return cls(encoders)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "EncoderSet":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
@@ -0,0 +1,160 @@
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+_MAGIC = b"PVSKFMX1"
+_PAGE_SIZE = 4096
+_ROWS_OFFSET = len(_MAGIC)
+_HEADER_LENGTH_OFFSET = _ROWS_OFFSET + 8
+_HEADER_OFFSET = _HEADER_LENGTH_OFFSET + 8
+_DTYPE = np.dtype("<f4")
+
+
+@dataclass(frozen=True)
+class FeatureSchema:
+    """Column order and feature version of a feature matrix; readers refuse a version they do not expect."""
+    columns: Tuple[str, ...]
+    feature_version: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self):
+        object.__setattr__(self, "columns", tuple(self.columns))
+        if len(set(self.columns)) != len(self.columns):
+            raise ValueError("Feature matrix columns must be unique")
+
+    def to_dict(self) -> dict:
+        return {"columns": list(self.columns), "dtype": _DTYPE.str, "feature_version": self.feature_version,
+                "metadata": dict(self.metadata)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FeatureSchema":
+        if np.dtype(data["dtype"]) != _DTYPE:
+            raise ValueError(f"Unsupported feature matrix dtype {data['dtype']}")
+        return cls(tuple(data["columns"]), data["feature_version"], data.get("metadata", {}))
+
+
+class FeatureMatrix:
+    """
+    Contiguous float32 feature matrix in one file, opened with `np.memmap` so processes share pages.
+
+    Layout: magic, uint64 row count, uint64 header length, JSON schema header, then row-major float32
+    data from the first page boundary after the header. Appending writes the new rows past the end
+    and only then bumps the row count, so readers never see a partial row. One writer at a time.
+    """
+
+    def __init__(self, path: str, schema: FeatureSchema, data_offset: int):
+        self.path = path
+        self.schema = schema
+        self._data_offset = data_offset
+        self._values = None
+        self.refresh()
+
+    @classmethod
+    def create(cls, path: str, schema: FeatureSchema, rows=None) -> "FeatureMatrix":
+        """Write a new matrix file (atomically replacing `path`), optionally with initial rows."""
+        header = json.dumps(schema.to_dict()).encode()
+        data_offset = _align(_HEADER_OFFSET + len(header), _PAGE_SIZE)
+        values = _as_rows(rows, schema) if rows is not None else np.empty((0, len(schema.columns)), _DTYPE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC + len(values).to_bytes(8, "little") + len(header).to_bytes(8, "little") + header)
+            f.seek(data_offset)
+            f.write(values.tobytes())
+            f.truncate(data_offset + values.nbytes)
+        os.replace(tmp_path, path)
+        return cls(path, schema, data_offset)
+
+    @classmethod
+    def open(cls, path: str, feature_version: str | None = None) -> "FeatureMatrix":
+        """
+        Args:
+            path (str): Matrix file.
+            feature_version (str | None): Expected feature version; ValueError on mismatch.
+        """
+        with open(path, "rb") as f:
+            prefix = f.read(_HEADER_OFFSET)
+            if prefix[:len(_MAGIC)] != _MAGIC:
+                raise ValueError(f"'{path}' is not a feature matrix")
+            header_length = int.from_bytes(prefix[_HEADER_LENGTH_OFFSET:_HEADER_OFFSET], "little")
+            schema = FeatureSchema.from_dict(json.loads(f.read(header_length)))
+        if feature_version is not None and schema.feature_version != feature_version:
+            raise ValueError(f"Feature matrix '{path}' has feature version {schema.feature_version}, "
+                             f"expected {feature_version}")
+        return cls(path, schema, _align(_HEADER_OFFSET + header_length, _PAGE_SIZE))
+
+    def __len__(self):
+        return self._values.shape[0]
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return self.schema.columns
+
+    @property
+    def values(self) -> np.ndarray:
+        """Read-only (rows, columns) memory map."""
+        return self._values
+
+    def column(self, name: str) -> np.ndarray:
+        return self._values[:, self.schema.columns.index(name)]
+
+    def select(self, columns: Sequence[str], rows=None) -> np.ndarray:
+        """Model input in the given column order; a view when the columns are contiguous."""
+        indices = [self.schema.columns.index(column) for column in columns]
+        values = self._values if rows is None else self._values[rows]
+        if indices == list(range(indices[0], indices[0] + len(indices))):
+            return values[:, indices[0]:indices[-1] + 1]
+        return values[:, indices]
+
+    def to_frame(self, columns: Sequence[str] | None = None) -> pd.DataFrame:
+        columns = list(columns or self.schema.columns)
+        return pd.DataFrame(self.select(columns), columns=columns)
+
+    def append(self, rows) -> int:
+        """
+        Append rows (array in schema column order, or a DataFrame with every schema column).
+        Returns:
+            int: Row count after the append.
+        """
+        values = _as_rows(rows, self.schema)
+        with open(self.path, "r+b") as f:
+            f.seek(_ROWS_OFFSET)
+            count = int.from_bytes(f.read(8), "little")
+            f.seek(self._data_offset + count * values.shape[1] * _DTYPE.itemsize)
+            f.write(values.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(_ROWS_OFFSET)
+            f.write((count + len(values)).to_bytes(8, "little"))
+        self.refresh()
+        return len(self)
+
+    def refresh(self):
+        """Remap the file to pick up rows appended by another process."""
+        with open(self.path, "rb") as f:
+            f.seek(_ROWS_OFFSET)
+            count = int.from_bytes(f.read(8), "little")
+        shape = (count, len(self.schema.columns))
+        if count == 0:
+            self._values = np.empty(shape, dtype=_DTYPE)
+        else:
+            self._values = np.memmap(self.path, dtype=_DTYPE, mode="r", offset=self._data_offset, shape=shape)
+
+
+def _as_rows(rows, schema: FeatureSchema) -> np.ndarray:
+    if isinstance(rows, pd.DataFrame):
+        missing = [column for column in schema.columns if column not in rows]
+        if missing:
+            raise ValueError(f"Missing feature columns {missing}")
+        rows = rows[list(schema.columns)].to_numpy(dtype=np.float64, na_value=np.nan)
+    values = np.ascontiguousarray(rows, dtype=_DTYPE)
+    if values.ndim != 2 or values.shape[1] != len(schema.columns):
+        raise ValueError(f"Expected rows with {len(schema.columns)} columns, got shape {values.shape}")
+    return values
+
+
+def _align(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
@@ -0,0 +1,229 @@
+import json
+import os
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.entities.dictioanary import Elements, Site
+from perovskite_prediction_api.features.composition_features import compute_composition_arrays
+
+DESCRIPTOR_COLUMNS = ["r_A", "r_B", "r_C", "tolerance_factor", "polarizability_A", "polarizability_B",
+                      "polarizability_C", "entropy_A", "entropy_C"]
+
+# One composition column per element code (codes start at 1).
+COMPOSITION_DIM = max(element.code for element in Elements)
+FEATURE_DIM = COMPOSITION_DIM + len(DESCRIPTOR_COLUMNS)
+
+# r^3 / m per element code (index 0 is the empty slot), as in compute_effective_polarizability.
+_POLARIZABILITY = np.zeros(COMPOSITION_DIM + 1)
+for _element in Elements:
+    _POLARIZABILITY[_element.code] = _element.ionic_radii ** 3 / _element.atomic_mass if _element.atomic_mass else 0.0
+
+_META_FILE = "meta.json"
+_VECTORS_FILE = "vectors.f32"
+_IDS_FILE = "ids.i64"
+
+
+def compute_similarity_vector(composition: Dict[str, Dict[str, float]]) -> np.ndarray:
+    """
+    Build the raw (unscaled) similarity vector of a composition the same way indexed rows are built, so
+    coefficients are normalized to the site totals first ({"I": 0.9, "Br": 0.1} is the same C-site as
+    {"I": 2.7, "Br": 0.3}).
+    Args:
+        composition (Dict[str, Dict[str, float]]): Perovskite composition.
+    Returns:
+        np.ndarray: float32 vector of length FEATURE_DIM.
+    """
+    unknown_sites = set(composition) - {site.value for site in Site}
+    if unknown_sites:
+        raise ValueError(f"Unknown sites {sorted(unknown_sites)}")
+    row = {}
+    for site, ions in composition.items():
+        for i, (ion, coef) in enumerate(ions.items()):
+            row[f"{site}_{i + 1}"] = ion
+            row[f"{site}_{i + 1}_coef"] = coef
+    _, vectors = compute_similarity_vectors(pd.DataFrame([row]))
+    if not len(vectors):
+        raise ValueError(f"Invalid composition {composition}")
+    return vectors[0]
+
+
+def compute_similarity_vectors(df: pd.DataFrame, first_row: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Similarity vectors for every row of a prepared dataset with A_/B_/C_ slot columns, built column-wise
+    from `compute_composition_arrays`. Rows whose composition cannot be parsed are skipped.
+    Args:
+        df (pd.DataFrame): Consecutive dataset rows.
+        first_row (int): Dataset row number of the first row of `df`, so chunks of one dataset get
+            distinct ids.
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (dataset row ids, vectors).
+    """
+    arrays = compute_composition_arrays(df)
+    valid = arrays.valid
+    vectors = np.zeros((int(valid.sum()), FEATURE_DIM), dtype=np.float64)
+    rows = np.arange(len(vectors))
+    polarizability, entropy = {}, {}
+    for site in (Site.A.value, Site.B.value, Site.C.value):
+        codes = arrays.slot_codes[site][valid]
+        fractions = arrays.slot_coefs[site][valid] / (3.0 if site == Site.C.value else 1.0)
+        for slot in range(codes.shape[1]):
+            present = codes[:, slot] > 0
+            np.add.at(vectors, (rows[present], codes[present, slot] - 1), fractions[present, slot])
+        polarizability[site] = (fractions * _POLARIZABILITY[codes]).sum(axis=1)
+        logs = np.log(fractions, out=np.zeros_like(fractions), where=fractions > 0)
+        entropy[site] = -(fractions * logs).sum(axis=1)
+
+    vectors[:, COMPOSITION_DIM:] = np.column_stack([
+        arrays.r_A[valid], arrays.r_B[valid], arrays.r_C[valid], arrays.tolerance_factor[valid],
+        polarizability[Site.A.value], polarizability[Site.B.value], polarizability[Site.C.value],
+        entropy[Site.A.value], entropy[Site.C.value],
+    ])
+    return first_row + np.flatnonzero(valid).astype(np.int64), vectors.astype(np.float32)
+
+
+class SimilarityIndex:
+    """
+    Exact k-NN index over similarity vectors using blocked brute-force search.
+
+    Vectors are stored on disk as raw float32 rows next to their int64 ids so new rows are appended
+    without rewriting the file; after `create`, `load` or `add` the vectors are a read-only memory map
+    of that file, never a copy in RAM. Descriptor columns are standardized with the mean/std fitted when
+    the index is created and kept fixed afterwards, so distances stay comparable across appends.
+    Ids are row numbers of the indexed `dataset`; `DataService.append_rows` adds appended rows.
+    """
+
+    def __init__(self, path: str, mean: np.ndarray, std: np.ndarray, block_size: int = 65536,
+                 dataset: str | None = None):
+        self._path = path
+        self.dataset = dataset
+        self._mean = np.asarray(mean, dtype=np.float32)
+        self._std = np.asarray(std, dtype=np.float32)
+        self._block_size = block_size
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, FEATURE_DIM), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._positions: Dict[int, int] | None = None
+
+    @classmethod
+    def create(cls, path: str, ids: np.ndarray, vectors: np.ndarray,
+               dataset: str | None = None) -> "SimilarityIndex":
+        """
+        Create a new index at `path`, fitting the descriptor scaling on `vectors`.
+        Args:
+            path (str): Index directory.
+            ids (np.ndarray): Dataset row ids of the vectors.
+            vectors (np.ndarray): Raw vectors from `compute_similarity_vectors`.
+            dataset (str | None): Name of the indexed dataset.
+        """
+        os.makedirs(path, exist_ok=True)
+        descriptors = np.asarray(vectors, dtype=np.float64)[:, COMPOSITION_DIM:]
+        mean = descriptors.mean(axis=0) if len(descriptors) else np.zeros(len(DESCRIPTOR_COLUMNS))
+        std = descriptors.std(axis=0) if len(descriptors) else np.ones(len(DESCRIPTOR_COLUMNS))
+        std[std == 0] = 1.0
+        index = cls(path, mean, std, dataset=dataset)
+        for file_name in (_VECTORS_FILE, _IDS_FILE):
+            open(os.path.join(path, file_name), "wb").close()
+        index._write_meta(0)
+        index.add(ids, vectors)
+        return index
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        """
+        Open an index previously written by `create`/`add`. The stored vectors are memory-mapped.
+        """
+        with open(os.path.join(path, _META_FILE)) as f:
+            meta = json.load(f)
+        if meta["dim"] != FEATURE_DIM:
+            raise ValueError(f"Index at '{path}' has dimension {meta['dim']}, expected {FEATURE_DIM}")
+        index = cls(path, meta["mean"], meta["std"], dataset=meta.get("dataset"))
+        count = meta["count"]
+        if count:
+            index._ids = np.array(np.memmap(os.path.join(path, _IDS_FILE), dtype=np.int64, mode="r", shape=(count,)))
+            index._map_vectors(count)
+            index._norms = np.einsum("ij,ij->i", index._vectors, index._vectors)
+        return index
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray):
+        """
+        Append rows to the vectors file and remap it; only ids and row norms are kept in RAM.
+        Args:
+            ids (np.ndarray): Row ids of the new vectors.
+            vectors (np.ndarray): Raw vectors from `compute_similarity_vector(s)`.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        scaled = self._scale(vectors)
+        if len(ids) != len(scaled):
+            raise ValueError(f"Got {len(ids)} ids for {len(scaled)} vectors")
+        if not len(ids):
+            return
+        with open(os.path.join(self._path, _VECTORS_FILE), "ab") as f:
+            f.write(scaled.tobytes())
+        with open(os.path.join(self._path, _IDS_FILE), "ab") as f:
+            f.write(ids.tobytes())
+        self._ids = np.concatenate([self._ids, ids])
+        self._map_vectors(len(self._ids))
+        self._norms = np.concatenate([self._norms, np.einsum("ij,ij->i", scaled, scaled)])
+        self._positions = None
+        self._write_meta(len(self._ids))
+
+    def query(self, vectors: np.ndarray, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k nearest stored rows for each query vector (Euclidean distance in scaled space).
+        Args:
+            vectors (np.ndarray): Raw query vectors, shape (q, FEATURE_DIM) or (FEATURE_DIM,).
+            k (int): Number of neighbours.
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (ids, distances), both shape (q, min(k, len(index))), nearest first.
+        """
+        queries = self._scale(np.atleast_2d(vectors))
+        k = min(k, len(self))
+        best_dist = np.full((len(queries), k), np.inf, dtype=np.float32)
+        best_pos = np.zeros((len(queries), k), dtype=np.int64)
+        if k == 0:
+            return best_pos, best_dist
+        query_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        for start in range(0, len(self), self._block_size):
+            block = self._vectors[start:start + self._block_size]
+            dist = query_norms - 2.0 * queries @ block.T + self._norms[start:start + len(block)][None, :]
+            candidates_dist = np.concatenate([best_dist, dist], axis=1)
+            candidates_pos = np.concatenate(
+                [best_pos, np.broadcast_to(np.arange(start, start + len(block)), dist.shape)], axis=1)
+            keep = np.argpartition(candidates_dist, k - 1, axis=1)[:, :k]
+            best_dist = np.take_along_axis(candidates_dist, keep, axis=1)
+            best_pos = np.take_along_axis(candidates_pos, keep, axis=1)
+        order = np.argsort(best_dist, axis=1, kind="stable")
+        best_dist = np.sqrt(np.maximum(np.take_along_axis(best_dist, order, axis=1), 0.0))
+        return self._ids[np.take_along_axis(best_pos, order, axis=1)], best_dist
+
+    def descriptors(self, ids: Iterable[int]) -> List[Dict[str, float]]:
+        """Unscaled descriptor values of stored rows, in DESCRIPTOR_COLUMNS order."""
+        if self._positions is None:
+            self._positions = {int(row_id): pos for pos, row_id in enumerate(self._ids)}
+        rows = []
+        for row_id in ids:
+            scaled = self._vectors[self._positions[int(row_id)], COMPOSITION_DIM:]
+            rows.append(dict(zip(DESCRIPTOR_COLUMNS, (scaled * self._std + self._mean).tolist())))
+        return rows
+
+    def _map_vectors(self, count: int):
+        self._vectors = np.memmap(os.path.join(self._path, _VECTORS_FILE), dtype=np.float32, mode="r",
+                                  shape=(count, FEATURE_DIM))
+
+    def _scale(self, vectors: np.ndarray) -> np.ndarray:
+        scaled = np.array(vectors, dtype=np.float32).reshape(-1, FEATURE_DIM)
+        scaled[:, COMPOSITION_DIM:] = (scaled[:, COMPOSITION_DIM:] - self._mean) / self._std
+        return scaled
+
+    def _write_meta(self, count: int):
+        meta = {"dim": FEATURE_DIM, "count": count, "mean": self._mean.tolist(), "std": self._std.tolist(),
+                "dataset": self.dataset}
+        tmp_path = os.path.join(self._path, _META_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self._path, _META_FILE))
@@ -3,8 +3,7 @@ from typing import Dict, Tuple
 import numpy as np
 import pandas as pd
 
-from perovskite_prediction_api.entities.v1.elements import Elements
-from perovskite_prediction_api.entities.v1.structure import SpaceGroup, Dimensions, Site
+from perovskite_prediction_api.entities.dictioanary import Elements, SpaceGroup, Dimensions, Site
 
 
 def compute_effective_radii(composition: Dict[str, Dict[str, float]]) -> Tuple[float, float, float] | None:
@@ -0,0 +1,208 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from perovskite_prediction_api.entities.dictioanary import Elements, Site
+from perovskite_prediction_api.features.band_gap_features import BAND_GAP_3D_SLOTS, INORGANIC_A_SITE_IONS, \
+    build_band_gap_feature_matrix
+from perovskite_prediction_api.features.calc_factors import compute_octahedral_factor_gradients, \
+    compute_octahedral_factors, compute_tolerance_factor_gradients, compute_tolerance_factors
+from perovskite_prediction_api.features.composition_features import SITE_TOTALS
+
+_SITES = (Site.A.value, Site.B.value, Site.C.value)
+
+
+@dataclass(frozen=True)
+class SweepAxis:
+    """
+    One swept coefficient: `ion` on `site` takes `num` values from `start` to `stop` (stoichiometric units,
+    e.g. Br from 0 to 3 on the C site). The other ions of the site keep their ratios and fill the rest.
+    """
+    site: str
+    ion: str
+    start: float
+    stop: float
+    num: int
+
+    @property
+    def label(self) -> str:
+        return f"{self.site}:{self.ion}"
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.linspace(self.start, self.stop, self.num)
+
+
+@dataclass
+class SweepResult:
+    """Every field has the grid shape (len(axis.values) for each axis, in order); derivatives are per axis."""
+    axes: List[SweepAxis]
+    valid: np.ndarray
+    r_A: np.ndarray
+    r_B: np.ndarray
+    r_C: np.ndarray
+    tolerance_factor: np.ndarray
+    octahedral_factor: np.ndarray
+    d_tolerance_factor: Dict[str, np.ndarray]
+    d_octahedral_factor: Dict[str, np.ndarray]
+    band_gap: np.ndarray | None = None
+
+    @property
+    def shape(self) -> tuple:
+        return self.valid.shape
+
+    def to_dict(self, decimals: int = 6) -> Dict[str, Any]:
+        """Compact form: axis values once, then every field flattened in row-major grid order."""
+        fields = {name: getattr(self, name) for name in ("r_A", "r_B", "r_C", "tolerance_factor",
+                                                          "octahedral_factor")}
+        if self.band_gap is not None:
+            fields["band_gap"] = self.band_gap
+        for label in self.d_tolerance_factor:
+            fields[f"d_tolerance_factor/d[{label}]"] = self.d_tolerance_factor[label]
+            fields[f"d_octahedral_factor/d[{label}]"] = self.d_octahedral_factor[label]
+        return {
+            "axes": [{"site": axis.site, "ion": axis.ion, "values": _to_list(axis.values, decimals)}
+                     for axis in self.axes],
+            "shape": list(self.shape),
+            "valid": self.valid.ravel().tolist(),
+            "fields": {name: _to_list(values, decimals) for name, values in fields.items()},
+        }
+
+
+def _to_list(values: np.ndarray, decimals: int) -> List[float | None]:
+    flat = np.round(np.asarray(values, dtype=np.float64).ravel(), decimals)
+    return [None if not np.isfinite(value) else value for value in flat.tolist()]
+
+
+def compute_sweep(base: Dict[str, Dict[str, float]],
+                  axes: Sequence[SweepAxis],
+                  band_gap_model=None) -> SweepResult:
+    """
+    Radii, tolerance/octahedral factors and their analytic derivatives over a grid of coefficient values,
+    computed by broadcasting instead of one `create_composition_dict` round trip per point.
+
+    Each site radius is linear in its swept coefficients: r = sum(x_i * r_i) + (1 - sum(x_i)) * r_rest with
+    x_i = coefficient / site total, so dr/dcoef_i = (r_i - r_rest) / site total and the factor derivatives
+    follow by the chain rule. Points where a site's swept coefficients exceed its total are invalid (NaN).
+    Args:
+        base (Dict[str, Dict[str, float]]): Base composition, e.g. {"A": {"MA": 1}, "B": {"Pb": 1}, "C": {"I": 3}}.
+        axes (Sequence[SweepAxis]): Swept coefficients, at most one axis per (site, ion).
+        band_gap_model: Optional 3D band gap model, evaluated on all valid points in one batch.
+    Returns:
+        SweepResult: Grid of shape (axis.num for each axis).
+    """
+    axes = list(axes)
+    if not axes:
+        raise ValueError("At least one sweep axis is required")
+    if len({(axis.site, axis.ion) for axis in axes}) != len(axes):
+        raise ValueError("Each (site, ion) can be swept by one axis only")
+    shape = tuple(axis.num for axis in axes)
+    site_ions = _site_ions(base, axes)
+
+    fractions: Dict[str, np.ndarray] = {}
+    radii: Dict[str, np.ndarray] = {}
+    slope: Dict[str, Dict[str, float]] = {site: {} for site in _SITES}
+    valid = np.ones(shape, dtype=bool)
+    for site in _SITES:
+        total = SITE_TOTALS[site]
+        ions = site_ions[site]
+        ion_radii = np.array([Elements.get_element_by_name(ion).ionic_radii for ion in ions])
+        base_fractions = np.array([base.get(site, {}).get(ion, 0.0) for ion in ions], dtype=np.float64)
+        swept = np.zeros(shape + (len(ions),))
+        swept_mask = np.zeros(len(ions), dtype=bool)
+        for k, axis in enumerate(axes):
+            if axis.site != site:
+                continue
+            position = ions.index(axis.ion)
+            swept_mask[position] = True
+            swept[..., position] = (axis.values / total).reshape([-1 if i == k else 1 for i in range(len(axes))])
+        rest = np.where(swept_mask, 0.0, base_fractions)
+        if rest.sum() <= 0:
+            if swept_mask.any():
+                raise ValueError(f"{site}-site needs at least one ion that is not swept")
+            raise ValueError(f"{site}-site of the base composition is empty")
+        rest = rest / rest.sum()
+        swept_total = swept.sum(axis=-1)
+        valid &= (swept >= 0).all(axis=-1) & (swept_total <= 1.0 + 1e-9)
+        site_fractions = swept + (1.0 - swept_total)[..., None] * rest
+        fractions[site] = site_fractions
+        radii[site] = site_fractions @ ion_radii
+        rest_radius = rest @ ion_radii
+        for axis in axes:
+            if axis.site == site:
+                slope[site][axis.label] = (ion_radii[ions.index(axis.ion)] - rest_radius) / total
+
+    r_A = np.where(valid, radii[Site.A.value], np.nan)
+    r_B = np.where(valid, radii[Site.B.value], np.nan)
+    r_C = np.where(valid, radii[Site.C.value], np.nan)
+    t_gradients = dict(zip(_SITES, compute_tolerance_factor_gradients(r_A, r_B, r_C)))
+    o_gradients = dict(zip((Site.B.value, Site.C.value), compute_octahedral_factor_gradients(r_B, r_C)))
+    d_tolerance, d_octahedral = {}, {}
+    for axis in axes:
+        dr = slope[axis.site][axis.label]
+        d_tolerance[axis.label] = t_gradients[axis.site] * dr
+        d_octahedral[axis.label] = o_gradients[axis.site] * dr if axis.site in o_gradients \
+            else np.where(valid, 0.0, np.nan)
+
+    result = SweepResult(
+        axes=axes,
+        valid=valid,
+        r_A=r_A,
+        r_B=r_B,
+        r_C=r_C,
+        tolerance_factor=compute_tolerance_factors(r_A, r_B, r_C),
+        octahedral_factor=compute_octahedral_factors(r_B, r_C),
+        d_tolerance_factor=d_tolerance,
+        d_octahedral_factor=d_octahedral,
+    )
+    if band_gap_model is not None:
+        result.band_gap = _predict_band_gap(band_gap_model, site_ions, fractions, result)
+    return result
+
+
+def _site_ions(base: Dict[str, Dict[str, float]], axes: Sequence[SweepAxis]) -> Dict[str, List[str]]:
+    unknown_sites = (set(base) | {axis.site for axis in axes}) - set(_SITES)
+    if unknown_sites:
+        raise ValueError(f"Unknown sites {sorted(unknown_sites)}")
+    site_ions = {}
+    for site in _SITES:
+        ions = [ion for ion, coef in base.get(site, {}).items() if coef > 0]
+        ions += [axis.ion for axis in axes if axis.site == site and axis.ion not in ions]
+        for ion in ions:
+            Elements.get_element_by_name(ion)
+        site_ions[site] = ions
+    return site_ions
+
+
+def _predict_band_gap(model, site_ions: Dict[str, List[str]], fractions: Dict[str, np.ndarray],
+                      result: SweepResult) -> np.ndarray:
+    """Band gap of every valid grid point, one batched `predict` call."""
+    valid = result.valid.ravel()
+    slot_codes, slot_coefs = {}, {}
+    is_inorganic = np.ones(valid.sum(), dtype=bool)
+    for site in _SITES:
+        ions = site_ions[site]
+        coefs = fractions[site].reshape(-1, len(ions))[valid] * SITE_TOTALS[site]
+        present = coefs > 1e-12
+        if (present.sum(axis=1) > BAND_GAP_3D_SLOTS[site]).any():
+            raise ValueError(f"The band gap model takes at most {BAND_GAP_3D_SLOTS[site]} ions on the {site}-site")
+        codes = np.array([Elements.get_element_by_name(ion).code for ion in ions], dtype=np.int64)
+        # Ions whose coefficient is 0 at a point leave their slot, like create_composition_dict drops them.
+        order = np.argsort(~present, axis=1, kind="stable")
+        present = np.take_along_axis(present, order, axis=1)
+        slot_codes[site] = np.where(present, codes[order], 0)
+        slot_coefs[site] = np.where(present, np.take_along_axis(coefs, order, axis=1), 0.0)
+        if site == Site.A.value:
+            inorganic = np.array([ion in INORGANIC_A_SITE_IONS for ion in ions])
+            is_inorganic = (~(coefs > 1e-12) | inorganic).all(axis=1)
+
+    features = build_band_gap_feature_matrix(
+        is_inorganic, slot_codes, slot_coefs,
+        result.r_A.ravel()[valid], result.r_B.ravel()[valid], result.r_C.ravel()[valid],
+        result.octahedral_factor.ravel()[valid], result.tolerance_factor.ravel()[valid],
+    )
+    band_gap = np.full(valid.shape, np.nan)
+    if len(features):
+        band_gap[valid] = model.predict(features)
+    return band_gap.reshape(result.shape)
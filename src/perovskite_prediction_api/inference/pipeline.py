@@ -0,0 +1,215 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.features.composition_features import FEATURE_VERSION, CompositionArrays, \
+    compute_composition_arrays
+from perovskite_prediction_api.features.encoders import CategoricalEncoder, EncoderSet
+from perovskite_prediction_api.features.feature_matrix import FeatureMatrix, FeatureSchema
+
+BAND_GAP_COLUMN = "Perovskite_band_gap"
+STABILITY_COLUMN = "TS80"
+# Per-row columns a feature matrix stores next to the features so stages can run from it alone.
+VALID_COLUMN = "valid"
+DIMENSION_COLUMN = "dimension"
+
+# Features left for the stability model at the end of stability_prediction.ipynb.
+STABILITY_FEATURES = [
+    "inorganic_composition", BAND_GAP_COLUMN,
+    "A_1", "A_2", "A_3", "A_4", "A_1_coef", "A_2_coef", "A_3_coef", "A_4_coef",
+    "B_1", "B_2", "B_1_coef", "B_2_coef",
+    "C_1", "C_2", "C_3", "C_1_coef", "C_2_coef", "C_3_coef",
+    "Cell_architecture", "ETL_stack_sequence", "Backcontact_stack_sequence",
+    "Perovskite_deposition_quenching_induced_crystallisation", "Perovskite_deposition_solvent_annealing",
+    "Cell_area_measured", "Encapsulation",
+    "r_A", "r_B", "r_C", "octahedral_factor", "tolerance_factor",
+]
+
+
+@dataclass(frozen=True)
+class ModelStage:
+    """
+    One model of the pipeline. It reads `features` from the shared buffer and writes its predictions
+    into the `output` column of the same buffer, so later stages can use them as inputs.
+
+    `dimensions` limits the stage to rows of those `Dimensions` codes (e.g. the band gap model was
+    trained on 3D perovskites only); other rows keep a given value when imputing and are NaN otherwise.
+    """
+    name: str
+    model: Any
+    output: str
+    features: Sequence[str] | None = None
+    impute: bool = False
+    dimensions: Sequence[int] | None = None
+
+    def feature_names(self) -> List[str]:
+        """Declared features, or the ones stored in the model when it was trained on a DataFrame."""
+        if self.features is not None:
+            return list(self.features)
+        names = getattr(self.model.get_booster(), "feature_names", None) if hasattr(self.model, "get_booster") \
+            else getattr(self.model, "feature_names_in_", None)
+        if not names:
+            raise ValueError(f"Stage '{self.name}' has no declared features and the model stores none")
+        return list(names)
+
+
+@dataclass
+class InferenceResult:
+    """
+    Shared float32 feature buffer after every stage ran, plus which rows each stage predicted.
+    `composition` is None when the features were read from a feature matrix.
+    """
+    columns: List[str]
+    buffer: np.ndarray
+    valid: np.ndarray
+    composition: CompositionArrays | None
+    predicted: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def column(self, name: str) -> np.ndarray:
+        """View (no copy) of one buffer column."""
+        return self.buffer[:, self.columns.index(name)]
+
+    def to_frame(self, columns: Sequence[str] | None = None, index=None) -> pd.DataFrame:
+        columns = list(columns or self.columns)
+        return pd.DataFrame({column: self.column(column) for column in columns}, index=index)
+
+
+class InferencePipeline:
+    """
+    Declarative multi-model inference over a prepared dataset, e.g. band gap imputation followed by
+    the stability model (stability_prediction.ipynb):
+
+        InferencePipeline([
+            ModelStage("band_gap", band_gap_model, output=BAND_GAP_COLUMN, impute=True,
+                       dimensions=[Dimensions.THREE_DIM.code]),
+            ModelStage("stability", stability_model, output=STABILITY_COLUMN, features=STABILITY_FEATURES),
+        ], encoders=encoders)
+
+    Every feature any stage needs is computed once, column by column, into one float32 buffer.
+    Imputing stages only predict rows whose output is missing and write the values back in place.
+    """
+
+    def __init__(self, stages: Sequence[ModelStage], encoders: EncoderSet | None = None):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = list(stages)
+        self.encoders = encoders or EncoderSet()
+        columns: List[str] = []
+        self._stage_features: Dict[str, List[int]] = {}
+        for stage in self.stages:
+            names = stage.feature_names()
+            columns += [name for name in names + [stage.output] if name not in columns]
+            self._stage_features[stage.name] = [columns.index(name) for name in names]
+        self.columns = columns
+        self._outputs = {stage.output for stage in self.stages}
+
+    def run(self, df: pd.DataFrame) -> InferenceResult:
+        """
+        Args:
+            df (pd.DataFrame): Rows with A_n/B_n/C_n slot columns and whatever raw columns the stages use.
+        Returns:
+            InferenceResult: Buffer with every feature and stage output; rows with an invalid composition
+                are never predicted.
+        """
+        buffer, composition = self.features(df)
+        predicted = self._run_stages(buffer, composition.valid, composition.dimension)
+        return InferenceResult(self.columns, buffer, composition.valid, composition, predicted)
+
+    def features(self, df: pd.DataFrame) -> Tuple[np.ndarray, CompositionArrays]:
+        """
+        Every pipeline column computed from `df` without running any stage: output columns hold the
+        values given in `df` (labels or measurements), NaN where it has none.
+        """
+        composition = compute_composition_arrays(df)
+        buffer = np.empty((len(df), len(self.columns)), dtype=np.float32)
+        for j, name in enumerate(self.columns):
+            buffer[:, j] = self._feature(name, df, composition)
+        return buffer, composition
+
+    def run_matrix(self, matrix: FeatureMatrix, rows: slice | np.ndarray | None = None) -> InferenceResult:
+        """
+        Run the stages on rows of a feature matrix written by `write_feature_matrix`. Only the selected
+        rows are copied out of the memory map, into the buffer the stages write to.
+        """
+        if matrix.schema.feature_version != FEATURE_VERSION:
+            raise ValueError(f"Feature matrix has feature version {matrix.schema.feature_version}, "
+                             f"expected {FEATURE_VERSION}")
+        missing = [column for column in self.columns + [VALID_COLUMN, DIMENSION_COLUMN]
+                   if column not in matrix.columns]
+        if missing:
+            raise ValueError(f"Feature matrix lacks columns {missing}")
+        rows = slice(None) if rows is None else rows
+        buffer = np.array(matrix.select(self.columns, rows), dtype=np.float32)
+        valid = matrix.column(VALID_COLUMN)[rows] == 1
+        predicted = self._run_stages(buffer, valid, matrix.column(DIMENSION_COLUMN)[rows])
+        return InferenceResult(self.columns, buffer, valid, None, predicted)
+
+    def write_feature_matrix(self, chunks: Iterable[pd.DataFrame], path: str) -> FeatureMatrix:
+        """
+        Store the raw pipeline columns of every chunk, plus row validity and dimension, in one feature
+        matrix. No stage runs, so label columns (e.g. TS80 of a training set) keep their given values;
+        training runs read it directly and serving runs the stages on it with `run_matrix`.
+        """
+        columns = [column for column in self.columns if column not in (VALID_COLUMN, DIMENSION_COLUMN)]
+        indices = [self.columns.index(column) for column in columns]
+        matrix = FeatureMatrix.create(path, FeatureSchema(tuple(columns + [VALID_COLUMN, DIMENSION_COLUMN]),
+                                                          FEATURE_VERSION))
+        for chunk in chunks:
+            buffer, composition = self.features(chunk)
+            matrix.append(np.column_stack([buffer[:, indices], composition.valid, composition.dimension]))
+        return matrix
+
+    def run_batches(self, chunks: Iterable[pd.DataFrame]) -> Iterator[InferenceResult]:
+        """Batch jobs: run over DataFrame chunks (e.g. `read_in_chunks` of a cleaned Parquet file)."""
+        for chunk in chunks:
+            yield self.run(chunk)
+
+    def _run_stages(self, buffer: np.ndarray, valid: np.ndarray, dimension: np.ndarray) -> Dict[str, np.ndarray]:
+        predicted = {}
+        for stage in self.stages:
+            out = self.columns.index(stage.output)
+            rows = valid.copy()
+            if stage.dimensions is not None:
+                rows &= np.isin(dimension, list(stage.dimensions))
+            if stage.impute:
+                rows &= np.isnan(buffer[:, out])
+            else:
+                buffer[~rows, out] = np.nan
+            predicted[stage.name] = rows
+            if rows.any():
+                buffer[rows, out] = stage.model.predict(self._inputs(buffer, rows, self._stage_features[stage.name]))
+        return predicted
+
+    @staticmethod
+    def _inputs(buffer: np.ndarray, rows: np.ndarray, indices: List[int]) -> np.ndarray:
+        contiguous = indices == list(range(indices[0], indices[0] + len(indices)))
+        if rows.all():
+            return buffer[:, indices[0]:indices[-1] + 1] if contiguous else buffer[:, indices]
+        selected = buffer[rows]
+        return selected[:, indices[0]:indices[-1] + 1] if contiguous else selected[:, indices]
+
+    def _feature(self, name: str, df: pd.DataFrame, composition: CompositionArrays) -> np.ndarray:
+        if name in self.encoders.encoders:
+            encoder = self.encoders[name]
+            if not isinstance(encoder, CategoricalEncoder):
+                raise ValueError(f"Feature '{name}' needs a CategoricalEncoder")
+            return encoder.encode(df[name]) if name in df else np.nan
+        if name not in self._outputs:
+            try:
+                return composition.column(name)
+            except KeyError:
+                pass
+        return _to_float(df[name]) if name in df else np.nan
+
+
+def _to_float(values: pd.Series) -> np.ndarray:
+    """Numeric or boolean ("True"/"False" strings included) column as float64, NaN for anything else."""
+    if values.dtype == object:
+        numeric = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.where(values.isin([True, "True"]), 1.0, np.where(values.isin([False, "False"]), 0.0, numeric))
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
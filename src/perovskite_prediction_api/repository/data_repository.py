@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from perovskite_prediction_api.etl.dataset_profile import DatasetProfile
+
+DATASET_EXTENSION = ".arrow"
+PROFILE_EXTENSION = ".profile.json"
+
+
+class AbstractDataRepository(ABC):
+    @abstractmethod
+    def list_datasets(self) -> List[str]:
+        pass
+
+    @abstractmethod
+    def get_dataset(self, name: str) -> pa.Table:
+        pass
+
+    @abstractmethod
+    def get_etag(self, name: str) -> str:
+        pass
+
+    @abstractmethod
+    def save_dataset(self, name: str, dataframe: pd.DataFrame | pa.Table):
+        pass
+
+    @abstractmethod
+    def append_rows(self, name: str, dataframe: pd.DataFrame | pa.Table):
+        pass
+
+    @abstractmethod
+    def get_profile(self, name: str) -> DatasetProfile:
+        pass
+
+
+class LocalDataRepository(AbstractDataRepository):
+    """
+    Datasets stored as Arrow IPC files in a local directory (`<name>.arrow`).
+
+    Tables are opened through a memory map, so reading columns or slices touches only the
+    pages that are actually needed and several workers share the same page cache.
+    """
+
+    def __init__(self, data_dir: str):
+        self._data_dir = data_dir
+        self._tables: Dict[str, Tuple[str, pa.Table]] = {}
+        self._lock = threading.Lock()
+
+    def list_datasets(self) -> List[str]:
+        if not os.path.isdir(self._data_dir):
+            return []
+        return sorted(
+            file_name[:-len(DATASET_EXTENSION)]
+            for file_name in os.listdir(self._data_dir)
+            if file_name.endswith(DATASET_EXTENSION)
+        )
+
+    def get_dataset(self, name: str) -> pa.Table:
+        etag = self.get_etag(name)
+        with self._lock:
+            cached = self._tables.get(name)
+            if cached is not None and cached[0] == etag:
+                return cached[1]
+            source = pa.memory_map(self._dataset_path(name), "r")
+            table = pa.ipc.open_file(source).read_all()
+            self._tables[name] = (etag, table)
+            return table
+
+    def get_etag(self, name: str) -> str:
+        path = self._dataset_path(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Dataset '{name}' not found in '{self._data_dir}'.")
+        key = f"{name}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def save_dataset(self, name: str, dataframe: pd.DataFrame | pa.Table):
+        table = _to_table(dataframe)
+        os.makedirs(self._data_dir, exist_ok=True)
+        self._write_table(name, [table], table.schema)
+        DatasetProfile().update(table).save(self._profile_path(name))
+
+    def append_rows(self, name: str, dataframe: pd.DataFrame | pa.Table):
+        """
+        Append rows to an existing dataset. The stored profile is updated from the new rows only.
+        """
+        existing = self.get_dataset(name)
+        new_rows = _to_table(dataframe).select(existing.column_names).cast(existing.schema)
+        self._write_table(name, [existing, new_rows], existing.schema)
+        profile_path = self._profile_path(name)
+        profile = DatasetProfile.load(profile_path) if os.path.exists(profile_path) else DatasetProfile().update(existing)
+        profile.update(new_rows).save(profile_path)
+
+    def get_profile(self, name: str) -> DatasetProfile:
+        """
+        Summary aggregates of a dataset, computed on first access if the dataset predates profiles.
+        """
+        profile_path = self._profile_path(name)
+        if not os.path.exists(profile_path):
+            DatasetProfile().update_batches(self.get_dataset(name).to_batches()).save(profile_path)
+        return DatasetProfile.load(profile_path)
+
+    def _write_table(self, name: str, tables: List[pa.Table], schema: pa.Schema):
+        path = self._dataset_path(name)
+        tmp_path = path + ".tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                for table in tables:
+                    writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _profile_path(self, name: str) -> str:
+        return self._dataset_path(name)[:-len(DATASET_EXTENSION)] + PROFILE_EXTENSION
+
+    def _dataset_path(self, name: str) -> str:
+        if os.path.basename(name) != name or name.startswith("."):
+            raise ValueError(f"Invalid dataset name '{name}'")
+        return os.path.join(self._data_dir, name + DATASET_EXTENSION)
+
+
+def _to_table(dataframe: pd.DataFrame | pa.Table) -> pa.Table:
+    return dataframe if isinstance(dataframe, pa.Table) else pa.Table.from_pandas(dataframe, preserve_index=False)
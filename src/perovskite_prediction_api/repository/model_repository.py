@@ -1,9 +1,11 @@
+import os
 import tempfile
 from abc import ABC, abstractmethod
 
-from xgboost import XGBRFRegressor
+from xgboost import XGBRegressor, XGBRFRegressor
 
 from perovskite_prediction_api.common.storage import GoogleDriveStorage
+from perovskite_prediction_api.features.encoders import EncoderSet
 
 
 class AbstractModelRepository(ABC):
@@ -11,6 +13,12 @@ class AbstractModelRepository(ABC):
     def get_band_gap_model_for_3d_perovskites(self):
         pass
 
+    def get_stability_model(self):
+        raise FileNotFoundError(f"{type(self).__name__} has no stability model")
+
+    def get_encoders(self) -> EncoderSet | None:
+        return None
+
     def _write_to_temp_file(self, model_bytes: bytes):
         with tempfile.NamedTemporaryFile(suffix=".json", delete=True) as f:
             f.write(model_bytes)
@@ -31,3 +39,31 @@ class GoogleModelRepository(AbstractModelRepository):
         model = XGBRFRegressor()
         model.load_model(tmp_path)
         return model
+
+
+class LocalModelRepository(AbstractModelRepository):
+    """Models saved in a local directory (saved_models/ of this repository by default)."""
+    BAND_GAP_3D_FILE = "xgboost_band_gap_3D.json"
+    STABILITY_FILE = "xgboost_stability.json"
+    ENCODERS_FILE = "encoders.bin"
+
+    def __init__(self, models_dir: str):
+        self._models_dir = models_dir
+
+    def get_band_gap_model_for_3d_perovskites(self) -> XGBRegressor:
+        return self._load_xgboost(self.BAND_GAP_3D_FILE)
+
+    def get_stability_model(self) -> XGBRegressor:
+        return self._load_xgboost(self.STABILITY_FILE)
+
+    def get_encoders(self) -> EncoderSet | None:
+        path = os.path.join(self._models_dir, self.ENCODERS_FILE)
+        return EncoderSet.load(path) if os.path.exists(path) else None
+
+    def _load_xgboost(self, filename: str) -> XGBRegressor:
+        path = os.path.join(self._models_dir, filename)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model '{filename}' not found in {self._models_dir}")
+        model = XGBRegressor()
+        model.load_model(path)
+        return model
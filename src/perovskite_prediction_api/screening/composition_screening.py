@@ -0,0 +1,337 @@
+import heapq
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from perovskite_prediction_api.entities.dictioanary import Elements, Site
+from perovskite_prediction_api.features.band_gap_features import BAND_GAP_3D_SLOTS, INORGANIC_A_SITE_IONS, \
+    build_band_gap_feature_matrix
+from perovskite_prediction_api.features.calc_factors import compute_tolerance_factors, compute_octahedral_factors
+from perovskite_prediction_api.features.composition_features import SITE_TOTALS
+
+
+@dataclass(frozen=True)
+class SiteSpace:
+    """
+    Allowed ions of one site and the coefficient grid they are mixed on.
+
+    `step` is in coefficient units, so for the C-site (total 3) a step of 0.15 is 5% of the site.
+    `max_ions` limits how many ions may share the site; defaults to the band gap model slot count.
+    """
+    ions: Sequence[str]
+    step: float = 0.05
+    max_ions: int | None = None
+
+    def __post_init__(self):
+        if not self.step > 0:
+            raise ValueError(f"Step must be positive, got {self.step}")
+
+
+@dataclass(frozen=True)
+class ScreeningCriteria:
+    """
+    Target windows (inclusive) and ranking for a screening run.
+
+    Candidates are ranked by distance of the predicted band gap to `band_gap_target` when it is set,
+    otherwise by distance of the tolerance factor to `tolerance_target`. The band gap criteria need a model.
+    """
+    tolerance_range: Tuple[float, float] = (0.8, 1.0)
+    octahedral_range: Tuple[float, float] = (0.414, 0.732)
+    band_gap_range: Tuple[float, float] | None = None
+    band_gap_target: float | None = None
+    tolerance_target: float = 0.95
+
+
+class _SiteTable:
+    """Every allowed mixture of one site as flat arrays, indexed by option number."""
+
+    def __init__(self, site: str, space: SiteSpace):
+        if not space.ions:
+            raise ValueError(f"No ions given for site '{site}'")
+        elements = [Elements.get_element_by_name(name) for name in space.ions]
+        total = SITE_TOTALS[site]
+        units = total / space.step
+        if not np.isclose(units, round(units)):
+            raise ValueError(f"Step {space.step} does not divide the {site}-site total {total}")
+        units = int(round(units))
+        slots = BAND_GAP_3D_SLOTS[site]
+        max_ions = min(space.max_ions or slots, len(elements))
+        if max_ions > slots:
+            raise ValueError(f"{site}-site supports at most {slots} ions, got max_ions={max_ions}")
+
+        fractions = np.array(list(_integer_partitions(units, len(elements), max_ions)), dtype=np.float64) / units
+        self.site = site
+        self.names = np.array([element.name for element in elements] + ["0"], dtype=object)
+        self.fractions = fractions
+        radii = np.array([element.ionic_radii for element in elements])
+        codes = np.array([element.code for element in elements], dtype=np.int64)
+        self.radii = fractions @ radii
+
+        # Compact slot layout: non-zero ions first, in the order they were given.
+        order = np.argsort(fractions == 0, axis=1, kind="stable")[:, :slots]
+        present = np.take_along_axis(fractions, order, axis=1) > 0
+        self.slot_index = np.where(present, order, len(elements))
+        self.slot_codes = np.where(present, codes[order], 0)
+        self.slot_coefs = np.where(present, np.take_along_axis(fractions, order, axis=1) * total, 0.0)
+        inorganic = np.array([element.name in INORGANIC_A_SITE_IONS for element in elements])
+        self.is_inorganic = ((fractions > 0) <= inorganic).all(axis=1)
+
+    def __len__(self):
+        return len(self.fractions)
+
+
+def _integer_partitions(units: int, parts: int, max_nonzero: int) -> Iterator[Tuple[int, ...]]:
+    """Yield all vectors of `parts` non-negative ints summing to `units` with at most `max_nonzero` non-zeros."""
+    for bars in itertools.combinations(range(units + parts - 1), parts - 1):
+        bounds = (-1,) + bars + (units + parts - 1,)
+        vector = tuple(bounds[i + 1] - bounds[i] - 1 for i in range(parts))
+        if sum(1 for v in vector if v) <= max_nonzero:
+            yield vector
+
+
+class ScreeningSpace:
+    """
+    Cartesian product of A, B and C site mixtures. Candidates are addressed by a flat index,
+    so any contiguous range can be materialized without touching the rest of the space.
+    """
+
+    def __init__(self, a_site: SiteSpace, b_site: SiteSpace, c_site: SiteSpace):
+        self._tables = {
+            Site.A.value: _SiteTable(Site.A.value, a_site),
+            Site.B.value: _SiteTable(Site.B.value, b_site),
+            Site.C.value: _SiteTable(Site.C.value, c_site),
+        }
+        self.shape = tuple(len(table) for table in self._tables.values())
+
+    def __len__(self):
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    @property
+    def tables(self) -> Dict[str, _SiteTable]:
+        return self._tables
+
+    def chunks(self, chunk_size: int) -> Iterator[Tuple[int, int]]:
+        """Yield (start, stop) ranges covering the whole space."""
+        for start in range(0, len(self), chunk_size):
+            yield start, min(start + chunk_size, len(self))
+
+    def option_indices(self, candidate_ids: np.ndarray) -> Dict[str, np.ndarray]:
+        """Split flat candidate ids into per-site option indices."""
+        indices = np.unravel_index(candidate_ids, self.shape)
+        return dict(zip(self._tables.keys(), indices))
+
+    def describe(self, candidate_ids: np.ndarray) -> pd.DataFrame:
+        """
+        Materialize candidates as slot columns (A_1, A_1_coef, ...) in the prepared dataset layout.
+        Args:
+            candidate_ids (np.ndarray): Flat candidate ids.
+        Returns:
+            pd.DataFrame: One row per candidate.
+        """
+        candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        options = self.option_indices(candidate_ids)
+        columns = {"candidate_id": candidate_ids}
+        for site, table in self._tables.items():
+            site_options = options[site]
+            for slot in range(table.slot_index.shape[1]):
+                columns[f"{site}_{slot + 1}"] = table.names[table.slot_index[site_options, slot]]
+                columns[f"{site}_{slot + 1}_coef"] = table.slot_coefs[site_options, slot]
+        return pd.DataFrame(columns)
+
+
+def score_chunk(space: ScreeningSpace,
+                criteria: ScreeningCriteria,
+                start: int,
+                stop: int,
+                model=None) -> Dict[str, np.ndarray]:
+    """
+    Compute factors (and band gap, if a model is given) for candidates [start, stop) and keep the matches.
+    Returns:
+        Dict[str, np.ndarray]: candidate_id, r_A, r_B, r_C, tolerance_factor, octahedral_factor,
+        band_gap and score arrays for the candidates inside every target window.
+    """
+    tables = space.tables
+    candidate_ids = np.arange(start, stop, dtype=np.int64)
+    options = space.option_indices(candidate_ids)
+    r_A = tables[Site.A.value].radii[options[Site.A.value]]
+    r_B = tables[Site.B.value].radii[options[Site.B.value]]
+    r_C = tables[Site.C.value].radii[options[Site.C.value]]
+    tolerance = compute_tolerance_factors(r_A, r_B, r_C)
+    octahedral = compute_octahedral_factors(r_B, r_C)
+    mask = _in_range(tolerance, criteria.tolerance_range) & _in_range(octahedral, criteria.octahedral_range)
+
+    selected = {site: site_options[mask] for site, site_options in options.items()}
+    result = {
+        "candidate_id": candidate_ids[mask],
+        "r_A": r_A[mask],
+        "r_B": r_B[mask],
+        "r_C": r_C[mask],
+        "tolerance_factor": tolerance[mask],
+        "octahedral_factor": octahedral[mask],
+        "band_gap": np.full(int(mask.sum()), np.nan),
+    }
+    if model is not None and len(result["candidate_id"]):
+        features = build_band_gap_feature_matrix(
+            is_inorganic=tables[Site.A.value].is_inorganic[selected[Site.A.value]],
+            slot_codes={site: tables[site].slot_codes[idx] for site, idx in selected.items()},
+            slot_coefs={site: tables[site].slot_coefs[idx] for site, idx in selected.items()},
+            r_A=result["r_A"],
+            r_B=result["r_B"],
+            r_C=result["r_C"],
+            octahedral_factor=result["octahedral_factor"],
+            tolerance_factor=result["tolerance_factor"],
+        )
+        result["band_gap"] = np.asarray(model.predict(features), dtype=np.float64)
+        if criteria.band_gap_range is not None:
+            keep = _in_range(result["band_gap"], criteria.band_gap_range)
+            result = {key: values[keep] for key, values in result.items()}
+
+    if model is not None and criteria.band_gap_target is not None:
+        result["score"] = np.abs(result["band_gap"] - criteria.band_gap_target)
+    else:
+        result["score"] = np.abs(result["tolerance_factor"] - criteria.tolerance_target)
+    return result
+
+
+def _in_range(values: np.ndarray, bounds: Tuple[float, float]) -> np.ndarray:
+    low, high = bounds
+    return (values >= low) & (values <= high)
+
+
+def _top_k(result: Dict[str, np.ndarray], k: int) -> Dict[str, np.ndarray]:
+    if len(result["score"]) <= k:
+        return result
+    keep = np.argpartition(result["score"], k - 1)[:k]
+    return {key: values[keep] for key, values in result.items()}
+
+
+_worker_state = {}
+
+
+def _init_worker(space: ScreeningSpace, criteria: ScreeningCriteria, model, top_k: int | None):
+    if model is not None and hasattr(model, "set_params"):
+        # One process per core already; keep each predictor single-threaded.
+        model.set_params(n_jobs=1)
+    _worker_state.update(space=space, criteria=criteria, model=model, top_k=top_k)
+
+
+def _score_chunk_in_worker(start: int, stop: int) -> Tuple[int, Dict[str, np.ndarray]]:
+    result = score_chunk(_worker_state["space"], _worker_state["criteria"], start, stop, _worker_state["model"])
+    matched = len(result["candidate_id"])
+    if _worker_state["top_k"] is not None:
+        result = _top_k(result, _worker_state["top_k"])
+    return matched, result
+
+
+@dataclass
+class ScreeningResult:
+    """Top candidates of a run together with how much of the space was evaluated and matched."""
+    top: pd.DataFrame
+    evaluated: int
+    matched: int
+    spill_path: str | None = None
+
+
+class CompositionScreener:
+    """
+    Streams a ScreeningSpace through `score_chunk` on a process pool. Only the top-k heap
+    and one chunk per worker are alive at a time, so memory does not depend on the space size.
+    """
+
+    def __init__(self,
+                 space: ScreeningSpace,
+                 criteria: ScreeningCriteria = ScreeningCriteria(),
+                 model=None,
+                 chunk_size: int = 200_000,
+                 max_workers: int | None = None):
+        if model is None and (criteria.band_gap_range is not None or criteria.band_gap_target is not None):
+            raise ValueError("band_gap_range and band_gap_target need a band gap model")
+        self._space = space
+        self._criteria = criteria
+        self._model = model
+        self._chunk_size = chunk_size
+        self._max_workers = max_workers or os.cpu_count() or 1
+
+    def run(self, top_k: int = 100, spill_path: str | None = None) -> ScreeningResult:
+        """
+        Screen the whole space.
+        Args:
+            top_k (int): Number of best-scored candidates to keep.
+            spill_path (str | None): If given, every match is appended to this Parquet file.
+        Returns:
+            ScreeningResult: Top candidates sorted by score.
+        """
+        # Min-heap on (-score, -candidate_id): the root is the worst candidate kept so far.
+        heap: List[Tuple[float, int, Dict[str, float]]] = []
+        writer = None
+        evaluated = matched = 0
+        try:
+            for (start, stop), chunk_matched, result in self._iter_results(None if spill_path else top_k):
+                evaluated += stop - start
+                matched += chunk_matched
+                if spill_path and len(result["candidate_id"]):
+                    table = self._to_table(result)
+                    if writer is None:
+                        writer = pq.ParquetWriter(spill_path, table.schema)
+                    writer.write_table(table)
+                    result = _top_k(result, top_k)
+                self._push(heap, result, top_k)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        rows = sorted((-neg_score, -neg_id, metrics) for neg_score, neg_id, metrics in heap)
+        top = self._space.describe(np.array([candidate_id for _, candidate_id, _ in rows], dtype=np.int64))
+        for key in ("r_A", "r_B", "r_C", "tolerance_factor", "octahedral_factor", "band_gap", "score"):
+            top[key] = [metrics[key] for _, _, metrics in rows]
+        return ScreeningResult(top=top, evaluated=evaluated, matched=matched, spill_path=spill_path)
+
+    def _iter_results(self, top_k: int | None) -> Iterator[Tuple[Tuple[int, int], int, Dict[str, np.ndarray]]]:
+        chunks = self._space.chunks(self._chunk_size)
+        if self._max_workers == 1:
+            for start, stop in chunks:
+                result = score_chunk(self._space, self._criteria, start, stop, self._model)
+                matched = len(result["candidate_id"])
+                yield (start, stop), matched, (_top_k(result, top_k) if top_k is not None else result)
+            return
+
+        with ProcessPoolExecutor(max_workers=self._max_workers,
+                                 initializer=_init_worker,
+                                 initargs=(self._space, self._criteria, self._model, top_k)) as executor:
+            # Bound the number of chunks in flight so finished results never pile up.
+            pending = {}
+            for start, stop in itertools.islice(chunks, 2 * self._max_workers):
+                pending[executor.submit(_score_chunk_in_worker, start, stop)] = (start, stop)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    bounds = pending.pop(future)
+                    yield bounds, *future.result()
+                    next_chunk = next(chunks, None)
+                    if next_chunk is not None:
+                        pending[executor.submit(_score_chunk_in_worker, *next_chunk)] = next_chunk
+
+    @staticmethod
+    def _push(heap: list, result: Dict[str, np.ndarray], top_k: int):
+        metrics_keys = [key for key in result if key != "candidate_id"]
+        for i, candidate_id in enumerate(result["candidate_id"]):
+            score = float(result["score"][i])
+            item = (-score, -int(candidate_id), {key: float(result[key][i]) for key in metrics_keys})
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+
+    def _to_table(self, result: Dict[str, np.ndarray]) -> pa.Table:
+        frame = self._space.describe(result["candidate_id"])
+        for key, values in result.items():
+            if key != "candidate_id":
+                frame[key] = values
+        return pa.Table.from_pandas(frame, preserve_index=False)
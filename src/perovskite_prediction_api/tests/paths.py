@@ -0,0 +1,3 @@
+import os
+
+MODELS_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "saved_models"))
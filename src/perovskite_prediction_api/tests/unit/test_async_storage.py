@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from perovskite_prediction_api.common.async_storage import AsyncFileStorage
+from perovskite_prediction_api.common.storage import FileStorage
+
+
+class SlowStorage(FileStorage):
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.downloads = 0
+        self._lock = threading.Lock()
+
+    def download_file(self, filepath: str) -> bytes:
+        with self._lock:
+            self.downloads += 1
+        time.sleep(self.delay)
+        if filepath.endswith("missing.csv"):
+            raise FileNotFoundError(filepath)
+        return filepath.encode()
+
+    def upload_file(self, filepath: str) -> bytes:
+        return filepath.encode()
+
+    def verify_existence(self, filepath: str) -> bool:
+        return True
+
+    def download_dataframe(self, filepath: str) -> pd.DataFrame:
+        return pd.read_csv(filepath)
+
+    def upload_dataframe(self, dataframe: pd.DataFrame, filepath: str, file_format: str):
+        return filepath
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_download():
+    storage = SlowStorage(delay=0.1)
+    async with AsyncFileStorage(storage, max_workers=2) as async_storage:
+        results = await asyncio.gather(*[async_storage.download_file("models/xgb.json") for _ in range(50)])
+        assert results == [b"models/xgb.json"] * 50
+        assert storage.downloads == 1
+        assert async_storage.in_flight() == 0
+
+        errors = await asyncio.gather(*[async_storage.download_file("raw/missing.csv") for _ in range(5)],
+                                      return_exceptions=True)
+        assert all(isinstance(error, FileNotFoundError) for error in errors)
+        assert storage.downloads == 2
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_cancellation_leave_other_waiters_alone():
+    storage = SlowStorage(delay=0.2)
+    async with AsyncFileStorage(storage, max_workers=1) as async_storage:
+        patient = asyncio.ensure_future(async_storage.download_file("a.csv"))
+        with pytest.raises(asyncio.TimeoutError):
+            await async_storage.download_file("a.csv", timeout=0.01)
+        assert await patient == b"a.csv"
+
+        # Occupy the only worker, then abandon a queued fetch: it never reaches the storage.
+        busy = asyncio.ensure_future(async_storage.download_file("b.csv"))
+        await asyncio.sleep(0.01)
+        abandoned = asyncio.ensure_future(async_storage.download_file("c.csv"))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        await busy
+        await asyncio.sleep(0.05)
+        assert storage.downloads == 2
+        assert async_storage.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_coalesced_dataframes_are_independent(tmp_path):
+    path = str(tmp_path / "data.csv")
+    pd.DataFrame({"band_gap": [1.6, 1.7]}).to_csv(path, index=False)
+    async with AsyncFileStorage(SlowStorage(delay=0)) as async_storage:
+        first, second = await asyncio.gather(async_storage.download_dataframe(path),
+                                             async_storage.download_dataframe(path))
+        first.loc[0, "band_gap"] = 9.9
+        first["extra"] = 1
+        assert second["band_gap"].tolist() == [1.6, 1.7]
+        assert "extra" not in second
@@ -0,0 +1,91 @@
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from perovskite_prediction_api.common.storage import FileStorage
+from perovskite_prediction_api.etl.cleaning import CleaningConfig, clean_csv_to_parquet, clean_storage_csv_to_parquet, \
+    decompose_ions
+
+
+def _write_raw(tmp_path):
+    data1 = pd.DataFrame({
+        "Unnamed: 0": [0, 1, 2],
+        "Ref_ID": [1, 2, 3],
+        "Perovskite_composition_a_ions": ["MA; FA", "Cs", "MA"],
+        "Perovskite_composition_a_ions_coefficients": ["0.5; 0.5", "1", "1"],
+        "Perovskite_composition_b_ions": ["Pb", "Pb; Sn", "Pb"],
+        "Perovskite_composition_b_ions_coefficients": ["1", "0.5; 0.5", "1"],
+        "Perovskite_composition_c_ions": ["I", "I; Br", "Br"],
+        "Perovskite_composition_c_ions_coefficients": ["3", "2; 1", "3"],
+        "Perovskite_band_gap": [1.6, None, 2.3],
+        "Perovskite_dimension_3D": [True, True, False],
+        "Mostly_empty": [None, None, "x"],
+        "Outdoor_time_start": ["2020", None, None],
+    })
+    data2 = data1.drop(columns=["Mostly_empty"]).iloc[:2]
+    paths = [str(tmp_path / "data1.csv"), str(tmp_path / "data2.csv")]
+    data1.to_csv(paths[0], index=False)
+    data2.to_csv(paths[1], index=False)
+    return paths
+
+
+def test_clean_csv_to_parquet(tmp_path):
+    paths = _write_raw(tmp_path)
+    output_path = str(tmp_path / "data.parquet")
+    plan = clean_csv_to_parquet(paths, output_path, CleaningConfig(nan_threshold=3, chunk_size=2))
+
+    assert plan.profile.row_count == 5
+    assert set(plan.dropped_columns) == {"Unnamed: 0", "Ref_ID", "Mostly_empty", "Outdoor_time_start"}
+    table = pq.read_table(output_path)
+    assert table.num_rows == 5
+    assert table.schema.field("Perovskite_band_gap").type == pa.float64()
+    assert table.schema.field("Perovskite_dimension_3D").type == pa.bool_()
+    df = table.to_pandas()
+    assert df["A_1"].tolist()[:3] == ["MA", "Cs", "MA"]
+    assert df["A_2"].tolist()[:3] == ["FA", "0", "0"]
+    assert df["C_2_coef"].tolist()[:3] == ["0", "1", "0"]
+
+
+def test_decompose_ions_drops_empty_items():
+    chunk = pd.DataFrame({"Perovskite_composition_a_ions": ["MA; ; FA", "; Cs", None],
+                          "Perovskite_composition_a_ions_coefficients": ["0.5;;0.5", " ;1", None]})
+    ions = decompose_ions(chunk, "A", 3)
+    coefs = decompose_ions(chunk, "A", 3, coefficient=True)
+    assert [ions[f"A_{i}"].tolist() for i in (1, 2, 3)] == [["MA", "Cs", "0"], ["FA", "0", "0"], ["0", "0", "0"]]
+    assert coefs["A_1_coef"].tolist() == ["0.5", "1", "0"]
+    assert coefs["A_2_coef"].tolist() == ["0.5", "0", "0"]
+
+
+class StreamingOnlyStorage(FileStorage):
+    """Local files behind the FileStorage interface; refuses whole-file downloads."""
+
+    def download_file(self, filepath: str) -> bytes:
+        raise AssertionError("whole-file download")
+
+    def download_to(self, filepath: str, fh):
+        with open(filepath, "rb") as f:
+            shutil.copyfileobj(f, fh, length=64)
+
+    def upload_file(self, filepath: str) -> bytes:
+        raise NotImplementedError
+
+    def verify_existence(self, filepath: str) -> bool:
+        return os.path.exists(filepath)
+
+    def download_dataframe(self, filepath: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def upload_dataframe(self, dataframe: pd.DataFrame, filepath: str, file_format: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+def test_clean_storage_csv_streams_downloads(tmp_path):
+    paths = _write_raw(tmp_path)
+    output_path = str(tmp_path / "data.parquet")
+    plan = clean_storage_csv_to_parquet(StreamingOnlyStorage(), paths, output_path,
+                                        CleaningConfig(nan_threshold=3, chunk_size=2))
+    assert plan.profile.row_count == 5
+    assert pq.read_table(output_path).num_rows == 5
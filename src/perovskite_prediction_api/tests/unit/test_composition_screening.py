@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from perovskite_prediction_api.features.calc_factors import compute_tolerance_factor
+from perovskite_prediction_api.screening.composition_screening import ScreeningSpace, SiteSpace, ScreeningCriteria, \
+    CompositionScreener
+
+
+def _space() -> ScreeningSpace:
+    return ScreeningSpace(
+        SiteSpace(["MA", "FA", "Cs"], step=0.1),
+        SiteSpace(["Pb", "Sn"], step=0.1),
+        SiteSpace(["I", "Br"], step=0.3),
+    )
+
+
+def test_space_enumerates_site_totals():
+    space = _space()
+    assert len(space) == np.prod(space.shape)
+    frame = space.describe(np.arange(len(space)))
+    assert np.allclose(frame[["A_1_coef", "A_2_coef", "A_3_coef"]].sum(axis=1), 1.0)
+    assert np.allclose(frame[["B_1_coef", "B_2_coef"]].sum(axis=1), 1.0)
+    assert np.allclose(frame[["C_1_coef", "C_2_coef"]].sum(axis=1), 3.0)
+
+
+@pytest.mark.parametrize("step", [0, -0.1, 0.07])
+def test_site_space_rejects_bad_steps(step):
+    with pytest.raises(ValueError):
+        ScreeningSpace(SiteSpace(["MA"], step=step), SiteSpace(["Pb"]), SiteSpace(["I"]))
+
+
+@pytest.mark.parametrize("criteria", [ScreeningCriteria(band_gap_range=(1.5, 1.8)),
+                                      ScreeningCriteria(band_gap_target=1.6)])
+def test_screener_rejects_band_gap_criteria_without_model(criteria):
+    with pytest.raises(ValueError):
+        CompositionScreener(_space(), criteria)
+
+
+def test_screener_keeps_top_k_within_windows():
+    criteria = ScreeningCriteria(tolerance_range=(0.85, 1.0), tolerance_target=0.9)
+    result = CompositionScreener(_space(), criteria, chunk_size=500, max_workers=1).run(top_k=10)
+    assert result.evaluated == len(_space())
+    assert len(result.top) == 10
+    assert result.top["tolerance_factor"].between(0.85, 1.0).all()
+    assert result.top["score"].is_monotonic_increasing
+    row = result.top.iloc[0]
+    assert np.isclose(row["tolerance_factor"], compute_tolerance_factor(row["r_A"], row["r_B"], row["r_C"]))
+
+
+def test_screener_parallel_matches_serial(tmp_path):
+    criteria = ScreeningCriteria(tolerance_range=(0.85, 1.0))
+    serial = CompositionScreener(_space(), criteria, chunk_size=500, max_workers=1).run(top_k=5)
+    spill_path = str(tmp_path / "matches.parquet")
+    parallel = CompositionScreener(_space(), criteria, chunk_size=500, max_workers=2).run(top_k=5,
+                                                                                         spill_path=spill_path)
+    assert serial.matched == parallel.matched
+    assert serial.top["candidate_id"].tolist() == parallel.top["candidate_id"].tolist()
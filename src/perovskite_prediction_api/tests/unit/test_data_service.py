@@ -0,0 +1,94 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from perovskite_prediction_api.api.data.data_router import get_data_service, router
+from perovskite_prediction_api.api.data.data_service import DataService
+from perovskite_prediction_api.features.similarity_index import SimilarityIndex, compute_similarity_vectors
+from perovskite_prediction_api.repository.data_repository import LocalDataRepository
+
+
+@pytest.fixture(name="data_service")
+def data_service_fixture(tmp_path) -> DataService:
+    repository = LocalDataRepository(str(tmp_path))
+    repository.save_dataset("prepared", pd.DataFrame({
+        "A_1": ["MA", "FA", "Cs", "MA"] * 50,
+        "B_1": ["Pb", "Pb", "Sn", "Pb"] * 50,
+        "Perovskite_dimension_3D": [True, False, True, True] * 50,
+        "band_gap": [1.6, 1.5, 1.7, 1.6] * 50,
+    }))
+    return DataService(repository)
+
+
+def test_scan_filters_and_projects(data_service):
+    page = data_service.scan("prepared", columns=["A_1"], filters={"dimension": "3D", "ion": "MA"})
+    table = pa.ipc.open_stream(b"".join(page.encode("arrow"))).read_all()
+    assert table.column_names == ["A_1"]
+    assert table.num_rows == 100
+    assert set(table["A_1"].to_pylist()) == {"MA"}
+
+
+def test_scan_paginates_with_cursor(data_service):
+    first = data_service.scan("prepared", filters={"ion": "Cs"}, limit=30, batch_size=7)
+    assert first.next_cursor is not None
+    second = data_service.scan("prepared", filters={"ion": "Cs"}, cursor=first.next_cursor, limit=30)
+    assert second.next_cursor is None
+    rows = [pq.read_table(io.BytesIO(b"".join(page.encode("parquet")))).num_rows for page in (first, second)]
+    assert rows == [30, 20]
+
+
+def test_etag_changes_with_query(data_service):
+    assert data_service.get_etag("prepared", ion="MA") == data_service.get_etag("prepared", ion="MA")
+    assert data_service.get_etag("prepared", ion="MA") != data_service.get_etag("prepared", ion="Cs")
+
+
+@pytest.mark.parametrize("header", ['"other", W/"{etag}"', "*", 'W/"{etag}"'])
+def test_export_returns_not_modified_for_matching_etags(data_service, header):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_data_service] = lambda: data_service
+    client = TestClient(app)
+    etag = data_service.get_etag("prepared", view="profile")
+    response = client.get("/data/datasets/prepared/profile", headers={"If-None-Match": header.format(etag=etag)})
+    assert response.status_code == 304
+    response = client.get("/data/datasets/prepared/profile", headers={"If-None-Match": '"other", W/"W/x"'})
+    assert response.status_code == 200
+
+
+def test_similar_finds_identical_row_given_as_fractions(tmp_path):
+    repository = LocalDataRepository(str(tmp_path))
+    prepared = pd.DataFrame({
+        "A_1": ["MA", "Cs", "FA"],
+        "A_1_coef": [1.0, 1.0, 1.0],
+        "B_1": ["Pb", "Sn", "Pb"],
+        "B_1_coef": [1.0, 1.0, 1.0],
+        "C_1": ["I", "Br", "I"],
+        "C_1_coef": [2.7, 3.0, 3.0],
+        "C_2": ["Br", "0", "0"],
+        "C_2_coef": [0.3, 0.0, 0.0],
+    })
+    repository.save_dataset("prepared", prepared.iloc[:2])
+    ids, vectors = compute_similarity_vectors(prepared.iloc[:2])
+    data_service = DataService(repository, SimilarityIndex.create(str(tmp_path / "index"), ids, vectors,
+                                                                  dataset="prepared"))
+    data_service.append_rows("prepared", prepared.iloc[2:])
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_data_service] = lambda: data_service
+    client = TestClient(app)
+    response = client.post("/data/similar", json={
+        "composition": {"A": {"MA": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 0.9, "Br": 0.1}}, "k": 3})
+    assert response.status_code == 200
+    nearest = response.json()[0]
+    assert nearest["id"] == 0 and nearest["distance"] == pytest.approx(0.0, abs=1e-3)
+    assert sorted(neighbour["id"] for neighbour in response.json()) == [0, 1, 2]
+
+    response = client.post("/data/similar", json={
+        "composition": {"A": {"FA": 0.5}, "B": {"Pb": 2.0}, "C": {"I": 1.0}}, "k": 1})
+    assert response.json()[0]["id"] == 2
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.etl.dataset_profile import DatasetProfile
+
+
+def _df() -> pd.DataFrame:
+    return pd.DataFrame({
+        "A_1": ["MA", "FA", "Cs", "MA", "FA"],
+        "A_2": ["0", "Cs", "0", "FA", "0"],
+        "B_1": ["Pb", "Pb", "Sn", "Pb", "Pb"],
+        "ETL_stack_sequence": ["TiO2-c | TiO2-mp", "SnO2-np", "TiO2-c | TiO2-mp", None, "SnO2-np"],
+        "Perovskite_band_gap": [1.6, np.nan, 1.7, np.nan, 1.5],
+        "Perovskite_deposition_solvents": ["DMF", "nan; nan", "nan; nan", "DMSO", None],
+    })
+
+
+def test_profile_matches_full_scan():
+    df = _df()
+    profile = DatasetProfile(heatmap_block_size=2).update(df)
+    assert profile.row_count == 5
+    assert profile.null_counts == df.isna().sum().to_dict()
+    assert profile.multi_nan_counts["Perovskite_deposition_solvents"] == 2
+    assert profile.ion_counts["A"] == {"MA": 2, "FA": 3, "Cs": 2}
+    assert profile.value_counts["ETL_stack_sequence"] == {"TiO2-c | TiO2-mp": 2, "SnO2-np": 2}
+    assert profile.columns_over_null_threshold(1) == ["Perovskite_band_gap"]
+    assert profile.null_heatmap["Perovskite_band_gap"] == [1, 1, 0]
+
+
+def test_incremental_update_equals_single_pass(tmp_path):
+    df = _df()
+    path = str(tmp_path / "data.profile.json")
+    DatasetProfile(heatmap_block_size=2).update(df.iloc[:3]).save(path)
+    incremental = DatasetProfile.load(path).update(df.iloc[3:])
+    assert incremental.to_dict() == DatasetProfile(heatmap_block_size=2).update(df).to_dict()
+    heatmap = incremental.null_heatmap_frame()
+    assert np.isclose(heatmap.loc[2, "Perovskite_deposition_solvents"], 1.0)
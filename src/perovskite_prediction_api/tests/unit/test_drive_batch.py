@@ -0,0 +1,119 @@
+import json
+import re
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from perovskite_prediction_api.common.http import PooledHttp
+from perovskite_prediction_api.common.storage import GoogleDriveStorage
+
+
+class FakeDrive:
+    """Minimal Drive v3: files.list by name, media download, files.delete and the multipart batch endpoint."""
+
+    def __init__(self, files):
+        self.files = dict(files)
+        self.client_ports = set()
+        self.batches = 0
+
+    def handle(self, method, path):
+        url = urlparse(path)
+        if method == "GET" and url.path == "/drive/v3/files":
+            name = re.match(r'name="(.*)"', parse_qs(url.query)["q"][0]).group(1)
+            files = [dict(file, id=file_id) for file_id, file in self.files.items() if file["name"] == name]
+            return 200, {"files": files}
+        match = re.fullmatch(r"/drive/v3/files/([^/]+)", url.path)
+        if method == "GET" and match and parse_qs(url.query).get("alt") == ["media"]:
+            return 200, self.files[match.group(1)].get("content", "").encode()
+        if method == "DELETE" and match:
+            if self.files.pop(match.group(1), None) is None:
+                return 404, {"error": {"code": 404, "message": "File not found"}}
+            return 204, None
+        return 404, {"error": {"code": 404, "message": "Unknown path"}}
+
+
+def _handler(drive: FakeDrive):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, body: bytes, content_type="application/json"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            drive.client_ports.add(self.client_address[1])
+            status, payload = drive.handle("GET", self.path)
+            if isinstance(payload, bytes):
+                self._reply(status, payload, "application/octet-stream")
+            else:
+                self._reply(status, json.dumps(payload).encode())
+
+        def do_POST(self):
+            drive.client_ports.add(self.client_address[1])
+            assert self.path == "/batch/drive/v3"
+            drive.batches += 1
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body)
+            parts = []
+            for part in message.get_payload():
+                method, path, _ = part.get_payload().split("\n", 1)[0].split(" ")
+                status, payload = drive.handle(method, path)
+                content = json.dumps(payload) if payload is not None else ""
+                parts.append(
+                    f"--boundary\r\nContent-Type: application/http\r\n"
+                    f"Content-ID: <response-{part['Content-ID'].strip('<>')}>\r\n\r\n"
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n\r\n{content}\r\n")
+            self._reply(200, ("".join(parts) + "--boundary--").encode(), "multipart/mixed; boundary=boundary")
+
+    return Handler
+
+
+@pytest.fixture(name="fake_drive")
+def fake_drive_fixture():
+    drive = FakeDrive({f"id{i}": {"name": f"file{i}.csv", "size": str(i)} for i in range(150)})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(drive))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    drive.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield drive
+    server.shutdown()
+
+
+def test_batched_metadata_operations(fake_drive):
+    storage = GoogleDriveStorage(AnonymousCredentials(), http=PooledHttp(), root_url=fake_drive.url)
+    paths = [f"perovskite/raw/file{i}.csv" for i in range(150)] + ["perovskite/raw/missing.csv"]
+
+    existence = storage.verify_existence_many(paths)
+    assert sum(existence.values()) == 150 and not existence["perovskite/raw/missing.csv"]
+    assert fake_drive.batches == 2
+
+    stats = storage.stat_many(paths[:2] + paths[-1:])
+    assert stats[paths[1]].file_id == "id1" and stats[paths[1]].size == 1
+    assert stats[paths[-1]] is None
+
+    deleted = storage.delete_many(paths[:3] + paths[-1:])
+    assert deleted == {paths[0]: True, paths[1]: True, paths[2]: True, paths[-1]: False}
+    assert not storage.verify_existence(paths[0])
+    # Every call above went over the same keep-alive connection.
+    assert len(fake_drive.client_ports) == 1
+
+
+def test_download_streams_into_file_handle(fake_drive, tmp_path):
+    fake_drive.files["id0"]["content"] = "Ref_ID\n1\n2\n"
+    storage = GoogleDriveStorage(AnonymousCredentials(), http=PooledHttp(), root_url=fake_drive.url)
+    path = tmp_path / "file0.csv"
+    with open(path, "wb") as f:
+        storage.download_to("perovskite/raw/file0.csv", f)
+    assert path.read_text() == "Ref_ID\n1\n2\n"
+    assert storage.download_file("perovskite/raw/file0.csv") == b"Ref_ID\n1\n2\n"
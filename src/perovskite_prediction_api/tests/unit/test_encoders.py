@@ -0,0 +1,65 @@
+import enum
+
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.entities.dictioanary import Layers
+from perovskite_prediction_api.features import encoders as encoders_module
+from perovskite_prediction_api.features.encoders import CategoricalEncoder, LayerSequenceEncoder, EncoderSet, \
+    UNKNOWN_CODE, tokenize_stack_sequences
+
+ETL = pd.Series(["TiO2-c | TiO2-mp", "SnO2-np", "TiO2-c | TiO2-mp", None, "PCBM-60 | BCP", "SnO2-np"])
+
+
+def test_tokenize_stack_sequences():
+    offsets, tokens = tokenize_stack_sequences(ETL)
+    assert offsets.tolist() == [0, 2, 3, 5, 5, 7, 8]
+    assert tokens.tolist() == ["TiO2-c", "TiO2-mp", "SnO2-np", "TiO2-c", "TiO2-mp", "PCBM-60", "BCP", "SnO2-np"]
+
+
+def test_categorical_encoder_with_threshold():
+    encoder = CategoricalEncoder.fit(ETL, min_frequency=2)
+    codes = encoder.encode(ETL)
+    assert codes[3] == UNKNOWN_CODE and codes[4] == UNKNOWN_CODE
+    assert codes[0] == codes[2] != UNKNOWN_CODE
+    assert encoder.decode(codes)[[0, 1]].tolist() == ["TiO2-c | TiO2-mp", "SnO2-np"]
+
+
+def test_layer_encoder_keeps_dictionary_codes():
+    encoder = LayerSequenceEncoder.fit(ETL)
+    offsets, codes = encoder.encode(ETL)
+    assert codes[0] == Layers.TIO2_C.code
+    assert codes[1] == Layers.TIO2_MP.code
+    assert encoder.decode(offsets, codes)[0] == "TiO2-c | TiO2-mp"
+
+
+def test_layer_encoder_handles_gaps_in_dictionary_codes(monkeypatch):
+    class GappedLayers(enum.Enum):
+        TIO2_C = ("TiO2-c", 1)
+        SNO2_NP = ("SnO2-np", 4)
+
+        @property
+        def layer_name(self):
+            return self.value[0]
+
+        @property
+        def code(self):
+            return self.value[1]
+
+    monkeypatch.setattr(encoders_module, "Layers", GappedLayers)
+    encoder = LayerSequenceEncoder.fit(ETL)
+    offsets, codes = encoder.encode(ETL)
+    assert codes[0] == 1 and codes[2] == 4
+    assert codes[1] > 4
+    assert encoder.decode(offsets, codes).tolist() == ["TiO2-c | TiO2-mp", "SnO2-np", "TiO2-c | TiO2-mp", "",
+                                                       "PCBM-60 | BCP", "SnO2-np"]
+
+
+def test_encoder_set_roundtrip(tmp_path):
+    encoders = EncoderSet({"ETL_stack_sequence": CategoricalEncoder.fit(ETL), "ETL_layers": LayerSequenceEncoder.fit(ETL)})
+    path = str(tmp_path / "encoders.bin")
+    encoders.save(path)
+    loaded = EncoderSet.load(path)
+    assert np.array_equal(loaded["ETL_stack_sequence"].encode(ETL), encoders["ETL_stack_sequence"].encode(ETL))
+    assert isinstance(loaded["ETL_layers"], LayerSequenceEncoder)
+    assert loaded["ETL_layers"].vocabulary.tokens == encoders["ETL_layers"].vocabulary.tokens
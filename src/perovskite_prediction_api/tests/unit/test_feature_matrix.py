@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from perovskite_prediction_api.features.feature_matrix import FeatureMatrix, FeatureSchema
+
+
+def test_create_append_and_reopen(tmp_path):
+    path = str(tmp_path / "features.fmx")
+    schema = FeatureSchema(("r_A", "r_B", "r_C", "band_gap"), feature_version="1")
+    writer = FeatureMatrix.create(path, schema, np.arange(8).reshape(2, 4))
+    reader = FeatureMatrix.open(path, feature_version="1")
+    assert len(reader) == 2 and reader.columns == schema.columns
+
+    writer.append(pd.DataFrame({"band_gap": [1.6], "r_C": [2.2], "r_B": [1.19], "r_A": [2.17]}))
+    assert len(reader) == 2
+    reader.refresh()
+    assert len(reader) == 3
+    np.testing.assert_allclose(reader.values[2], [2.17, 1.19, 2.2, 1.6], rtol=1e-6)
+    assert reader.values.dtype == np.float32
+    assert np.shares_memory(reader.select(["r_B", "r_C"]), reader.values)
+    np.testing.assert_array_equal(reader.select(["band_gap", "r_A"])[:2], [[3, 0], [7, 4]])
+
+    with pytest.raises(ValueError):
+        FeatureMatrix.open(path, feature_version="2")
+    with pytest.raises(ValueError):
+        writer.append(np.zeros((1, 3)))
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.etl.fingerprint import FingerprintSet, compute_fingerprints, deduplicate_chunks
+
+
+def _frame():
+    return pd.DataFrame({
+        "A_1": ["MA", "FA", "MA", "Cs"],
+        "A_2": ["FA", "MA", "FA", "0"],
+        "A_1_coef": ["0.5", "1", "0.5", "1"],
+        "A_2_coef": ["0.5", "1", "0.5", "0"],
+        "B_1": ["Pb", "Pb", "Pb", "Pb"],
+        "B_1_coef": ["1", "1", "1", "1"],
+        "C_1": ["I", "I", "I", "I"],
+        "C_1_coef": ["3", "3", "3", "3"],
+        "band_gap": [1.6, 1.6, 1.7, 1.7],
+    })
+
+
+def test_fingerprint_ignores_slot_order_and_scale():
+    fingerprints = compute_fingerprints(_frame(), ["band_gap"])
+
+    assert fingerprints.dtype == np.uint64
+    assert fingerprints[0] == fingerprints[1]
+    assert len(set(fingerprints[1:])) == 3
+    assert compute_fingerprints(_frame())[0] == compute_fingerprints(_frame())[2]
+
+
+def test_null_and_zero_slots_fingerprint_the_same():
+    frame = _frame()
+    variants = pd.concat([frame.iloc[[3]]] * 4, ignore_index=True).astype(object)
+    variants.loc[1, "A_2"] = None
+    variants.loc[2, "A_2"] = pd.NA
+    variants.loc[3, "A_2"] = "None"
+    assert len(set(compute_fingerprints(variants, ["band_gap"]))) == 1
+
+
+def test_incremental_deduplication(tmp_path):
+    path = str(tmp_path / "fingerprints.u64")
+    frame = _frame()
+    seen = FingerprintSet(path)
+    first = pd.concat(deduplicate_chunks([frame.iloc[:2], frame.iloc[2:3]], ["band_gap"], seen))
+    assert first.index.tolist() == [0, 2]
+    seen.save()
+
+    history = FingerprintSet(path)
+    assert len(history) == 2
+    history.add(np.array([7, 7, 8], dtype=np.uint64))
+    assert len(history) == 4 and history.contains(np.array([8, 9], dtype=np.uint64)).tolist() == [True, False]
+    history.save()
+    assert len(FingerprintSet(path)) == 4
+    new = pd.concat(deduplicate_chunks([frame], ["band_gap"], history))
+    assert new.index.tolist() == [3]
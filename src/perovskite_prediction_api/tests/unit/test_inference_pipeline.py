@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from perovskite_prediction_api.api.prediction.prediction_router import get_prediction_service, router
+from perovskite_prediction_api.api.prediction.prediction_service import PredictionService
+from perovskite_prediction_api.entities.dictioanary import Dimensions, Elements, Site
+from perovskite_prediction_api.features.band_gap_features import BAND_GAP_3D_FEATURES, BAND_GAP_3D_SLOTS, \
+    INORGANIC_A_SITE_IONS
+from perovskite_prediction_api.features.calc_factors import compute_octahedral_factor, compute_tolerance_factor
+from perovskite_prediction_api.features.composition_features import FEATURE_VERSION
+from perovskite_prediction_api.features.feature_matrix import FeatureMatrix
+from perovskite_prediction_api.features.structure_features import compute_effective_radii, compute_space_group, \
+    create_composition_dict
+from perovskite_prediction_api.inference.pipeline import BAND_GAP_COLUMN, InferencePipeline, ModelStage
+from perovskite_prediction_api.repository.model_repository import LocalModelRepository
+from perovskite_prediction_api.tests.paths import MODELS_DIR
+
+
+class BandGapTimesTwo:
+    """Stand-in stability model: reads the (possibly imputed) band gap."""
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        return features[:, 0] * 2
+
+
+@pytest.fixture(name="band_gap_model")
+def band_gap_model_fixture():
+    return LocalModelRepository(MODELS_DIR).get_band_gap_model_for_3d_perovskites()
+
+
+def _frame():
+    return pd.DataFrame({
+        "A_1": ["MA", "Cs", "FA", "XX"], "A_2": ["FA", "0", "0", "0"],
+        "A_1_coef": ["0.5", "1", "1", "1"], "A_2_coef": ["0.5", "0", "0", "0"],
+        "B_1": ["Pb", "Pb", "Sn", "Pb"], "B_1_coef": ["1", "1", "1", "1"],
+        "C_1": ["I", "I", "I", "I"], "C_2": ["Br", "0", "0", "0"],
+        "C_1_coef": ["2.7", "3", "3", "3"], "C_2_coef": ["0.3", "0", "0", "0"],
+        "Perovskite_dimension_3D": [True, True, True, True],
+        BAND_GAP_COLUMN: [np.nan, 1.73, np.nan, np.nan],
+    })
+
+
+def _scalar_band_gap_features(row: pd.Series) -> dict:
+    """BAND_GAP_3D_FEATURES of one row through the per-row helpers the notebooks use."""
+    composition = create_composition_dict(row)
+    r_A, r_B, r_C = compute_effective_radii(composition)
+    tolerance = compute_tolerance_factor(r_A, r_B, r_C)
+    is_inorganic = all(ion in INORGANIC_A_SITE_IONS for ion in composition[Site.A.value])
+    features = {"inorganic_composition": float(is_inorganic), "r_A": r_A, "r_B": r_B, "r_C": r_C,
+                "octahedral_factor": compute_octahedral_factor(r_B, r_C), "tolerance_factor": tolerance,
+                "space_group": compute_space_group(tolerance, Dimensions.THREE_DIM.value, is_inorganic)[1]}
+    for site, slots in BAND_GAP_3D_SLOTS.items():
+        ions = list(composition[site].items())
+        for i in range(slots):
+            name, coef = ions[i] if i < len(ions) else (None, 0.0)
+            features[f"{site}_{i + 1}"] = Elements.get_element_by_name(name).code if name else 0
+            features[f"{site}_{i + 1}_coef"] = coef
+    return features
+
+
+def test_band_gap_is_imputed_in_place_before_stability(band_gap_model):
+    pipeline = InferencePipeline([
+        ModelStage("band_gap", band_gap_model, output=BAND_GAP_COLUMN, impute=True),
+        ModelStage("stability", BandGapTimesTwo(), output="TS80", features=[BAND_GAP_COLUMN]),
+    ])
+    frame = _frame()
+    result = pipeline.run(frame)
+
+    assert result.predicted["band_gap"].tolist() == [True, False, True, False]
+    band_gap = result.column(BAND_GAP_COLUMN)
+    assert band_gap[1] == np.float32(1.73) and np.isnan(band_gap[3])
+    features = result.to_frame(BAND_GAP_3D_FEATURES).iloc[:3]
+    expected = pd.DataFrame([_scalar_band_gap_features(row) for _, row in frame.iloc[:3].iterrows()])
+    for column in BAND_GAP_3D_FEATURES:
+        np.testing.assert_allclose(features[column], expected[column], rtol=1e-6, err_msg=column)
+    expected_band_gap = band_gap_model.predict(expected[BAND_GAP_3D_FEATURES].to_numpy(dtype=np.float32))
+    np.testing.assert_allclose(band_gap[[0, 2]], expected_band_gap[[0, 2]], rtol=1e-6)
+    np.testing.assert_allclose(result.column("TS80")[:3], band_gap[:3] * 2)
+    assert np.isnan(result.column("TS80")[3])
+
+
+def test_band_gap_stage_is_limited_to_3d_rows(band_gap_model):
+    pipeline = InferencePipeline([ModelStage("band_gap", band_gap_model, output=BAND_GAP_COLUMN, impute=True,
+                                             dimensions=[Dimensions.THREE_DIM.code])])
+    frame = _frame()
+    frame["Perovskite_dimension_3D"] = [True, False, False, True]
+    frame["Perovskite_dimension_2D"] = [False, True, True, False]
+    result = pipeline.run(frame)
+
+    assert result.predicted["band_gap"].tolist() == [True, False, False, False]
+    band_gap = result.column(BAND_GAP_COLUMN)
+    assert band_gap[1] == np.float32(1.73) and np.isnan(band_gap[2])
+
+
+def test_unknown_dimension_is_rejected():
+    service = PredictionService(LocalModelRepository(MODELS_DIR))
+    composition = {"A": {"MA": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 3.0}}
+    prediction = service.predict([{"composition": composition, "dimension": "bogus"}])[0]
+    assert not prediction["valid"] and prediction["band_gap"] is None and prediction["space_group"] is None
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_prediction_service] = lambda: service
+    response = TestClient(app).post("/prediction/predict", json={
+        "perovskites": [{"composition": composition, "dimension": "bogus"}]})
+    assert response.status_code == 422
+
+
+def test_prediction_service(band_gap_model):
+    service = PredictionService(LocalModelRepository(MODELS_DIR))
+    predictions = service.predict([
+        {"composition": {"A": {"MA": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 3.0}}},
+        {"composition": {"A": {"Cs": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 3.0}}, "band_gap": 1.73},
+    ])
+
+    assert not service.has_stability_model
+    assert predictions[0]["band_gap_imputed"] and predictions[0]["space_group"] == "Pm3m"
+    assert predictions[1]["band_gap"] == pytest.approx(1.73) and not predictions[1]["band_gap_imputed"]
+    assert predictions[1]["stability"] is None
+
+
+def test_feature_matrix_keeps_labels_and_serves_predictions(band_gap_model, tmp_path):
+    pipeline = InferencePipeline([
+        ModelStage("band_gap", band_gap_model, output=BAND_GAP_COLUMN, impute=True,
+                   dimensions=[Dimensions.THREE_DIM.code]),
+        ModelStage("stability", BandGapTimesTwo(), output="TS80", features=[BAND_GAP_COLUMN]),
+    ])
+    frame = _frame().assign(TS80=[100.0, 200.0, np.nan, 300.0])
+    path = str(tmp_path / "train.fmx")
+    pipeline.write_feature_matrix([frame.iloc[:2], frame.iloc[2:]], path)
+
+    matrix = FeatureMatrix.open(path, feature_version=FEATURE_VERSION)
+    np.testing.assert_array_equal(matrix.column("TS80"), np.float32([100, 200, np.nan, 300]))
+    assert np.isnan(matrix.column(BAND_GAP_COLUMN)[[0, 2, 3]]).all()
+    assert matrix.column(BAND_GAP_COLUMN)[1] == np.float32(1.73)
+
+    served = pipeline.run_matrix(matrix, slice(1, 4))
+    direct = pipeline.run(frame)
+    np.testing.assert_allclose(served.buffer, direct.buffer[1:], rtol=1e-6, equal_nan=True)
+    assert served.predicted["band_gap"].tolist() == direct.predicted["band_gap"][1:].tolist()
+
+
+def test_prediction_service_reads_dataset_feature_matrix(tmp_path):
+    service = PredictionService(LocalModelRepository(MODELS_DIR), str(tmp_path))
+    service.write_feature_matrix("prepared", [_frame()])
+    reader = PredictionService(LocalModelRepository(MODELS_DIR), str(tmp_path))
+    predictions = reader.predict_dataset("prepared", offset=1, limit=2)
+
+    assert [prediction["row"] for prediction in predictions] == [1, 2]
+    assert predictions[0]["band_gap"] == pytest.approx(1.73) and not predictions[0]["band_gap_imputed"]
+    assert predictions[1]["band_gap_imputed"]
+    with pytest.raises(FileNotFoundError):
+        reader.predict_dataset("missing")
@@ -0,0 +1,35 @@
+import socket
+
+import pytest
+
+from perovskite_prediction_api.benchmarks.load_test import LoadTestConfig, compare_reports, run_load_test
+from perovskite_prediction_api.tests.paths import MODELS_DIR
+
+
+def test_inprocess_load_test(tmp_path):
+    config = LoadTestConfig(concurrency=4, duration=30, max_requests=24, warmup_requests=0, batch_size=8,
+                            export_limit=50, dataset_rows=500, models_dir=MODELS_DIR)
+    report = run_load_test(config, str(tmp_path))
+
+    assert report["total"]["requests"] == 24
+    assert report["total"]["error_rate"] == 0
+    assert set(report["scenarios"]) == {"predict_single", "predict_batch", "predict_dataset", "export"}
+    assert report["total"]["p50_ms"] <= report["total"]["p99_ms"]
+    assert report["workers"][0]["rss_mb"] > 0
+    assert compare_reports(report, report)["total"]["throughput_rps"] == 0
+
+
+def test_gunicorn_load_test(tmp_path):
+    pytest.importorskip("gunicorn")
+    pytest.importorskip("uvicorn.workers")
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config = LoadTestConfig(mode="gunicorn", workers=2, concurrency=4, duration=30, max_requests=12,
+                            warmup_requests=2, batch_size=4, export_limit=20, dataset_rows=200, port=port,
+                            models_dir=MODELS_DIR)
+    report = run_load_test(config, str(tmp_path))
+
+    assert report["total"]["requests"] == 12
+    assert report["total"]["error_rate"] == 0
+    assert len(report["workers"]) == 2 and all(worker["rss_mb"] > 0 for worker in report["workers"])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from perovskite_prediction_api.entities.dictioanary import Elements, Site
+from perovskite_prediction_api.features.calc_factors import compute_tolerance_factor
+from perovskite_prediction_api.features.similarity_index import COMPOSITION_DIM, FEATURE_DIM, SimilarityIndex, \
+    compute_similarity_vectors, compute_similarity_vector
+from perovskite_prediction_api.features.structure_features import compute_effective_polarizability, \
+    compute_effective_radii, compute_shannon_entropy, create_composition_dict
+
+
+def _prepared_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        "A_1": ["MA", "FA", "Cs", "MA"],
+        "A_1_coef": [1.0, 1.0, 1.0, 0.5],
+        "A_2": [0, 0, 0, "FA"],
+        "A_2_coef": [0, 0, 0, 0.5],
+        "B_1": ["Pb", "Pb", "Sn", "Pb"],
+        "B_1_coef": [1.0, 1.0, 1.0, 1.0],
+        "C_1": ["I", "I", "Br", "I"],
+        "C_1_coef": [3.0, 3.0, 3.0, 3.0],
+    }, index=[10, 11, 12, 13])
+
+
+def _scalar_vector(composition) -> np.ndarray:
+    vector = np.zeros(FEATURE_DIM)
+    for site in (Site.A.value, Site.B.value, Site.C.value):
+        for name, coef in composition[site].items():
+            vector[Elements.get_element_by_name(name).code - 1] += coef / (3.0 if site == Site.C.value else 1.0)
+    r_A, r_B, r_C = compute_effective_radii(composition)
+    vector[COMPOSITION_DIM:] = [
+        r_A, r_B, r_C, compute_tolerance_factor(r_A, r_B, r_C),
+        *(compute_effective_polarizability(composition, site) for site in ("A", "B", "C")),
+        compute_shannon_entropy(composition, "A"), compute_shannon_entropy(composition, "C"),
+    ]
+    return vector
+
+
+def test_vectors_match_scalar_path():
+    df = _prepared_df()
+    df.loc[14] = ["XX", 1.0, 0, 0, "Pb", 1.0, "I", 3.0]
+    df.loc[15] = ["MA", 2.0, 0, 0, "Pb", 0.5, "I", 1.0]
+    ids, vectors = compute_similarity_vectors(df, first_row=100)
+    assert ids.tolist() == [100, 101, 102, 103, 105]
+    for row_id, vector in zip(ids, vectors):
+        expected = _scalar_vector(create_composition_dict(df.iloc[row_id - 100]))
+        assert np.allclose(vector, expected, atol=1e-6)
+
+
+def test_query_vector_is_normalized_like_indexed_rows():
+    _, vectors = compute_similarity_vectors(_prepared_df())
+    fractional = compute_similarity_vector({"A": {"MA": 0.25, "FA": 0.25}, "B": {"Pb": 3.0}, "C": {"I": 1.0}})
+    assert np.allclose(fractional, vectors[3], atol=1e-6)
+
+
+def test_query_returns_exact_match_first(tmp_path):
+    ids, vectors = compute_similarity_vectors(_prepared_df())
+    index = SimilarityIndex.create(str(tmp_path), ids, vectors)
+    found_ids, distances = index.query(vectors[1], k=2)
+    assert found_ids[0, 0] == 1
+    assert np.isclose(distances[0, 0], 0.0, atol=1e-3)
+    assert distances[0, 0] <= distances[0, 1]
+
+
+def test_add_persists_incrementally(tmp_path):
+    ids, vectors = compute_similarity_vectors(_prepared_df())
+    index = SimilarityIndex.create(str(tmp_path), ids[:2], vectors[:2])
+    index.add(ids[2:], vectors[2:])
+
+    assert isinstance(index._vectors, np.memmap)
+    loaded = SimilarityIndex.load(str(tmp_path))
+    assert len(loaded) == 4
+    query = compute_similarity_vector({"A": {"Cs": 1.0}, "B": {"Sn": 1.0}, "C": {"Br": 3.0}})
+    found_ids, _ = loaded.query(query, k=1)
+    assert found_ids[0, 0] == 2
+    assert np.isclose(loaded.descriptors([2])[0]["r_B"], 1.10, atol=1e-5)
@@ -0,0 +1,110 @@
+import numpy as np
+
+from perovskite_prediction_api.etl.structure_store import StructureStore, parse_cif, parse_oqmd_structure, \
+    SPECIES_CODES, ingest_cif_files, ingest_oqmd_structures
+
+CS_PB_I3_CIF = """
+data_CsPbI3
+_cell_length_a    6.2894(3)
+_cell_length_b    6.2894(3)
+_cell_length_c    6.2894(3)
+_cell_angle_alpha 90
+_cell_angle_beta  90
+_cell_angle_gamma 90
+loop_
+_symmetry_equiv_pos_as_xyz
+'x, y, z'
+'-x, -y, -z'
+'z, x, y'
+'y, z, x'
+loop_
+_atom_site_label
+_atom_site_type_symbol
+_atom_site_fract_x
+_atom_site_fract_y
+_atom_site_fract_z
+_atom_site_occupancy
+Cs1 Cs+ 0.5 0.5 0.5 1
+Pb1 Pb2+ 0 0 0 1
+I1 I- 0.5 0 0 1
+"""
+
+
+def test_parse_cif_expands_symmetry():
+    structure = parse_cif(CS_PB_I3_CIF, "CsPbI3")
+    assert structure.symbols.count("I") == 3
+    assert structure.symbols.count("Cs") == 1
+    assert np.isclose(structure.volume, 6.2894 ** 3)
+
+
+def test_parse_oqmd_structure():
+    record = {"id": 42, "attributes": {
+        "lattice_vectors": [[4.0, 0, 0], [0, 4.0, 0], [0, 0, 4.0]],
+        "species_at_sites": ["Cs", "Pb"],
+        "cartesian_site_positions": [[2.0, 2.0, 2.0], [0, 0, 0]],
+    }}
+    structure = parse_oqmd_structure(record)
+    assert structure.structure_id == "42"
+    assert np.allclose(structure.frac_coords[0], [0.5, 0.5, 0.5])
+
+    phase = {"name": "CsPbI3", "unit_cell": [[4.0, 0, 0], [0, 4.0, 0], [0, 0, 4.0]], "sites": ["Cs @ 0.5 0.5 0.5"]}
+    assert parse_oqmd_structure(phase).species.tolist() == [SPECIES_CODES["Cs"]]
+
+
+def test_store_roundtrip(tmp_path):
+    structures = [parse_cif(CS_PB_I3_CIF, "om140"), parse_oqmd_structure(
+        {"name": "CsPbBr3", "unit_cell": [[5.9, 0, 0], [0, 5.9, 0], [0, 0, 5.9]],
+         "sites": ["Cs @ 0.5 0.5 0.5", "Pb @ 0 0 0", "Br @ 0.5 0 0", "Br @ 0 0.5 0", "Br @ 0 0 0.5"]})]
+    path = str(tmp_path / "structures.bin")
+    StructureStore.write(path, structures)
+
+    store = StructureStore(path)
+    assert len(store) == 2 and "om140" in store
+    loaded = store.get("CsPbBr3")
+    assert loaded.symbols == ["Cs", "Pb", "Br", "Br", "Br"]
+    assert np.allclose(loaded.lattice, structures[1].lattice)
+    assert store.site_offsets.tolist() == [0, 5, 10]
+
+
+def test_parse_cif_keeps_partial_occupancies():
+    disordered = CS_PB_I3_CIF.replace("I1 I- 0.5 0 0 1", "I1 I- 0.5 0 0 0.67\nBr1 Br- 0.5 0 0 0.33")
+    structure = parse_cif(disordered, "CsPbI2Br")
+    assert not structure.is_ordered
+    assert np.isclose(structure.occupancies[np.array(structure.symbols) == "Br"].sum(), 3 * 0.33)
+    assert parse_cif(CS_PB_I3_CIF, "CsPbI3").is_ordered
+
+
+def test_ingest_reports_malformed_files_and_keeps_the_rest(tmp_path):
+    good, bad = tmp_path / "good.cif", tmp_path / "bad.cif"
+    good.write_text(CS_PB_I3_CIF.replace("I1 I- 0.5 0 0 1", "I1 I- 0.5 0 0 0.5"))
+    bad.write_text("data_bad\n_cell_length_a 5\n")
+
+    result = ingest_cif_files([str(good), str(bad)], str(tmp_path / "structures.bin"), max_workers=1)
+    with result.store as store:
+        assert store.ids == ["good"]
+        assert np.allclose(store.get("good").occupancies[-3:], 0.5)
+    assert list(result.failures) == ["bad"]
+    assert "cell parameter" in result.failures["bad"]
+
+
+def test_ingest_reports_duplicate_ids(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    paths = [tmp_path / "a" / "CsPbI3.cif", tmp_path / "b" / "CsPbI3.cif"]
+    for path in paths:
+        path.write_text(CS_PB_I3_CIF)
+
+    result = ingest_cif_files([str(path) for path in paths], str(tmp_path / "structures.bin"), max_workers=1)
+    with result.store as store:
+        assert store.ids == ["CsPbI3"]
+    assert "Duplicate" in result.failures["CsPbI3"]
+
+
+def test_ingest_oqmd_reports_bad_records(tmp_path):
+    records = [{"name": "CsPbBr3", "unit_cell": [[5.9, 0, 0], [0, 5.9, 0], [0, 0, 5.9]],
+                "sites": ["Cs @ 0.5 0.5 0.5", "Pb @ 0 0 0"]}, {"id": 2}]
+
+    result = ingest_oqmd_structures(records, str(tmp_path / "structures.bin"), max_workers=1)
+    with result.store as store:
+        assert store.ids == ["CsPbBr3"]
+    assert list(result.failures) == ["2"] and "no lattice" in result.failures["2"]
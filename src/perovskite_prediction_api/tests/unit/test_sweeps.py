@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from perovskite_prediction_api.api.prediction.prediction_service import PredictionService
+from perovskite_prediction_api.features.calc_factors import compute_octahedral_factor, compute_tolerance_factor
+from perovskite_prediction_api.features.structure_features import compute_effective_radii
+from perovskite_prediction_api.features.sweeps import SweepAxis, compute_sweep
+from perovskite_prediction_api.repository.model_repository import LocalModelRepository
+from perovskite_prediction_api.tests.paths import MODELS_DIR
+
+BASE = {"A": {"MA": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 3.0}}
+
+
+def _factors(br: float, cs: float):
+    composition = {"A": {"MA": 1 - cs, "Cs": cs}, "B": {"Pb": 1.0}, "C": {"I": 3 - br, "Br": br}}
+    r_A, r_B, r_C = compute_effective_radii(composition)
+    return compute_tolerance_factor(r_A, r_B, r_C), compute_octahedral_factor(r_B, r_C)
+
+
+def test_sweep_matches_scalar_factors_and_finite_differences():
+    result = compute_sweep(BASE, [SweepAxis("C", "Br", 0, 3, 7), SweepAxis("A", "Cs", 0, 0.3, 4)])
+
+    assert result.shape == (7, 4) and result.valid.all()
+    h = 1e-6
+    for i, br in enumerate(np.linspace(0, 3, 7)[1:-1], start=1):
+        for j, cs in enumerate(np.linspace(0, 0.3, 4)[1:], start=1):
+            tolerance, octahedral = _factors(br, cs)
+            assert result.tolerance_factor[i, j] == pytest.approx(tolerance)
+            assert result.octahedral_factor[i, j] == pytest.approx(octahedral)
+            d_br = (np.array(_factors(br + h, cs)) - np.array(_factors(br - h, cs))) / (2 * h)
+            d_cs = (np.array(_factors(br, cs + h)) - np.array(_factors(br, cs - h))) / (2 * h)
+            assert result.d_tolerance_factor["C:Br"][i, j] == pytest.approx(d_br[0], rel=1e-5)
+            assert result.d_octahedral_factor["C:Br"][i, j] == pytest.approx(d_br[1], rel=1e-5)
+            assert result.d_tolerance_factor["A:Cs"][i, j] == pytest.approx(d_cs[0], rel=1e-5)
+            assert result.d_octahedral_factor["A:Cs"][i, j] == 0
+
+
+def test_sweep_marks_overfilled_sites_and_rejects_fully_swept_ones():
+    result = compute_sweep(BASE, [SweepAxis("C", "Br", 0, 2, 3), SweepAxis("C", "Cl", 0, 2, 3)])
+    assert not result.valid[2, 2] and np.isnan(result.tolerance_factor[2, 2])
+    assert result.to_dict()["fields"]["tolerance_factor"][-1] is None
+
+    with pytest.raises(ValueError):
+        compute_sweep(BASE, [SweepAxis("C", "I", 0, 3, 4)])
+    with pytest.raises(ValueError):
+        compute_sweep(BASE, [SweepAxis("C", "Xx", 0, 3, 4)])
+
+
+def test_sweep_band_gap_matches_prediction_service():
+    service = PredictionService(LocalModelRepository(MODELS_DIR))
+    grid = service.sweep(BASE, [{"site": "C", "ion": "Br", "start": 0, "stop": 3, "num": 4}])
+
+    compositions = [{"A": {"MA": 1.0}, "B": {"Pb": 1.0}, "C": {"I": 3.0 - br, "Br": br} if 0 < br < 3
+                     else {"Br" if br else "I": 3.0}} for br in range(4)]
+    expected = [prediction["band_gap"] for prediction in service.predict([{"composition": composition}
+                                                                          for composition in compositions])]
+    assert grid["shape"] == [4]
+    assert grid["fields"]["band_gap"] == pytest.approx(expected, abs=1e-5)